@@ -4,18 +4,34 @@ from fastapi.security import OAuth2PasswordBearer, OAuth2AuthorizationCodeBearer
 from authlib.integrations.starlette_client import OAuth
 from app.models.chatbot import User
 from app.db.mongo import db
-from app.utils.auth import verify_password, get_password_hash, create_access_token, decode_access_token
+from app.utils.auth import (
+    create_access_token, decode_access_token, hash_password, verify_and_update_password, PasswordHasherBusy
+)
 from app.config.auth import OAUTH_CONFIGS, CALLBACK_URLS
+from app.utils.ttl_cache import TTLCache
+from app.utils.oauth_metadata import OAuthMetadataCache
 from typing import Optional, Dict
 from pydantic import BaseModel, EmailStr
 from datetime import datetime, timedelta
 from jose import JWTError, jwt
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
 
 router = APIRouter()
 
 # Initialize MongoDB collection
 users = db.users
 
+# Verified token payloads (until the token expires) and user profiles, so
+# authenticated requests normally skip both JWT verification and Mongo.
+# Invalidation is per process; the profile TTL bounds staleness across workers.
+token_cache = TTLCache(max_entries=10000, ttl=15 * 60)
+user_cache = TTLCache(max_entries=10000, ttl=5 * 60)
+
+def invalidate_user(user_id) -> None:
+    """Drop a cached profile after the user document changes"""
+    user_cache.pop(str(user_id))
+
 # Initialize OAuth with starlette integration
 oauth = OAuth()
 
@@ -50,6 +66,18 @@ def setup_oauth():
 # Initialize OAuth providers
 oauth = setup_oauth()
 
+# Discovery documents and signing keys, loaded at startup instead of during logins
+oauth_metadata = OAuthMetadataCache(db.oauth_metadata)
+
+def discovery_clients() -> Dict:
+    """Registered OAuth clients that use OpenID discovery"""
+    clients = {}
+    for name in OAUTH_CONFIGS:
+        client = oauth.create_client(name)
+        if client is not None and getattr(client, "_server_metadata_url", None):
+            clients[name] = client
+    return clients
+
 class UserInRegister(BaseModel):
     email: EmailStr
     name: Optional[str]
@@ -63,28 +91,49 @@ class UserInResponse(BaseModel):
     picture: Optional[str] = None
     provider_user_id: Optional[str] = None
 
+def hasher_busy() -> HTTPException:
+    return HTTPException(
+        status_code=503,
+        detail="Too many sign-ins in progress, please retry shortly",
+        headers={"Retry-After": "1"}
+    )
+
 @router.post("/register", response_model=UserInResponse)
 async def register(user: UserInRegister):
-    existing = await db["users"].find_one({"email": user.email})
-    if existing:
-        raise HTTPException(status_code=400, detail="Email already registered")
-    hashed_password = get_password_hash(user.password)
+    try:
+        hashed_password = await hash_password(user.password)
+    except PasswordHasherBusy:
+        raise hasher_busy()
     user_doc = {
         "email": user.email,
         "name": user.name,
         "hashed_password": hashed_password,
         "provider": "local"
     }
-    result = await db["users"].insert_one(user_doc)
+    # The unique local-email index rejects duplicates atomically
+    try:
+        result = await db["users"].insert_one(user_doc)
+    except DuplicateKeyError:
+        raise HTTPException(status_code=400, detail="Email already registered")
     user_doc["id"] = str(result.inserted_id)
+    invalidate_user(user_doc["id"])
     user_doc.pop("hashed_password")
     return UserInResponse(**user_doc)
 
 @router.post("/login")
 async def login(form_data: OAuth2PasswordRequestForm = Depends()):
-    user = await db["users"].find_one({"email": form_data.username})
-    if not user or not verify_password(form_data.password, user["hashed_password"]):
+    user = await db["users"].find_one({"email": form_data.username, "provider": "local"})
+    if not user or not user.get("hashed_password"):
         raise HTTPException(status_code=401, detail="Incorrect email or password")
+    try:
+        valid, new_hash = await verify_and_update_password(form_data.password, user["hashed_password"])
+    except PasswordHasherBusy:
+        raise hasher_busy()
+    if not valid:
+        raise HTTPException(status_code=401, detail="Incorrect email or password")
+    if new_hash:
+        # The cost factor changed since this hash was made; store the upgraded one
+        await db["users"].update_one({"_id": user["_id"]}, {"$set": {"hashed_password": new_hash}})
     access_token = create_access_token(
         data={"sub": str(user["_id"])},
         expires_delta=timedelta(minutes=60)
@@ -97,14 +146,22 @@ async def get_current_user(token: str = Depends(OAuth2AuthorizationCodeBearer(
 ))):
     """Get current user from JWT token"""
     try:
-        user_data = decode_access_token(token)
+        user_data = token_cache.get(token)
         if user_data is None:
-            raise HTTPException(status_code=401, detail="Invalid token")
-        
-        user = await users.find_one({"_id": user_data.get("sub")})
+            user_data = decode_access_token(token)
+            if user_data is None:
+                raise HTTPException(status_code=401, detail="Invalid token")
+            token_cache.set(token, user_data, expires_at=user_data.get("exp"))
+
+        user_id = user_data.get("sub")
+        user = user_cache.get(user_id)
         if user is None:
-            raise HTTPException(status_code=404, detail="User not found")
-        return User(**user)
+            user_doc = await users.find_one({"_id": user_id})
+            if user_doc is None:
+                raise HTTPException(status_code=404, detail="User not found")
+            user = User(**user_doc)
+            user_cache.set(user_id, user)
+        return user
     except JWTError:
         raise HTTPException(status_code=401, detail="Invalid token")
 
@@ -124,23 +181,24 @@ async def upsert_social_user(
         "provider_user_id": provider_user_id
     }
     
-    # Try to find existing user
-    existing_user = await users.find_one({
-        "auth_provider": provider,
-        "provider_user_id": provider_user_id
-    })
-    
-    if existing_user:
-        # Update existing user
-        await users.update_one(
-            {"_id": existing_user["_id"]},
-            {"$set": user_data}
-        )
-        user_data["id"] = existing_user["_id"]
-    else:
-        # Create new user
-        result = await users.insert_one(user_data)
-        user_data["id"] = str(result.inserted_id)
+    # One atomic round-trip; the unique (auth_provider, provider_user_id) index
+    # makes concurrent callbacks for a new user converge on one document
+    for attempt in range(2):
+        try:
+            user_doc = await users.find_one_and_update(
+                {"auth_provider": provider, "provider_user_id": provider_user_id},
+                {"$set": user_data, "$setOnInsert": {"created_at": datetime.utcnow()}},
+                upsert=True,
+                return_document=ReturnDocument.AFTER
+            )
+            break
+        except DuplicateKeyError:
+            # Lost the insert race; the retry matches the winner's document
+            if attempt:
+                raise
+    user_data["id"] = str(user_doc["_id"])
+
+    invalidate_user(user_data["id"])
     
     return User(**user_data)
 
@@ -216,6 +274,11 @@ async def auth_callback(provider: str, request: Request):
 async def read_users_me(current_user: UserInResponse = Depends(get_current_user)):
     return current_user
 
+@router.get("/metrics")
+async def auth_cache_metrics():
+    """Hit rates of the token and user-profile caches, and OAuth metadata refreshes"""
+    return {"tokens": token_cache.stats(), "users": user_cache.stats(), "oauth_metadata": oauth_metadata.metrics}
+
 # Health check endpoint
 @router.get("/health")
 async def health_check():
@@ -1,12 +1,30 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Depends, Query, Response
+from fastapi.responses import StreamingResponse
+from fastapi.security import OAuth2PasswordBearer
 import os
-import re
-from typing import List, Dict, Tuple
+import json
+import asyncio
+from typing import List, Dict, Optional, Set, Union, Literal
 from datetime import datetime
-from openai import AsyncOpenAI
+from openai import AsyncOpenAI, RateLimitError
 from dotenv import load_dotenv
-from app.models.chatbot import ChatRequest, ChatResponse, ItineraryDay, ChatHistory
+from app.models.chatbot import ChatRequest, ChatResponse, ItineraryDay, ChatHistory, ChatHistorySummary
 from app.db.mongo import db
+from app.travel_providers.locations import city_index
+from app.api.travel import aggregator
+from app.utils.auth import decode_access_token
+from app.utils.itinerary_parser import IncrementalItineraryParser, parse_ai_response
+from app.utils.itinerary_enrichment import ItineraryEnricher
+from app.utils.chat_sessions import ChatSession, SessionStore
+from app.utils.write_behind import WriteBehindQueue
+from app.utils.pagination import after_cursor, decode_cursor, encode_cursor
+from app.utils.history_archive import HistoryArchive
+from app.utils.llm_cache import LLMResponseCache, cache_key
+from app.utils.similarity import SimilarRequestIndex
+from app.utils.llm_scheduler import (
+    LLMScheduler, SchedulerBusy, PRIORITY_ANONYMOUS, PRIORITY_USER, PRIORITY_BACKGROUND,
+    estimate_tokens, retry_after_seconds
+)
 
 load_dotenv()
 
@@ -15,16 +33,117 @@ router = APIRouter()
 # Initialize MongoDB collection
 chat_history = db.chat_history
 
-@router.get("/history/{user_id}", response_model=List[ChatHistory])
-async def get_chat_history(user_id: str):
-    """Retrieve chat history for a specific user"""
-    cursor = chat_history.find({"user_id": user_id}).sort("created_at", -1)
-    history = await cursor.to_list(length=None)
-    return [ChatHistory(**item) for item in history]
+# History is written in batches off the request path
+history_writer = WriteBehindQueue(chat_history, name="chat_history")
+
+# Chats past CHAT_ARCHIVE_AFTER_DAYS move to compressed buckets, still served by the history API
+history_archive = HistoryArchive(chat_history, db.chat_history_archive)
+
+# Only what a list view shows; skips the itinerary and booking links
+HISTORY_SUMMARY_PROJECTION = {
+    "id": 1, "user_id": 1, "session_id": 1, "request": 1, "created_at": 1,
+    "response.summary": 1, "response.cities": 1
+}
+
+@router.get("/history/{user_id}", response_model=Union[List[ChatHistory], List[ChatHistorySummary]])
+async def get_chat_history(
+    user_id: str,
+    response: Response,
+    limit: int = Query(default=20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    view: Literal["full", "summary"] = "full"
+):
+    """Retrieve chat history for a specific user, newest first
+
+    Pages are `limit` items long; pass the X-Next-Cursor response header
+    back as `cursor` for the next page. `view=summary` omits itineraries.
+    Archived chats follow the hot ones seamlessly, since they are older.
+    """
+    query = {"user_id": user_id, **after_cursor("created_at", cursor)}
+    projection = HISTORY_SUMMARY_PROJECTION if view == "summary" else None
+    # One extra document tells us whether there is a next page
+    docs = await chat_history.find(query, projection).sort(
+        [("created_at", -1), ("_id", -1)]
+    ).limit(limit + 1).to_list(length=limit + 1)
+
+    if len(docs) <= limit:
+        # The hot collection is exhausted; continue into the archive
+        before = (docs[-1]["created_at"], docs[-1]["_id"]) if docs else (decode_cursor(cursor) if cursor else None)
+        docs += await history_archive.read(user_id, before, limit + 1 - len(docs))
+
+    if len(docs) > limit:
+        docs = docs[:limit]
+        response.headers["X-Next-Cursor"] = encode_cursor(docs[-1]["created_at"], docs[-1]["_id"])
+
+    if view == "summary":
+        return [
+            ChatHistorySummary(
+                id=item.get("id") or str(item["_id"]),
+                user_id=item.get("user_id"),
+                session_id=item.get("session_id"),
+                request=item["request"],
+                summary=item["response"]["summary"],
+                cities=item["response"].get("cities", []),
+                created_at=item["created_at"]
+            )
+            for item in docs
+        ]
+    return [ChatHistory(**item) for item in docs]
 
 # Initialize OpenAI client
 client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
 
+# Model parameters; also part of the response cache key
+CHAT_MODEL = "gpt-3.5-turbo"
+MAX_TOKENS = 800
+TEMPERATURE = 0.7
+
+# Ask for JSON structured output instead of the bullet format (non-streaming endpoint only)
+JSON_MODE = os.getenv("CHATBOT_JSON_MODE", "false").lower() == "true"
+
+# Cache of structured responses for repeated prompts
+response_cache = LLMResponseCache(db.llm_response_cache)
+
+# Past requests, to reuse itineraries for differently worded requests
+similar_requests = SimilarRequestIndex()
+
+# Attach live flight and hotel prices to each itinerary day
+PRICE_ENRICHMENT = os.getenv("CHATBOT_PRICE_ENRICHMENT", "true").lower() == "true"
+
+# Shared concurrency pool and rate budget for every OpenAI call
+llm_scheduler = LLMScheduler()
+
+# Conversations, compacted in the background once they outgrow the context window
+async def summarize_turns(summary: str, messages: List[Dict[str, str]]) -> str:
+    """Fold older chat turns into the running conversation summary"""
+    transcript = "\n".join(f"{m['role']}: {m['content']}" for m in messages)
+    prompt = [
+        {"role": "system", "content": "You maintain a running summary of a travel planning conversation."},
+        {"role": "user", "content": (
+            f"Summary so far: {summary or '(none)'}\n\nNew turns:\n{transcript}\n\n"
+            "Rewrite the summary in under 120 words, keeping destinations, dates, budget and preferences."
+        )}
+    ]
+    response = await llm_scheduler.call(
+        lambda: client.chat.completions.create(model=CHAT_MODEL, messages=prompt, max_tokens=200, temperature=0.2),
+        priority=PRIORITY_BACKGROUND,
+        tokens=estimate_tokens(prompt, 200)
+    )
+    return response.choices[0].message.content
+
+chat_sessions = SessionStore(db.chat_sessions, summarize=summarize_turns)
+
+# Keeps fire-and-forget tasks referenced until they finish
+background_tasks: Set[asyncio.Task] = set()
+
+def run_in_background(coro) -> None:
+    task = asyncio.create_task(coro)
+    background_tasks.add(task)
+    task.add_done_callback(background_tasks.discard)
+
+# Bearer token is optional; it only raises the request's queue priority
+optional_token = OAuth2PasswordBearer(tokenUrl="/auth/login", auto_error=False)
+
 # Travel assistant prompt template
 TRAVEL_ASSISTANT_PROMPT = """
 You are a travel planning assistant. Create a detailed travel itinerary following this exact format:
@@ -53,6 +172,46 @@ Important formatting rules:
 User's message: {user_message}
 """
 
+# Structured-output variant, parsed by parse_json_response
+TRAVEL_ASSISTANT_JSON_PROMPT = """
+You are a travel planning assistant. Create a detailed travel itinerary and reply with a single JSON object:
+
+{{"summary": "2-3 sentences describing the overall trip",
+  "itinerary": [{{"city": "City/Location", "activities": ["Activity 1", "Activity 2"], "accommodation": "Accommodation details if changing location, otherwise null"}}]}}
+
+Include one itinerary entry per day. Keep descriptions concise and practical.
+
+User's message: {user_message}
+"""
+
+def openai_configured() -> bool:
+    """Whether a real OpenAI API key is set"""
+    return bool(os.getenv("OPENAI_API_KEY")) and os.getenv("OPENAI_API_KEY") != "your_openai_key"
+
+def build_messages(
+    user_message: str,
+    json_mode: bool = False,
+    context: Optional[List[Dict[str, str]]] = None
+) -> List[Dict[str, str]]:
+    """Chat messages for a travel planning request, after any prior session context"""
+    template = TRAVEL_ASSISTANT_JSON_PROMPT if json_mode else TRAVEL_ASSISTANT_PROMPT
+    return [
+        {"role": "system", "content": "You are a helpful travel assistant."},
+        *(context or []),
+        {"role": "user", "content": template.format(user_message=user_message)}
+    ]
+
+def request_priority(token: Optional[str]) -> int:
+    """Queue priority for a request: logged-in users go first"""
+    return PRIORITY_USER if token and decode_access_token(token) else PRIORITY_ANONYMOUS
+
+def too_many_requests(retry_after: int) -> HTTPException:
+    return HTTPException(
+        status_code=429,
+        detail="The travel assistant is busy, please retry shortly",
+        headers={"Retry-After": str(retry_after)}
+    )
+
 def extract_cities(itinerary: List[ItineraryDay]) -> List[str]:
     """Extract and return unique cities from itinerary"""
     cities = [day.city for day in itinerary]
@@ -68,7 +227,9 @@ def generate_booking_links(itinerary: List[ItineraryDay]) -> Dict[str, str]:
         return {"booking": "", "skyscanner": ""}
         
     total_days = len(itinerary)
-    main_city = cities[0].split()[0]  # Take first word of city name for better compatibility
+    location = city_index.resolve(cities[0])
+    # Fall back to the first word of unknown city names for better compatibility
+    main_city = location.city if location else cities[0].split()[0]
     
     # Generate Booking.com link
     booking_url = (
@@ -82,7 +243,7 @@ def generate_booking_links(itinerary: List[ItineraryDay]) -> Dict[str, str]:
     )
     
     # Generate Skyscanner link
-    city_code = main_city[:3].upper()
+    city_code = location.iata if location else main_city[:3].upper()
     skyscanner_url = f"https://www.skyscanner.com/transport/flights/{city_code}"
     
     return {
@@ -90,74 +251,66 @@ def generate_booking_links(itinerary: List[ItineraryDay]) -> Dict[str, str]:
         "skyscanner": skyscanner_url
     }
 
-async def save_chat_history(request: ChatRequest, response: ChatResponse) -> None:
+def response_cache_key(message: str, json_mode: bool = False) -> str:
+    return cache_key(
+        message,
+        model=CHAT_MODEL,
+        max_tokens=MAX_TOKENS,
+        temperature=TEMPERATURE,
+        template=TRAVEL_ASSISTANT_JSON_PROMPT if json_mode else TRAVEL_ASSISTANT_PROMPT
+    )
+
+async def find_reusable_response(message: str, key: str) -> Optional[ChatResponse]:
+    """A stored answer for this request: exact cache hit first, then a similar past request"""
+    cached = await response_cache.get(key)
+    if not cached:
+        await similar_requests.warm(chat_history)
+        match = similar_requests.find(message)
+        cached = match[1] if match else None
+    return cached.copy(update={"cached": True}) if cached else None
+
+def itinerary_enricher(request: ChatRequest) -> ItineraryEnricher:
+    """Enricher for a request; with enrichment disabled it only adds plain search links"""
+    return ItineraryEnricher(aggregator if PRICE_ENRICHMENT else None, request.start_date)
+
+async def price_itinerary(request: ChatRequest, response: ChatResponse) -> ChatResponse:
+    """Copy of a stored response with prices fetched for this request"""
+    enricher = itinerary_enricher(request)
+    for day in response.itinerary:
+        enricher.add_day(day)
+    return response.copy(update={"itinerary": await enricher.finish()})
+
+async def finish_turn(request: ChatRequest, session: ChatSession, response: ChatResponse) -> ChatResponse:
+    """Record the turn in its session and in chat history"""
+    response = response.copy(update={"session_id": session.id})
+    turn = session.turns + 1  # Before record_turn counts this one
+    await chat_sessions.record_turn(session, request.message, response)
+    if chat_sessions.needs_compaction(session):
+        run_in_background(chat_sessions.compact(session))
+    await save_chat_history(request, response, turn)
+    return response
+
+async def save_chat_history(request: ChatRequest, response: ChatResponse, turn: int = 1) -> None:
     """Save chat request and response to MongoDB"""
     history = ChatHistory(
         user_id=request.user_id,
+        session_id=response.session_id,
+        turn=turn,
         request=request.message,
         response=response
     )
-    await chat_history.insert_one(history.dict())
-
-def parse_ai_response(response_text: str) -> Tuple[str, List[ItineraryDay]]:
-    """Parse the AI response into summary and itinerary sections"""
-    # Extract summary
-    summary_match = re.search(r'Trip Summary:(.+?)(?=Day \d|$)', response_text, re.DOTALL)
-    if not summary_match:
-        raise ValueError("Could not find Trip Summary section")
-    summary_section = summary_match.group(1).strip()
-    
-    # Extract and parse daily itinerary
-    itinerary_days = []
-    day_sections = re.findall(r'Day (\d+)[^\n]*?(?:\n|$)(?:(?!Day \d).)*', response_text, re.DOTALL)
-    
-    current_section = None
-    for section in re.split(r'(Day \d+[^\n]*)', response_text):
-        section = section.strip()
-        if not section:
-            continue
-            
-        if section.startswith('Day'):
-            if current_section:
-                # Parse previous section
-                city = current_section['heading'].split(' - ')[-1].strip()
-                activities = [a.strip('• ').strip() for a in current_section['content']]
-                accommodation = next((a for a in activities if 'stay' in a.lower() or 'resort' in a.lower() or 'hotel' in a.lower() or 'accommodation' in a.lower()), None)
-                if accommodation:
-                    activities.remove(accommodation)
-                
-                itinerary_days.append(ItineraryDay(
-                    city=city,
-                    activities=activities,
-                    accommodation=accommodation
-                ))
-                
-            current_section = {'heading': section, 'content': []}
-        elif current_section is not None:
-            current_section['content'].extend([l.strip() for l in section.split('\n') if l.strip() and not l.strip().startswith('Day')])
-    
-    # Don't forget to add the last section
-    if current_section:
-        city = current_section['heading'].split(' - ')[-1].strip()
-        activities = [a.strip('• ').strip() for a in current_section['content']]
-        accommodation = next((a for a in activities if 'stay' in a.lower() or 'resort' in a.lower() or 'hotel' in a.lower() or 'accommodation' in a.lower()), None)
-        if accommodation:
-            activities.remove(accommodation)
-        
-        itinerary_days.append(ItineraryDay(
-            city=city,
-            activities=activities,
-            accommodation=accommodation
-        ))
-    
-    return summary_section, itinerary_days
+    await history_writer.put(history.dict())
+    # Only fresh plans for opening requests feed the similarity index; reused ones
+    # are already in it, and follow-up answers depend on the conversation
+    if response.itinerary and not response.cached and turn == 1:
+        similar_requests.add(history.id, request.message, response)
 
 @router.post("/", response_model=ChatResponse)
-async def ask_chatbot(request: ChatRequest):
+async def ask_chatbot(request: ChatRequest, token: Optional[str] = Depends(optional_token)):
     """Handle chatbot requests and return structured travel responses"""
     try:
         # Check if OpenAI API key is configured
-        if not os.getenv("OPENAI_API_KEY") or os.getenv("OPENAI_API_KEY") == "your_openai_key":
+        if not openai_configured():
             return ChatResponse(
                 summary="API Configuration Error",
                 itinerary=[],
@@ -165,18 +318,29 @@ async def ask_chatbot(request: ChatRequest):
                 cities=[]
             )
         
-        # Create the prompt with user message
-        prompt = TRAVEL_ASSISTANT_PROMPT.format(user_message=request.message)
-        
-        # Make OpenAI API call
-        response = await client.chat.completions.create(
-            model="gpt-3.5-turbo",
-            messages=[
-                {"role": "system", "content": "You are a helpful travel assistant."},
-                {"role": "user", "content": prompt}
-            ],
-            max_tokens=800,
-            temperature=0.7
+        session = await chat_sessions.load(request.session_id, request.user_id)
+
+        # Serve repeated or near-identical prompts without calling the LLM;
+        # follow-up turns depend on the conversation, so only opening requests qualify
+        key = response_cache_key(request.message, JSON_MODE)
+        if session.turns == 0:
+            chat_response = await find_reusable_response(request.message, key)
+            if chat_response:
+                chat_response = await price_itinerary(request, chat_response)
+                return await finish_turn(request, session, chat_response)
+
+        # Make OpenAI API call through the scheduler
+        messages = build_messages(request.message, JSON_MODE, session.context_messages())
+        response = await llm_scheduler.call(
+            lambda: client.chat.completions.create(
+                model=CHAT_MODEL,
+                messages=messages,
+                max_tokens=MAX_TOKENS,
+                temperature=TEMPERATURE,
+                **({"response_format": {"type": "json_object"}} if JSON_MODE else {})
+            ),
+            priority=request_priority(token),
+            tokens=estimate_tokens(messages, MAX_TOKENS)
         )
         
         # Extract and parse the AI's response
@@ -192,7 +356,12 @@ async def ask_chatbot(request: ChatRequest):
 
         # Parse the response into structured format
         summary, itinerary = parse_ai_response(ai_response)
-        
+
+        # Start price lookups now; they run while the response is assembled and cached
+        enricher = itinerary_enricher(request)
+        for day in itinerary:
+            enricher.add_day(day)
+
         # Extract cities and generate booking links
         cities = extract_cities(itinerary)
         booking_links = generate_booking_links(itinerary)
@@ -205,11 +374,19 @@ async def ask_chatbot(request: ChatRequest):
             cities=cities
         )
 
+        # Prices go stale long before the plan does, so the cache keeps the unpriced plan
+        if session.turns == 0:
+            await response_cache.set(key, chat_response)
+        chat_response = chat_response.copy(update={"itinerary": await enricher.finish()})
+
         # Save to MongoDB
-        await save_chat_history(request, chat_response)
+        return await finish_turn(request, session, chat_response)
 
-        return chat_response
-        
+    except SchedulerBusy as e:
+        raise too_many_requests(e.retry_after)
+    except RateLimitError as e:
+        print(f"Error in chatbot: {str(e)}")
+        raise too_many_requests(int(retry_after_seconds(e, 0)))
     except Exception as e:
         print(f"Error in chatbot: {str(e)}")
         return ChatResponse(
@@ -218,3 +395,121 @@ async def ask_chatbot(request: ChatRequest):
             booking_links={},
             cities=[]
         )
+
+def sse_event(event: str, data: dict) -> str:
+    """Format one server-sent event frame"""
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+async def stream_travel_plan(request: ChatRequest, priority: int = PRIORITY_ANONYMOUS):
+    """Yield SSE frames as the itinerary streams in from OpenAI"""
+    error_response = ChatResponse(
+        summary="An error occurred while processing your request",
+        itinerary=[],
+        booking_links={},
+        cities=[]
+    )
+    if not openai_configured():
+        yield sse_event("error", ChatResponse(summary="API Configuration Error", itinerary=[], booking_links={}, cities=[]).dict())
+        return
+
+    session = await chat_sessions.load(request.session_id, request.user_id)
+    key = response_cache_key(request.message)
+    chat_response = await find_reusable_response(request.message, key) if session.turns == 0 else None
+    if chat_response:
+        # Replay the stored plan in the same event sequence as a live stream
+        yield sse_event("summary", {"summary": chat_response.summary})
+        for day in chat_response.itinerary:
+            yield sse_event("day", day.dict())
+        chat_response = await price_itinerary(request, chat_response)
+        yield sse_event("done", chat_response.copy(update={"session_id": session.id}).dict())
+        try:
+            await finish_turn(request, session, chat_response)
+        except Exception as e:
+            print(f"Error saving streamed chat history: {str(e)}")
+        return
+
+    parser = IncrementalItineraryParser()
+    enricher = itinerary_enricher(request)
+    messages = build_messages(request.message, context=session.context_messages())
+    try:
+        # The slot is held until the stream is fully read
+        async with llm_scheduler.slot(priority, estimate_tokens(messages, MAX_TOKENS)) as ticket:
+            try:
+                stream = await client.chat.completions.create(
+                    model=CHAT_MODEL,
+                    messages=messages,
+                    max_tokens=MAX_TOKENS,
+                    temperature=TEMPERATURE,
+                    stream=True,
+                    stream_options={"include_usage": True}
+                )
+            except RateLimitError as e:
+                llm_scheduler.pause(retry_after_seconds(e, 0))
+                raise
+
+            async for chunk in stream:
+                # The final chunk carries usage and no choices
+                if chunk.usage:
+                    llm_scheduler.record_usage(ticket, chunk.usage)
+                if not chunk.choices or not chunk.choices[0].delta.content:
+                    continue
+                for event, payload in parser.feed(chunk.choices[0].delta.content):
+                    yield parser_frame(event, payload, enricher)
+        for event, payload in parser.close():
+            yield parser_frame(event, payload, enricher)
+    except Exception as e:
+        print(f"Error in chatbot stream: {str(e)}")
+        yield sse_event("error", error_response.dict())
+        return
+
+    if parser.summary is None:
+        yield sse_event("error", error_response.dict())
+        return
+
+    chat_response = ChatResponse(
+        summary=parser.summary,
+        itinerary=parser.itinerary,
+        booking_links=generate_booking_links(parser.itinerary),
+        cities=extract_cities(parser.itinerary)
+    )
+    priced_response = chat_response.copy(update={"itinerary": await enricher.finish(), "session_id": session.id})
+    yield sse_event("done", priced_response.dict())
+
+    # Persist once the whole plan has been delivered; the cache keeps the unpriced plan
+    try:
+        if session.turns == 0:
+            await response_cache.set(key, chat_response)
+        await finish_turn(request, session, priced_response)
+    except Exception as e:
+        print(f"Error saving streamed chat history: {str(e)}")
+
+def parser_frame(event: str, payload, enricher: ItineraryEnricher) -> str:
+    """SSE frame for an IncrementalItineraryParser event; days also start their price lookups"""
+    if event == "summary":
+        return sse_event("summary", {"summary": payload})
+    enricher.add_day(payload)
+    return sse_event("day", payload.dict())
+
+@router.post("/stream")
+async def ask_chatbot_stream(request: ChatRequest, token: Optional[str] = Depends(optional_token)):
+    """Stream a travel plan as server-sent events
+
+    Emits `summary` once, a `day` event per itinerary day as it completes,
+    then a `done` event carrying the full ChatResponse (cities and
+    booking_links included), or an `error` event. Answers 429 with
+    Retry-After up front when the LLM queue is full.
+    """
+    try:
+        llm_scheduler.check_capacity()
+    except SchedulerBusy as e:
+        raise too_many_requests(e.retry_after)
+    return StreamingResponse(
+        stream_travel_plan(request, request_priority(token)),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.get("/metrics")
+async def get_llm_metrics():
+    """LLM scheduler metrics: queue wait, token usage, rate-limit retries and shed requests"""
+    return llm_scheduler.snapshot()
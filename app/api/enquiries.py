@@ -1,10 +1,24 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request
 from app.models.enquiry import Enquiry
 from app.db.mongo import db
-from typing import List
+from app.utils.ndjson import import_ndjson, ndjson_response
+from app.utils.pagination import after_id
+from typing import List, Optional
+from datetime import datetime
+from pymongo.errors import DuplicateKeyError
+import time
 
 router = APIRouter()
 
+# The same email and message within this many seconds is treated as a resubmission
+DEDUPE_WINDOW_SECONDS = 10 * 60
+
+def stamp(enquiry: dict) -> dict:
+    """Add the creation time and the retry window the unique index dedupes on"""
+    enquiry["created_at"] = datetime.utcnow()
+    enquiry["dedupe_window"] = int(time.time() // DEDUPE_WINDOW_SECONDS)
+    return enquiry
+
 @router.get("/", response_model=List[Enquiry])
 async def list_enquiries():
     enquiries = []
@@ -16,7 +30,37 @@ async def list_enquiries():
 
 @router.post("/", response_model=Enquiry)
 async def create_enquiry(enquiry: Enquiry):
-    enquiry_dict = enquiry.dict(exclude_unset=True)
-    result = await db["enquiries"].insert_one(enquiry_dict)
+    enquiry_dict = stamp(enquiry.dict(exclude_unset=True))
+    try:
+        result = await db["enquiries"].insert_one(enquiry_dict)
+    except DuplicateKeyError:
+        # A resubmitted enquiry (double click, retry) returns the stored one;
+        # the same message sent again later is a new lead
+        existing = await db["enquiries"].find_one({
+            "email": enquiry.email,
+            "message": enquiry.message,
+            "dedupe_window": enquiry_dict["dedupe_window"]
+        })
+        existing["id"] = str(existing.pop("_id"))
+        return Enquiry(**existing)
     enquiry_dict["id"] = str(result.inserted_id)
     return Enquiry(**enquiry_dict)
+
+@router.post("/import")
+async def import_enquiries(request: Request):
+    """Create enquiries in bulk from an NDJSON body, one enquiry per line
+
+    Rows that fail validation or repeat an enquiry stored in the last few
+    minutes are listed by line number in `errors`; the others are still
+    imported.
+    """
+    return await import_ndjson(
+        request.stream(),
+        db["enquiries"],
+        lambda row: stamp(Enquiry(**{**row, "id": None}).dict(exclude={"id"}))
+    )
+
+@router.get("/export")
+async def export_enquiries(after: Optional[str] = None):
+    """Every enquiry as NDJSON, streamed in _id order; `after` resumes from the last _id received"""
+    return ndjson_response(db["enquiries"].find(after_id(after)).sort("_id", 1), "enquiries.ndjson")
@@ -0,0 +1,21 @@
+from fastapi import APIRouter, HTTPException, Query
+from typing import List
+from app.travel_providers.locations import Location, city_index, MAX_SUGGESTIONS
+
+router = APIRouter()
+
+@router.get("/autocomplete", response_model=List[Location])
+async def autocomplete_locations(
+    q: str = Query(..., min_length=1),
+    limit: int = Query(default=MAX_SUGGESTIONS, ge=1, le=MAX_SUGGESTIONS)
+):
+    """Suggest cities and airports matching a typed prefix"""
+    return city_index.autocomplete(q, limit)
+
+@router.get("/resolve", response_model=Location)
+async def resolve_location(q: str = Query(..., min_length=1)):
+    """Normalize a free-text city, alias or airport code to its canonical location"""
+    location = city_index.resolve(q)
+    if not location:
+        raise HTTPException(status_code=404, detail="Location not found")
+    return location
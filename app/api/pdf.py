@@ -1,15 +1,180 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import FileResponse, JSONResponse, Response
 from pydantic import BaseModel
-from typing import Optional
+from typing import Optional, Tuple
+from datetime import datetime
+from bson import ObjectId
+from bson.errors import InvalidId
+from app.db.mongo import db
+from app.api.chatbot import chat_history, history_archive
+from app.models.chatbot import ChatResponse
+from app.models.trip import Trip
+from app.utils.document_jobs import DocumentJobQueue, JobFailed, JobQueueFull
+from app.utils.pdf_documents import Blocks, document_renderer, history_blocks, itinerary_blocks, text_blocks, trip_blocks
 
 router = APIRouter()
 
+# Documents are generated by background workers; endpoints return a job to poll
+document_jobs = DocumentJobQueue(db.document_jobs, document_renderer)
+
+HISTORY_EXPORT_LIMIT = 1000  # Most recent chats included in a history export
+
 class PDFRequest(BaseModel):
     content: str
     filename: Optional[str] = "output.pdf"
 
-@router.post("/generate")
+class ItineraryPDFRequest(BaseModel):
+    itinerary: ChatResponse
+    title: Optional[str] = "Travel Itinerary"
+    filename: Optional[str] = "itinerary.pdf"
+
+class DocumentJob(BaseModel):
+    job_id: str
+    kind: str
+    status: str  # queued, running, done or failed
+    attempts: int
+    error: Optional[str] = None
+    document_id: Optional[str] = None
+    status_url: str
+    result_url: str
+    created_at: datetime
+    updated_at: datetime
+
+def job_status(job: dict) -> DocumentJob:
+    return DocumentJob(
+        job_id=job["_id"],
+        kind=job["kind"],
+        status=job["status"],
+        attempts=job["attempts"],
+        error=job["error"] if job["status"] == "failed" else None,
+        document_id=job["digest"],
+        status_url=f"/pdf/jobs/{job['_id']}",
+        result_url=f"/pdf/jobs/{job['_id']}/result",
+        created_at=job["created_at"],
+        updated_at=job["updated_at"]
+    )
+
+def job_accepted(job: dict) -> JSONResponse:
+    """202 pointing the client at the job's status URL"""
+    status = job_status(job)
+    return JSONResponse(
+        status_code=202,
+        content=status.model_dump(mode="json"),
+        headers={"Location": status.status_url, "Retry-After": "1"}
+    )
+
+async def enqueue(kind: str, params: dict, filename: Optional[str]) -> JSONResponse:
+    try:
+        job = await document_jobs.enqueue(kind, params, filename)
+    except JobQueueFull as e:
+        raise HTTPException(
+            status_code=503,
+            detail="Too many documents are being generated, please retry shortly",
+            headers={"Retry-After": str(e.retry_after)}
+        )
+    return job_accepted(job)
+
+@document_jobs.handler("text")
+async def text_job(params: dict) -> Tuple[Blocks, str]:
+    return text_blocks(params["content"]), params["filename"] or ""
+
+@document_jobs.handler("itinerary")
+async def itinerary_job(params: dict) -> Tuple[Blocks, str]:
+    title = params["title"] or ""
+    return itinerary_blocks(ChatResponse(**params["itinerary"]), title), title
+
+@document_jobs.handler("history")
+async def history_job(params: dict) -> Tuple[Blocks, str]:
+    """A user's saved plans, hot collection first, then the archive"""
+    user_id = params["user_id"]
+    chats = await chat_history.find({"user_id": user_id}).sort(
+        [("created_at", -1), ("_id", -1)]
+    ).limit(HISTORY_EXPORT_LIMIT).to_list(length=HISTORY_EXPORT_LIMIT)
+    if len(chats) < HISTORY_EXPORT_LIMIT:
+        before = (chats[-1]["created_at"], chats[-1]["_id"]) if chats else None
+        chats += await history_archive.read(user_id, before, HISTORY_EXPORT_LIMIT - len(chats))
+    if not chats:
+        raise JobFailed("No chat history to export")
+    return history_blocks(chats), "Trip History"
+
+def pdf_response(request: Request, digest: str, filename: Optional[str] = None) -> Response:
+    """Serve a cached document; FileResponse handles Range requests"""
+    etag = f'"{digest}"'
+    headers = {"ETag": etag, "Cache-Control": "public, max-age=31536000, immutable", "X-Document-Id": digest}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    path = document_renderer.cached(digest)
+    if not path:
+        raise HTTPException(status_code=404, detail="Document not found")
+    return FileResponse(
+        path,
+        media_type="application/pdf",
+        filename=filename or f"{digest[:12]}.pdf",
+        content_disposition_type="inline",
+        headers=headers
+    )
+
+@router.post("/generate", status_code=202, response_model=DocumentJob)
 async def generate_pdf(request: PDFRequest):
-    # Placeholder: In production, use a library like WeasyPrint, ReportLab, or pdfkit
-    # For now, just return the content and filename
-    return {"filename": request.filename, "content": request.content, "msg": "PDF generation not implemented yet."}
+    """Queue free text for rendering; "Day N" lines become headings and bullet lines list items"""
+    return await enqueue("text", request.model_dump(), request.filename)
+
+@router.post("/itinerary", status_code=202, response_model=DocumentJob)
+async def itinerary_pdf(request: ItineraryPDFRequest):
+    """Queue a chatbot itinerary for rendering, including any attached prices"""
+    return await enqueue("itinerary", request.model_dump(mode="json"), request.filename)
+
+@router.post("/history/{user_id}", status_code=202, response_model=DocumentJob)
+async def history_pdf(user_id: str):
+    """Queue an export of a user's saved travel plans, archived ones included"""
+    return await enqueue("history", {"user_id": user_id}, "trip-history.pdf")
+
+@router.get("/jobs/{job_id}", response_model=DocumentJob)
+async def get_job(job_id: str):
+    """Poll a document job"""
+    job = await document_jobs.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job_status(job)
+
+@router.get("/jobs/{job_id}/result")
+async def get_job_result(job_id: str, http_request: Request):
+    """The finished document; 202 with the job status while it is still pending"""
+    job = await document_jobs.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if job["status"] == "failed":
+        raise HTTPException(status_code=409, detail=f"Document generation failed: {job['error']}")
+    if job["status"] != "done":
+        return job_accepted(job)
+    if not document_renderer.cached(job["digest"]) and http_request.headers.get("if-none-match") != f'"{job["digest"]}"':
+        # Trimmed from the render cache; generate it again
+        job = await document_jobs.requeue(job_id) or job
+        return job_accepted(job)
+    return pdf_response(http_request, job["digest"], job["filename"])
+
+@router.get("/trips/{trip_id}")
+async def trip_pdf(trip_id: str, http_request: Request):
+    """Render a trip page"""
+    try:
+        trip = await db["trips"].find_one({"_id": ObjectId(trip_id)})
+    except InvalidId:
+        raise HTTPException(status_code=404, detail="Trip not found")
+    if not trip:
+        raise HTTPException(status_code=404, detail="Trip not found")
+    trip["id"] = str(trip.pop("_id"))
+    trip = Trip(**trip)
+    digest = await document_renderer.render(trip_blocks(trip), trip.title)
+    return pdf_response(http_request, digest, f"{trip.title}.pdf")
+
+@router.get("/documents/{digest}")
+async def get_document(digest: str, http_request: Request):
+    """A previously rendered document by its X-Document-Id; supports Range and If-None-Match"""
+    if len(digest) != 64 or not all(c in "0123456789abcdef" for c in digest):
+        raise HTTPException(status_code=404, detail="Document not found")
+    return pdf_response(http_request, digest)
+
+@router.get("/metrics")
+async def pdf_metrics():
+    """Renders, cache hits and shared renders, plus document job counts"""
+    return {**document_renderer.metrics, "jobs": await document_jobs.snapshot()}
@@ -1,5 +1,5 @@
 import os
-from fastapi import APIRouter, Query
+from fastapi import APIRouter, HTTPException, Query
 from datetime import datetime
 from typing import List, Optional, Dict
 from dotenv import load_dotenv
@@ -10,31 +10,25 @@ from app.travel_providers.schemas import (
     FlightResult,
     HotelResult,
     CabResult,
-    TravelProviderType
+    TravelProviderType,
+    RoutePlan,
+    FareMatrix
 )
 from app.travel_providers.aggregator import TravelAggregator
+from app.travel_providers.route_optimizer import RouteOptimizer
+from app.travel_providers.geo import HotelGeoIndex, geocode_hotels, rank_by_distance
+from app.travel_providers.locations import city_index
 from app.travel_providers.makemytrip import MakeMyTripProvider
 from app.travel_providers.base import TravelProvider, CabProvider
+from app.travel_providers.fare_cache import FareCache
+from app.travel_providers.currency import CurrencyConverter, FileRateSource, HttpRateSource
+from app.db.mongo import db
 
 # Load environment variables
 load_dotenv()
 
 router = APIRouter()
 
-class SavaariProvider(CabProvider):
-    """Savaari implementation of CabProvider"""
-    def __init__(self, api_key: str, api_secret: str):
-        self.api_key = api_key
-        self.api_secret = api_secret
-
-    async def search_cabs(self, criteria: CabSearchCriteria) -> List[CabResult]:
-        # Implement Savaari API integration here
-        return []
-
-    async def get_fare_estimate(self, from_location: str, to_location: str) -> float:
-        # Implement fare estimation here
-        return 0.0
-
 class CleartripProvider(TravelProvider):
     """Cleartrip implementation"""
     def __init__(self, api_key: str, api_secret: str):
@@ -59,6 +53,7 @@ class CleartripProvider(TravelProvider):
 from app.travel_providers.easemytrip import EaseMyTripProvider
 from app.travel_providers.indigo import IndigoProvider
 from app.travel_providers.riya import RiyaTravelProvider
+from app.travel_providers.savaari import SavaariProvider
 
 # Initialize providers with credentials from environment variables
 mmt_provider = MakeMyTripProvider(
@@ -88,7 +83,9 @@ riya_provider = RiyaTravelProvider(
 
 savaari_provider = SavaariProvider(
     api_key=os.getenv("SAVAARI_API_KEY", ""),
-    api_secret=os.getenv("SAVAARI_API_SECRET", "")
+    api_secret=os.getenv("SAVAARI_API_SECRET", ""),
+    base_url=os.getenv("SAVAARI_BASE_URL") or None,  # Point at a local stand-in for development
+    fare_cache=FareCache(db.cab_fare_cache)
 )
 
 # Create provider maps
@@ -104,12 +101,29 @@ cab_providers: Dict[str, CabProvider] = {
     TravelProviderType.SAVAARI.value: savaari_provider,
 }
 
+# FX rates come from FX_RATES_URL when set, otherwise the bundled table
+currency_converter = CurrencyConverter(
+    source=HttpRateSource(os.getenv("FX_RATES_URL")) if os.getenv("FX_RATES_URL") else FileRateSource()
+)
+
 # Create aggregator
 aggregator = TravelAggregator(
     providers=travel_providers,
-    cab_providers=cab_providers
+    cab_providers=cab_providers,
+    converter=currency_converter
 )
 
+async def convert_currency(results: List, currency: Optional[str]) -> List:
+    """Convert results to the requested currency, if any"""
+    if not currency:
+        return results
+    await currency_converter.ensure_fresh()
+    if not currency_converter.supports(currency):
+        raise HTTPException(status_code=400, detail=f"Unsupported currency: {currency}")
+    return currency_converter.convert(results, currency)
+
+route_optimizer = RouteOptimizer(aggregator)
+
 @router.get("/flights/search", response_model=List[FlightResult])
 async def search_flights(
     from_city: str,
@@ -118,7 +132,8 @@ async def search_flights(
     return_date: Optional[datetime] = None,
     adults: int = Query(default=1, ge=1),
     children: int = Query(default=0, ge=0),
-    class_type: str = "ECONOMY"
+    class_type: str = "ECONOMY",
+    currency: Optional[str] = None
 ):
     """Search flights across all providers"""
     criteria = SearchCriteria(
@@ -130,7 +145,8 @@ async def search_flights(
         children=children,
         class_type=class_type
     )
-    return await aggregator.search_all_flights(criteria)
+    flights = await aggregator.search_all_flights(criteria)
+    return await convert_currency(flights, currency)
 
 @router.get("/hotels/search", response_model=List[HotelResult])
 async def search_hotels(
@@ -139,9 +155,20 @@ async def search_hotels(
     check_out: datetime,
     rooms: int = Query(default=1, ge=1),
     adults: int = Query(default=2, ge=1),
-    children: int = Query(default=0, ge=0)
+    children: int = Query(default=0, ge=0),
+    near: Optional[str] = None,
+    lat: Optional[float] = Query(default=None, ge=-90, le=90),
+    lon: Optional[float] = Query(default=None, ge=-180, le=180),
+    radius_km: Optional[float] = Query(default=None, gt=0),
+    nearest: Optional[int] = Query(default=None, ge=1, le=500),
+    distance_weight: float = Query(default=0.5, ge=0, le=1),
+    currency: Optional[str] = None
 ):
-    """Search hotels across all providers"""
+    """Search hotels across all providers
+
+    Pass a point (`lat`/`lon`, or a place name in `near`) with `radius_km`
+    and/or `nearest` to filter by distance and rank by price and proximity.
+    """
     criteria = HotelSearchCriteria(
         city=city,
         check_in=check_in,
@@ -150,14 +177,32 @@ async def search_hotels(
         adults=adults,
         children=children
     )
-    return await aggregator.search_all_hotels(criteria)
+    hotels = await convert_currency(await aggregator.search_all_hotels(criteria), currency)
+    if radius_km is None and nearest is None:
+        return hotels
+
+    if lat is None or lon is None:
+        location = city_index.resolve(near or city)
+        if not location:
+            raise HTTPException(status_code=400, detail="Provide lat/lon or a known place in 'near'")
+        lat, lon = location.lat, location.lon
+
+    index = HotelGeoIndex(geocode_hotels(hotels, criteria.city))
+    if nearest is not None:
+        matches = index.nearest(lat, lon, nearest)
+        if radius_km is not None:
+            matches = [(d, hotel) for d, hotel in matches if d <= radius_km]
+    else:
+        matches = index.within(lat, lon, radius_km)
+    return rank_by_distance(matches, distance_weight)
 
 @router.get("/cabs/search", response_model=List[CabResult])
 async def search_cabs(
     city: str,
     pickup_date: datetime,
     drop_date: Optional[datetime] = None,
-    cab_type: str = "ALL"
+    cab_type: str = "ALL",
+    currency: Optional[str] = None
 ):
     """Search cabs across all providers"""
     criteria = CabSearchCriteria(
@@ -166,24 +211,55 @@ async def search_cabs(
         drop_date=drop_date,
         cab_type=cab_type
     )
-    return await aggregator.search_all_cabs(criteria)
+    cabs = await aggregator.search_all_cabs(criteria)
+    return await convert_currency(cabs, currency)
+
+@router.get("/cabs/fares/matrix", response_model=FareMatrix)
+async def get_cab_fare_matrix(
+    origins: List[str] = Query(..., min_length=1),
+    destinations: List[str] = Query(..., min_length=1),
+    travel_date: Optional[datetime] = None
+):
+    """Cheapest cab fare estimate for every origin x destination pair"""
+    return await aggregator.get_fare_matrix(origins, destinations, travel_date)
 
 @router.get("/deals/best")
 async def get_best_deals(
     from_city: str,
     to_city: str,
     departure_date: datetime,
-    return_date: Optional[datetime] = None
+    return_date: Optional[datetime] = None,
+    currency: Optional[str] = None
 ):
     """Get best deals across all categories"""
-    return await aggregator.get_best_deals(
+    deals = await aggregator.get_best_deals(
         from_city=from_city,
         to_city=to_city,
         departure_date=departure_date,
         return_date=return_date
     )
+    for results in deals.values():
+        await convert_currency(results, currency)
+    return deals
 
 @router.get("/prices/trends")
 async def get_price_trends(from_city: str, to_city: str):
     """Get price trends from all providers"""
     return await aggregator.get_price_trends(from_city, to_city)
+
+@router.get("/routes/optimize", response_model=RoutePlan)
+async def optimize_route(
+    start_date: datetime,
+    cities: List[str] = Query(..., min_length=2),
+    end_date: Optional[datetime] = None,
+    fixed_start: bool = True,
+    return_to_start: bool = False
+):
+    """Order multi-city trips by the cheapest sequence of flights"""
+    return await route_optimizer.optimize(
+        cities=cities,
+        start_date=start_date,
+        end_date=end_date,
+        fixed_start=fixed_start,
+        return_to_start=return_to_start
+    )
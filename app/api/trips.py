@@ -1,39 +1,236 @@
-from fastapi import APIRouter, HTTPException
-from app.models.trip import Trip
+from fastapi import APIRouter, HTTPException, Query, Request, Response
+from app.models.trip import Trip, TripCard, TripSearchResults
 from app.db.mongo import db
-from typing import List
+from app.utils.ndjson import import_ndjson, ndjson_response
+from app.utils.pagination import after_cursor, after_id, encode_cursor
+from app.utils.trip_search import TripSearchIndex
+from app.utils.ttl_cache import TTLCache
+from app.utils.version_stamp import VersionStamp
+from typing import List, Literal, Optional, Union
 from bson import ObjectId
+from bson.errors import InvalidId
+from pymongo.errors import DuplicateKeyError
+import asyncio
+import hashlib
+import json
+import os
 
 router = APIRouter()
 
-@router.get("/", response_model=List[Trip])
-async def list_trips():
-    trips = []
-    async for trip in db["trips"].find():
-        trip["id"] = str(trip["_id"])
-        trip.pop("_id")
-        trips.append(Trip(**trip))
-    return trips
+# Bumped on every catalogue write; lets unchanged listings answer 304 without a query.
+# Other instances' writes are seen within CATALOGUE_VERSION_TTL seconds.
+trips_version = VersionStamp(db.catalogue_versions, "trips", ttl=float(os.getenv("CATALOGUE_VERSION_TTL", "5")))
+
+# Serialized responses keyed by their ETag, which includes the catalogue version,
+# so a write makes every older entry unreachable. The TTL only bounds changes
+# made to the collection directly, without bumping the version.
+TRIPS_CACHE_TTL = float(os.getenv("TRIPS_CACHE_TTL", "600"))
+trip_pages = TTLCache(max_entries=1000, ttl=TRIPS_CACHE_TTL)
+trip_details = TTLCache(max_entries=5000, ttl=TRIPS_CACHE_TTL)
+
+# Full-text index, updated in place on local writes and rebuilt when another
+# instance changes the catalogue
+trip_search = TripSearchIndex()
+search_rebuild_lock = asyncio.Lock()
+SEARCH_PROJECTION = {"title": 1, "image": 1, "date": 1, "duration": 1, "description": 1, "details": 1}
+
+TRIP_FIELDS = [name for name in Trip.model_fields if name != "id"]
+CARD_FIELDS = [name for name in TripCard.model_fields if name != "id"]
+
+def selected_fields(view: str, fields: Optional[str]) -> List[str]:
+    if not fields:
+        return CARD_FIELDS if view == "card" else TRIP_FIELDS
+    selected = [name.strip() for name in fields.split(",") if name.strip()]
+    unknown = set(selected) - set(TRIP_FIELDS)
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown trip fields: {', '.join(sorted(unknown))}")
+    return selected
+
+def catalogue_etag(*parts) -> str:
+    key = json.dumps(parts, separators=(",", ":"))
+    return f'"{hashlib.sha256(key.encode("utf-8")).hexdigest()[:32]}"'
+
+def json_body(content) -> bytes:
+    # Same encoding as JSONResponse
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+async def catalogue_changed(added: Optional[dict] = None, removed: Optional[str] = None) -> None:
+    """Write-through invalidation after trips are created or deleted
+
+    Without `added` or `removed` (e.g. after an import) the search index
+    is left out of date, so the next search rebuilds it.
+    """
+    stamp = await trips_version.bump()
+    trip_pages.clear()
+    trip_details.clear()
+    # Patch the search index only if no other write happened since it was built;
+    # otherwise the version mismatch makes the next search rebuild it
+    if (added or removed) and VersionStamp.follows(stamp, trip_search.version):
+        if added:
+            trip_search.add(added)
+        if removed:
+            trip_search.remove(removed)
+        trip_search.version = stamp
+
+def build_search_index(trips: List[dict], version: str) -> TripSearchIndex:
+    index = TripSearchIndex()
+    for trip in trips:
+        index.add(trip)
+    index.version = version
+    return index
+
+async def current_search_index() -> TripSearchIndex:
+    global trip_search
+    version = await trips_version.current()
+    if trip_search.version == version:
+        return trip_search
+    if search_rebuild_lock.locked() and trip_search.version is not None:
+        # Keep answering from the previous index while it is rebuilt
+        return trip_search
+    async with search_rebuild_lock:
+        # Another request may have rebuilt it while this one waited
+        if trip_search.version != version:
+            trips = await db["trips"].find({}, SEARCH_PROJECTION).to_list(length=None)
+            # Tokenizing tens of thousands of trips takes a while; keep it off the event loop
+            loop = asyncio.get_running_loop()
+            trip_search = await loop.run_in_executor(None, build_search_index, trips, version)
+    return trip_search
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in tags or etag in tags
+
+@router.get("/", response_model=Union[List[Trip], List[TripCard]])
+async def list_trips(
+    request: Request,
+    limit: int = Query(default=50, ge=1, le=200),
+    cursor: Optional[str] = None,
+    view: Literal["full", "card"] = "full",
+    fields: Optional[str] = None
+):
+    """List trips in title order
+
+    Pages are `limit` items long; pass the X-Next-Cursor response header
+    back as `cursor` for the next page. `view=card` returns only what a
+    listing shows, and `fields` (comma-separated) picks fields explicitly.
+    Send the ETag back in If-None-Match to get 304 while the catalogue
+    is unchanged.
+    """
+    selected = selected_fields(view, fields)
+    etag = catalogue_etag(await trips_version.current(), limit, cursor, selected)
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+
+    page = trip_pages.get(etag)
+    if page is None:
+        # Title is always fetched, for the cursor
+        projection = {name: 1 for name in selected + ["title"]}
+        docs = await db["trips"].find(after_cursor("title", cursor, descending=False), projection).sort(
+            [("title", 1), ("_id", 1)]
+        ).limit(limit + 1).to_list(length=limit + 1)
+        next_cursor = None
+        if len(docs) > limit:
+            docs = docs[:limit]
+            next_cursor = encode_cursor(docs[-1]["title"], docs[-1]["_id"])
+
+        # Documents go out as stored; serializing through Trip again would only repeat the work
+        trips = [
+            {"_id": str(doc["_id"]), **{name: doc[name] for name in selected if name in doc}}
+            for doc in docs
+        ]
+        page = (json_body(trips), next_cursor)
+        trip_pages.set(etag, page)
+
+    body, next_cursor = page
+    if next_cursor:
+        headers["X-Next-Cursor"] = next_cursor
+    return Response(content=body, media_type="application/json", headers=headers)
 
 @router.post("/", response_model=Trip)
 async def create_trip(trip: Trip):
     trip_dict = trip.dict(exclude_unset=True)
-    result = await db["trips"].insert_one(trip_dict)
-    trip_dict["id"] = str(result.inserted_id)
+    try:
+        result = await db["trips"].insert_one(trip_dict)
+    except DuplicateKeyError:
+        raise HTTPException(status_code=409, detail="A trip with this title and date already exists")
+    await catalogue_changed(added=trip_dict)
+    # insert_one stored the ObjectId under "_id", the field's alias
+    trip_dict["_id"] = str(result.inserted_id)
     return Trip(**trip_dict)
 
+@router.post("/import")
+async def import_trips(request: Request):
+    """Create trips in bulk from an NDJSON body, one trip per line
+
+    The body is parsed as it arrives and written in batches. Rows that
+    fail validation or duplicate an existing trip are listed by line
+    number in `errors`; the others are still imported.
+    """
+    result = await import_ndjson(request.stream(), db["trips"], lambda row: Trip(**row).dict(exclude={"id"}))
+    if result["inserted"]:
+        await catalogue_changed()
+    return result
+
+@router.get("/export")
+async def export_trips(after: Optional[str] = None):
+    """Every trip as NDJSON, in _id order; `after` resumes from the last _id received"""
+    return ndjson_response(db["trips"].find(after_id(after)).sort("_id", 1), "trips.ndjson")
+
+@router.get("/search", response_model=TripSearchResults)
+async def search_trips(
+    q: str = "",
+    limit: int = Query(default=20, ge=1, le=100),
+    offset: int = Query(default=0, ge=0, le=1000),
+    duration: Optional[str] = None,
+    date: Optional[str] = None,
+    facets: bool = False
+):
+    """Search trip titles, descriptions and details, best matches first
+
+    Every word must match; the last one also matches as a prefix, for
+    search-as-you-type. `duration` and `date` filter on exact values, and
+    `facets=true` adds the count of matching trips per value of each.
+    """
+    index = await current_search_index()
+    return index.search(q, limit, offset, {"duration": duration, "date": date}, facets)
+
+@router.get("/metrics")
+async def trips_cache_metrics():
+    """Hit rates of the listing and detail caches, and search index size"""
+    return {
+        "version": await trips_version.current(),
+        "pages": trip_pages.stats(),
+        "trips": trip_details.stats(),
+        "search": {"trips": len(trip_search), "terms": len(trip_search.vocabulary), "version": trip_search.version},
+    }
+
 @router.get("/{trip_id}", response_model=Trip)
-async def get_trip(trip_id: str):
-    trip = await db["trips"].find_one({"_id": ObjectId(trip_id)})
-    if not trip:
-        raise HTTPException(status_code=404, detail="Trip not found")
-    trip["id"] = str(trip["_id"])
-    trip.pop("_id")
-    return Trip(**trip)
+async def get_trip(trip_id: str, request: Request):
+    etag = catalogue_etag(await trips_version.current(), trip_id)
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+
+    body = trip_details.get(etag)
+    if body is None:
+        try:
+            trip = await db["trips"].find_one({"_id": ObjectId(trip_id)})
+        except InvalidId:
+            trip = None
+        if not trip:
+            raise HTTPException(status_code=404, detail="Trip not found")
+        trip["_id"] = str(trip["_id"])
+        body = Trip(**trip).model_dump_json(by_alias=True).encode("utf-8")
+        trip_details.set(etag, body)
+    return Response(content=body, media_type="application/json", headers=headers)
 
 @router.delete("/{trip_id}")
 async def delete_trip(trip_id: str):
     result = await db["trips"].delete_one({"_id": ObjectId(trip_id)})
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Trip not found")
+    await catalogue_changed(removed=trip_id)
     return {"msg": "Trip deleted"}
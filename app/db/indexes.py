@@ -0,0 +1,53 @@
+from pymongo import ASCENDING, DESCENDING
+from pymongo.errors import OperationFailure
+from app.db.mongo import db
+
+# (collection, keys, options); unique indexes back the duplicate-key-driven write paths
+INDEXES = [
+    # Local accounts log in by email; social accounts may share an email with one
+    ("users", [("email", ASCENDING)], {
+        "unique": True, "name": "local_email_unique",
+        "partialFilterExpression": {"provider": "local"}
+    }),
+    ("users", [("auth_provider", ASCENDING), ("provider_user_id", ASCENDING)], {
+        "unique": True, "name": "social_identity_unique",
+        "partialFilterExpression": {"auth_provider": {"$exists": True}}
+    }),
+    ("trips", [("title", ASCENDING), ("date", ASCENDING)], {"unique": True, "name": "title_date_unique"}),
+    # Catalogue pages in title order
+    ("trips", [("title", ASCENDING), ("_id", ASCENDING)], {}),
+    # Resubmitting the same enquiry within its retry window returns the stored one
+    ("enquiries", [("email", ASCENDING), ("message", ASCENDING), ("dedupe_window", ASCENDING)], {
+        "unique": True, "name": "email_message_window_unique"
+    }),
+    # Makes retried history batches idempotent
+    ("chat_history", [("id", ASCENDING)], {"unique": True, "name": "id_unique"}),
+    # Newest-first, cursor-paginated history per user
+    ("chat_history", [("user_id", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)], {}),
+    ("chat_history_archive", [("user_id", ASCENDING), ("newest", DESCENDING)], {}),
+    # Workers claim the oldest runnable job; finished jobs expire after a week
+    ("document_jobs", [("status", ASCENDING), ("run_at", ASCENDING)], {}),
+    ("document_jobs", [("expires_at", ASCENDING)], {"expireAfterSeconds": 0}),
+]
+
+# (collection, index name) of indexes that have been replaced
+DROPPED_INDEXES = [
+    # Made email and message unique forever, not just across retries
+    ("enquiries", "email_message_unique"),
+]
+
+async def create_indexes() -> None:
+    """Create every index the API relies on; run once from the app lifespan"""
+    for collection, name in DROPPED_INDEXES:
+        try:
+            await db[collection].drop_index(name)
+        except OperationFailure:
+            pass  # Already gone
+        except Exception as e:
+            print(f"Error dropping index {name} on {collection}: {str(e)}")
+    for collection, keys, options in INDEXES:
+        try:
+            await db[collection].create_index(keys, **options)
+        except Exception as e:
+            # e.g. existing duplicates; the rest of the bootstrap still runs
+            print(f"Error creating index on {collection}: {str(e)}")
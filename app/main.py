@@ -1,10 +1,37 @@
 
+import asyncio
+import os
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.api import trips, enquiries, auth, chatbot
 from app.api import pdf
+from app.api import locations
+from app.db.indexes import create_indexes
+from app.utils.write_behind import write_behind_queues, close_write_behind_queues
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await create_indexes()
+    # Provider discovery happens here rather than inside the first logins
+    oauth_clients = auth.discovery_clients()
+    await auth.oauth_metadata.prefetch(oauth_clients)
+    metadata_refresher = asyncio.create_task(auth.oauth_metadata.run(oauth_clients))
+    archiver = None
+    if os.getenv("CHAT_ARCHIVE_ENABLED", "true").lower() == "true":
+        archiver = asyncio.create_task(chatbot.history_archive.run())
+    pdf.document_jobs.start()
+    yield
+    metadata_refresher.cancel()
+    if archiver:
+        archiver.cancel()
+    # Don't lose buffered writes on shutdown
+    await close_write_behind_queues()
+    # Interrupted jobs go back to the queue for the next instance
+    await pdf.document_jobs.close()
+    pdf.document_renderer.close()
+
+app = FastAPI(lifespan=lifespan)
 
 # Add CORS middleware
 app.add_middleware(
@@ -22,7 +49,13 @@ app.include_router(trips.router, prefix="/trips", tags=["trips"])
 app.include_router(enquiries.router, prefix="/enquiries", tags=["enquiries"])
 app.include_router(chatbot.router, prefix="/chatbot", tags=["chatbot"])
 app.include_router(pdf.router, prefix="/pdf", tags=["pdf"])
+app.include_router(locations.router, prefix="/locations", tags=["locations"])
 
 @app.get("/")
 def root():
     return {"message": "Travel Site Backend is running!"}
+
+@app.get("/metrics/write-behind")
+def write_behind_metrics():
+    """Depth and throughput of each write-behind queue"""
+    return {name: queue.snapshot() for name, queue in write_behind_queues.items()}
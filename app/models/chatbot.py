@@ -1,4 +1,4 @@
-from datetime import datetime
+from datetime import date, datetime
 from pydantic import BaseModel, Field
 from typing import List, Optional
 from bson import ObjectId
@@ -15,21 +15,46 @@ class User(BaseModel):
 class ChatRequest(BaseModel):
     message: str
     user_id: Optional[str] = None  # To track which user made the request
+    start_date: Optional[date] = None  # First day of the trip, used to price the itinerary
+    session_id: Optional[str] = None  # Continue a conversation; omitted or unknown starts a new one
+
+class PriceQuote(BaseModel):
+    title: str  # Airline and flight number, or hotel name
+    deep_link: str
+    price: Optional[float] = None  # None when no live price arrived in time; deep_link is then a plain search link
+    currency: Optional[str] = None
+    provider: Optional[str] = None
 
 class ItineraryDay(BaseModel):
     city: str
     activities: List[str]
     accommodation: Optional[str]
+    flight: Optional[PriceQuote] = None  # Flight into this day's city when it changes
+    hotel: Optional[PriceQuote] = None  # Hotel for the stay starting on this day
 
 class ChatResponse(BaseModel):
     summary: str
     itinerary: List[ItineraryDay]
     booking_links: dict  # Will contain generated booking.com and skyscanner links
     cities: List[str]  # List of unique cities in the itinerary
+    cached: bool = False  # True when served from the response cache without an LLM call
+    session_id: Optional[str] = None  # Pass back as ChatRequest.session_id to refine this plan
 
 class ChatHistory(BaseModel):
     id: str = Field(default_factory=lambda: str(ObjectId()))
     user_id: Optional[str]
+    session_id: Optional[str] = None
+    turn: Optional[int] = None  # 1 for the opening request of a session; None before sessions
     request: str
     response: ChatResponse
     created_at: datetime = Field(default_factory=datetime.utcnow)
+
+class ChatHistorySummary(BaseModel):
+    """List-view projection of ChatHistory without the itinerary"""
+    id: str
+    user_id: Optional[str]
+    session_id: Optional[str] = None
+    request: str
+    summary: str
+    cities: List[str] = Field(default_factory=list)
+    created_at: datetime
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import Optional
+from typing import Dict, List, Optional
 
 class Trip(BaseModel):
     id: Optional[str] = Field(None, alias="_id")
@@ -9,3 +9,19 @@ class Trip(BaseModel):
     duration: str
     description: str
     details: str
+
+class TripCard(BaseModel):
+    """What a catalogue listing shows; no description or details"""
+    id: Optional[str] = Field(None, alias="_id")
+    title: str
+    image: str
+    date: str
+    duration: str
+
+class TripSearchHit(TripCard):
+    score: float
+
+class TripSearchResults(BaseModel):
+    total: int
+    results: List[TripSearchHit]
+    facets: Optional[Dict[str, Dict[str, int]]] = None  # Value -> matching trips, per facet
@@ -1,21 +1,43 @@
-from typing import List, Dict
+import asyncio
+from typing import List, Dict, Optional
 from datetime import datetime
 from .base import TravelProvider, CabProvider
+from .currency import CurrencyConverter
+from .fare_cache import date_class
+from .geo import road_distance_km
 from .schemas import (
     SearchCriteria,
     HotelSearchCriteria,
     CabSearchCriteria,
     FlightResult,
     HotelResult,
-    CabResult
+    CabResult,
+    FareMatrix
 )
 
 class TravelAggregator:
     """Aggregates results from multiple travel providers"""
     
-    def __init__(self, providers: Dict[str, TravelProvider], cab_providers: Dict[str, CabProvider]):
+    def __init__(
+        self,
+        providers: Dict[str, TravelProvider],
+        cab_providers: Dict[str, CabProvider],
+        max_concurrency: int = 16,
+        converter: Optional[CurrencyConverter] = None
+    ):
         self.providers = providers
         self.cab_providers = cab_providers
+        # Caps in-flight provider calls for batched searches
+        self.max_concurrency = max_concurrency
+        # Compares prices across currencies; without it all results are assumed INR
+        self.converter = converter
+
+    async def _sort_by_price(self, results: List, field: str) -> List:
+        """Sort merged results by a price column, comparing across currencies"""
+        if self.converter:
+            await self.converter.ensure_fresh()
+            return self.converter.sort_by(results, field)
+        return sorted(results, key=lambda x: getattr(x, field))
     
     async def search_all_flights(self, criteria: SearchCriteria) -> List[FlightResult]:
         """Search flights across all providers"""
@@ -25,7 +47,35 @@ class TravelAggregator:
             all_results.extend(results)
         
         # Sort by price
-        return sorted(all_results, key=lambda x: x.price)
+        return await self._sort_by_price(all_results, "price")
+
+    async def search_flights_batch(self, criteria_list: List[SearchCriteria]) -> List[List[FlightResult]]:
+        """Search many routes concurrently, returning results in the same order as the criteria"""
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def search_one(provider: TravelProvider, criteria: SearchCriteria) -> List[FlightResult]:
+            async with semaphore:
+                try:
+                    return await provider.search_flights(criteria)
+                except Exception as e:
+                    print(f"Error in batched flight search: {str(e)}")
+                    return []
+
+        # One task per (criteria, provider) so slow providers don't serialize the batch
+        providers = list(self.providers.values())
+        tasks = [
+            search_one(provider, criteria)
+            for criteria in criteria_list
+            for provider in providers
+        ]
+        flat = await asyncio.gather(*tasks)
+
+        batched = []
+        width = len(providers)
+        for i in range(len(criteria_list)):
+            merged = [flight for results in flat[i * width:(i + 1) * width] for flight in results]
+            batched.append(await self._sort_by_price(merged, "price"))
+        return batched
     
     async def search_all_hotels(self, criteria: HotelSearchCriteria) -> List[HotelResult]:
         """Search hotels across all providers"""
@@ -35,8 +85,34 @@ class TravelAggregator:
             all_results.extend(results)
         
         # Sort by total price
-        return sorted(all_results, key=lambda x: x.total_price)
+        return await self._sort_by_price(all_results, "total_price")
     
+    async def search_hotels_batch(self, criteria_list: List[HotelSearchCriteria]) -> List[List[HotelResult]]:
+        """Search hotels for many stays concurrently, returning results in the same order as the criteria"""
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def search_one(provider: TravelProvider, criteria: HotelSearchCriteria) -> List[HotelResult]:
+            async with semaphore:
+                try:
+                    return await provider.search_hotels(criteria)
+                except Exception as e:
+                    print(f"Error in batched hotel search: {str(e)}")
+                    return []
+
+        providers = list(self.providers.values())
+        flat = await asyncio.gather(*(
+            search_one(provider, criteria)
+            for criteria in criteria_list
+            for provider in providers
+        ))
+
+        batched = []
+        width = len(providers)
+        for i in range(len(criteria_list)):
+            merged = [hotel for results in flat[i * width:(i + 1) * width] for hotel in results]
+            batched.append(await self._sort_by_price(merged, "total_price"))
+        return batched
+
     async def search_all_cabs(self, criteria: CabSearchCriteria) -> List[CabResult]:
         """Search cabs across all providers"""
         all_results = []
@@ -45,8 +121,37 @@ class TravelAggregator:
             all_results.extend(results)
         
         # Sort by total price
-        return sorted(all_results, key=lambda x: x.total_price)
+        return await self._sort_by_price(all_results, "total_price")
     
+    async def get_fare_matrix(
+        self,
+        origins: List[str],
+        destinations: List[str],
+        travel_date: datetime | None = None
+    ) -> FareMatrix:
+        """Cheapest fare per origin/destination pair across all cab providers"""
+        matrices = await asyncio.gather(*(
+            provider.get_fare_matrix(origins, destinations, travel_date)
+            for provider in self.cab_providers.values()
+        ))
+        if not matrices:
+            return FareMatrix(
+                origins=origins,
+                destinations=destinations,
+                date_class=date_class(travel_date),
+                fares=[[0.0 if o == d else None for d in destinations] for o in origins],
+                distances_km=[[road_distance_km(o, d) for d in destinations] for o in origins]
+            )
+
+        best = matrices[0]
+        for matrix in matrices[1:]:
+            for i, row in enumerate(matrix.fares):
+                for j, fare in enumerate(row):
+                    current = best.fares[i][j]
+                    if fare is not None and (current is None or fare < current):
+                        best.fares[i][j] = fare
+        return best
+
     async def get_best_deals(
         self,
         from_city: str,
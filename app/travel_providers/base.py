@@ -1,13 +1,18 @@
+import asyncio
 from abc import ABC, abstractmethod
-from typing import List, Optional
+from datetime import datetime
+from typing import List, Optional, Tuple
 from .schemas import (
     SearchCriteria,
     HotelSearchCriteria,
     CabSearchCriteria,
     FlightResult,
     HotelResult,
-    CabResult
+    CabResult,
+    FareMatrix
 )
+from .fare_cache import FareCache, date_class
+from .geo import road_distance_km
 
 class TravelProvider(ABC):
     """Base class for all travel providers"""
@@ -34,6 +39,9 @@ class TravelProvider(ABC):
 
 class CabProvider(ABC):
     """Base class for cab providers"""
+
+    # Optional shared cache for fare estimates; set by the provider or the app
+    fare_cache: Optional[FareCache] = None
     
     @abstractmethod
     async def search_cabs(self, criteria: CabSearchCriteria) -> List[CabResult]:
@@ -44,3 +52,47 @@ class CabProvider(ABC):
     async def get_fare_estimate(self, from_location: str, to_location: str) -> float:
         """Get estimated fare for a trip"""
         pass
+
+    async def get_fare_estimates(
+        self,
+        pairs: List[Tuple[str, str]],
+        travel_date: Optional[datetime] = None
+    ) -> List[Optional[float]]:
+        """Estimate fares for many (from, to) pairs; providers with a batch API should override"""
+        results = await asyncio.gather(
+            *(self.get_fare_estimate(from_location, to_location) for from_location, to_location in pairs),
+            return_exceptions=True
+        )
+        return [None if isinstance(fare, Exception) or not fare else fare for fare in results]
+
+    async def get_fare_matrix(
+        self,
+        origins: List[str],
+        destinations: List[str],
+        travel_date: Optional[datetime] = None
+    ) -> FareMatrix:
+        """Fare estimates for every origin x destination pair, served from cache where possible"""
+        travel_class = date_class(travel_date)
+        provider = type(self).__name__
+        pairs = [(o, d) for o in origins for d in destinations if o != d]
+        keys = {pair: FareCache.make_key(provider, pair[0], pair[1], travel_class) for pair in pairs}
+
+        cached = await self.fare_cache.get_many(keys.values()) if self.fare_cache else {}
+        missing = [pair for pair in pairs if keys[pair] not in cached]
+        if missing:
+            fresh = await self.get_fare_estimates(missing, travel_date)
+            new_entries = {keys[pair]: fare for pair, fare in zip(missing, fresh) if fare is not None}
+            cached.update(new_entries)
+            if self.fare_cache:
+                await self.fare_cache.set_many(new_entries)
+
+        return FareMatrix(
+            origins=origins,
+            destinations=destinations,
+            date_class=travel_class,
+            fares=[
+                [0.0 if o == d else cached.get(keys[(o, d)]) for d in destinations]
+                for o in origins
+            ],
+            distances_km=[[road_distance_km(o, d) for d in destinations] for o in origins]
+        )
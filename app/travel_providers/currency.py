@@ -0,0 +1,158 @@
+import asyncio
+import json
+import os
+from abc import ABC, abstractmethod
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Sequence
+import httpx
+import numpy as np
+from .schemas import FlightResult, HotelResult, CabResult
+
+BASE_CURRENCY = "INR"
+DEFAULT_RATES_PATH = os.path.join(os.path.dirname(__file__), "data", "fx_rates.json")
+RATE_REFRESH_INTERVAL = timedelta(hours=1)
+RATE_RETRY_AFTER = timedelta(minutes=1)  # After a failed fetch, while serving the last table
+
+# Price columns converted for each result type
+PRICE_FIELDS = {
+    FlightResult: ("price",),
+    HotelResult: ("price_per_night", "total_price"),
+    CabResult: ("price_per_km", "total_price"),
+}
+
+class RateSource(ABC):
+    """Where FX rates come from; rates are units of each currency per one unit of the base"""
+
+    @abstractmethod
+    async def fetch(self) -> Dict[str, float]:
+        pass
+
+class FileRateSource(RateSource):
+    """Reads rates from a local JSON file shaped like data/fx_rates.json"""
+
+    def __init__(self, path: str = DEFAULT_RATES_PATH):
+        self.path = path
+
+    async def fetch(self) -> Dict[str, float]:
+        with open(self.path, encoding="utf-8") as f:
+            return json.load(f)["rates"]
+
+class HttpRateSource(RateSource):
+    """Reads rates from a JSON endpoint returning {"rates": {...}}"""
+
+    def __init__(self, url: str, timeout: float = 5.0):
+        self.url = url
+        self.timeout = timeout
+
+    async def fetch(self) -> Dict[str, float]:
+        async with httpx.AsyncClient(timeout=self.timeout) as client:
+            response = await client.get(self.url)
+            response.raise_for_status()
+            return response.json()["rates"]
+
+class CurrencyConverter:
+    """In-memory FX table that converts and orders result sets with NumPy"""
+
+    def __init__(
+        self,
+        source: RateSource,
+        base: str = BASE_CURRENCY,
+        refresh_interval: timedelta = RATE_REFRESH_INTERVAL
+    ):
+        self.source = source
+        self.base = base
+        self.refresh_interval = refresh_interval
+        self.codes: Dict[str, int] = {}
+        # Last slot is NaN: currencies missing from the table stay unconverted and sort last
+        self.rates = np.array([np.nan])
+        self.refreshed_at: Optional[datetime] = None
+        self.retry_at: Optional[datetime] = None  # Set by a failed fetch
+        self._lock = asyncio.Lock()
+
+    def load(self, rates: Dict[str, float]) -> None:
+        """Swap in a new rate table"""
+        rates = {code.upper(): float(rate) for code, rate in rates.items() if rate}
+        rates[self.base] = 1.0
+        codes = sorted(rates)
+        self.codes = {code: i for i, code in enumerate(codes)}
+        self.rates = np.array([rates[code] for code in codes] + [np.nan])
+        self.refreshed_at = datetime.utcnow()
+
+    async def refresh(self) -> None:
+        """Reload rates from the source, keeping the old table if the fetch fails"""
+        try:
+            self.load(await self.source.fetch())
+            self.retry_at = None
+        except Exception as e:
+            print(f"Error refreshing FX rates: {str(e)}")
+            self.retry_at = datetime.utcnow() + RATE_RETRY_AFTER
+
+    def _due(self) -> bool:
+        now = datetime.utcnow()
+        if self.retry_at and now < self.retry_at:
+            return False
+        return not self.refreshed_at or now - self.refreshed_at >= self.refresh_interval
+
+    async def ensure_fresh(self) -> None:
+        """Refresh the table if it is older than the refresh interval
+
+        After a failed fetch, searches keep the last table (or quoted
+        prices, if none has loaded) for RATE_RETRY_AFTER instead of each
+        waiting on the source again.
+        """
+        if not self._due():
+            return
+        async with self._lock:
+            # Another request may have refreshed, or failed to, while we waited
+            if not self._due():
+                return
+            await self.refresh()
+
+    def supports(self, currency: str) -> bool:
+        return currency.upper() in self.codes
+
+    def _source_rates(self, results: Sequence) -> np.ndarray:
+        unknown = len(self.rates) - 1
+        codes = self.codes
+        return self.rates[np.fromiter(
+            (codes.get(r.currency.upper(), unknown) for r in results),
+            dtype=np.intp,
+            count=len(results)
+        )]
+
+    def base_amounts(self, results: Sequence, field: str) -> np.ndarray:
+        """Amounts of `field` in the base currency, NaN where the currency is unknown"""
+        amounts = np.fromiter((getattr(r, field) for r in results), dtype=float, count=len(results))
+        return amounts / self._source_rates(results)
+
+    def sort_by(self, results: List, field: str) -> List:
+        """Sort results by `field` compared in the base currency"""
+        if not results:
+            return results
+        order = np.argsort(self.base_amounts(results, field), kind="stable")
+        return [results[i] for i in order]
+
+    def convert(self, results: List, target: str) -> List:
+        """Convert every price column of `results` to `target` in place
+
+        Results in a currency missing from the table are left untouched.
+        """
+        target = target.upper()
+        if target not in self.codes:
+            raise ValueError(f"Unsupported currency: {target}")
+
+        for result_type, fields in PRICE_FIELDS.items():
+            group = [r for r in results if isinstance(r, result_type)]
+            if not group:
+                continue
+            factors = self.rates[self.codes[target]] / self._source_rates(group)
+            known = ~np.isnan(factors)
+            for field in fields:
+                amounts = np.fromiter((getattr(r, field) for r in group), dtype=float, count=len(group))
+                converted = np.where(known, np.round(amounts * factors, 2), amounts).tolist()
+                for result, value in zip(group, converted):
+                    setattr(result, field, value)
+            for result, ok in zip(group, known.tolist()):
+                if ok:
+                    result.currency = target
+        return results
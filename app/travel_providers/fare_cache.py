@@ -0,0 +1,90 @@
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, Optional, Tuple
+from pymongo import UpdateOne
+from .locations import city_index, normalize_key
+
+# Fares drift slowly; half a day keeps estimates honest without hammering providers
+FARE_TTL = timedelta(hours=12)
+MEMORY_ENTRIES = 10000
+
+def date_class(travel_date: Optional[datetime]) -> str:
+    """Bucket a travel date into the pricing class cab fares actually vary by"""
+    if travel_date is None:
+        return "any"
+    return "weekend" if travel_date.weekday() >= 5 else "weekday"
+
+def normalize_location(location: str) -> str:
+    """Canonical cache form of a pickup/drop location"""
+    return normalize_key(city_index.canonical_city(location))
+
+class FareCache:
+    """Two-tier fare cache: bounded in-process LRU backed by a Mongo collection with a TTL index"""
+
+    def __init__(self, collection=None, ttl: timedelta = FARE_TTL, max_entries: int = MEMORY_ENTRIES):
+        self.collection = collection
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.memory: "OrderedDict[str, Tuple[float, datetime]]" = OrderedDict()
+        self._indexed = False
+
+    @staticmethod
+    def make_key(provider: str, from_location: str, to_location: str, travel_class: str) -> str:
+        return f"{provider}|{normalize_location(from_location)}|{normalize_location(to_location)}|{travel_class}"
+
+    async def _ensure_index(self) -> None:
+        if self._indexed or self.collection is None:
+            return
+        # Mongo drops documents once expires_at has passed
+        await self.collection.create_index("expires_at", expireAfterSeconds=0)
+        self._indexed = True
+
+    def _remember(self, key: str, fare: float, expires_at: datetime) -> None:
+        self.memory[key] = (fare, expires_at)
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.max_entries:
+            self.memory.popitem(last=False)
+
+    async def get_many(self, keys: Iterable[str]) -> Dict[str, float]:
+        """Look up cached fares, reading through to Mongo for memory misses"""
+        now = datetime.utcnow()
+        found: Dict[str, float] = {}
+        missing = []
+        for key in keys:
+            entry = self.memory.get(key)
+            if entry and entry[1] > now:
+                self.memory.move_to_end(key)
+                found[key] = entry[0]
+            else:
+                missing.append(key)
+
+        if missing and self.collection is not None:
+            try:
+                cursor = self.collection.find({"_id": {"$in": missing}, "expires_at": {"$gt": now}})
+                async for doc in cursor:
+                    found[doc["_id"]] = doc["fare"]
+                    self._remember(doc["_id"], doc["fare"], doc["expires_at"])
+            except Exception as e:
+                print(f"Error reading fare cache: {str(e)}")
+        return found
+
+    async def set_many(self, fares: Dict[str, float]) -> None:
+        """Store fares in both tiers"""
+        if not fares:
+            return
+        expires_at = datetime.utcnow() + self.ttl
+        for key, fare in fares.items():
+            self._remember(key, fare, expires_at)
+
+        if self.collection is not None:
+            try:
+                await self._ensure_index()
+                await self.collection.bulk_write(
+                    [
+                        UpdateOne({"_id": key}, {"$set": {"fare": fare, "expires_at": expires_at}}, upsert=True)
+                        for key, fare in fares.items()
+                    ],
+                    ordered=False
+                )
+            except Exception as e:
+                print(f"Error writing fare cache: {str(e)}")
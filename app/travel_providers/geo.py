@@ -0,0 +1,216 @@
+import heapq
+import math
+from typing import Any, Dict, List, Optional, Tuple
+from .locations import city_index
+from .schemas import HotelResult
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+
+# Roads wind; straight-line distance times this approximates driving distance
+ROAD_FACTOR = 1.3
+
+# ~1.1 km cells keep a 2 km radius query to a handful of buckets
+GRID_CELL_DEGREES = 0.01
+
+# Keys providers use for coordinates, checked in order
+_LAT_KEYS = ("latitude", "lat", "Latitude", "Lat", "LATITUDE")
+_LON_KEYS = ("longitude", "lon", "lng", "Longitude", "Lng", "Lon", "LONGITUDE")
+_NESTED_KEYS = ("geo", "geoCode", "coordinates", "Coordinates", "location", "Location", "GeoLocation")
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Great-circle distance between two points in kilometres"""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlambda = math.radians(lon2 - lon1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+def _build_city_distances() -> Dict[Tuple[str, str], float]:
+    locations = city_index.locations
+    table = {}
+    for a in locations:
+        for b in locations:
+            if a.iata != b.iata:
+                table[(a.iata, b.iata)] = round(haversine_km(a.lat, a.lon, b.lat, b.lon) * ROAD_FACTOR, 1)
+    return table
+
+# Precomputed road-distance estimates between every pair of indexed cities
+CITY_DISTANCES = _build_city_distances()
+
+def road_distance_km(from_location: str, to_location: str) -> Optional[float]:
+    """Estimated driving distance between two known cities, or None if either is unknown"""
+    a, b = city_index.resolve(from_location), city_index.resolve(to_location)
+    if not a or not b:
+        return None
+    if a.iata == b.iata:
+        return 0.0
+    return CITY_DISTANCES.get((a.iata, b.iata))
+
+def _coerce(value: Any) -> Optional[float]:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+def extract_coordinates(data: Dict[str, Any]) -> Optional[Tuple[float, float]]:
+    """Find a (lat, lon) pair in a provider payload, looking one level deep"""
+    if not isinstance(data, dict):
+        return None
+    lat = next((_coerce(data[k]) for k in _LAT_KEYS if k in data), None)
+    lon = next((_coerce(data[k]) for k in _LON_KEYS if k in data), None)
+    if lat is not None and lon is not None and -90 <= lat <= 90 and -180 <= lon <= 180:
+        return lat, lon
+    for key in _NESTED_KEYS:
+        nested = data.get(key)
+        if isinstance(nested, dict):
+            found = extract_coordinates(nested)
+            if found:
+                return found
+        elif isinstance(nested, (list, tuple)) and len(nested) == 2:
+            # GeoJSON order is [lon, lat]
+            lon, lat = _coerce(nested[0]), _coerce(nested[1])
+            if lat is not None and lon is not None and -90 <= lat <= 90 and -180 <= lon <= 180:
+                return lat, lon
+    return None
+
+def geocode_hotels(hotels: List[HotelResult], city: Optional[str] = None) -> List[HotelResult]:
+    """Fill in hotel coordinates from provider data, falling back to the city index"""
+    fallback = city_index.resolve(city) if city else None
+    for hotel in hotels:
+        if hotel.latitude is not None and hotel.longitude is not None:
+            continue
+        coordinates = extract_coordinates(hotel.provider_data)
+        if coordinates:
+            hotel.latitude, hotel.longitude = coordinates
+            hotel.geo_source = "provider"
+            continue
+        location = city_index.resolve(hotel.location) or fallback
+        if location:
+            # City-level fix only; good enough to rank, not to measure walking distance
+            hotel.latitude, hotel.longitude = location.lat, location.lon
+            hotel.geo_source = "city"
+    return hotels
+
+class HotelGeoIndex:
+    """Uniform-grid spatial index over one snapshot of hotel results"""
+
+    def __init__(self, hotels: List[HotelResult], cell_degrees: float = GRID_CELL_DEGREES):
+        self.cell_degrees = cell_degrees
+        self.hotels = [h for h in hotels if h.latitude is not None and h.longitude is not None]
+        self.lats = [h.latitude for h in self.hotels]
+        self.lons = [h.longitude for h in self.hotels]
+        self.cells: Dict[Tuple[int, int], List[int]] = {}
+        for i, (lat, lon) in enumerate(zip(self.lats, self.lons)):
+            self.cells.setdefault(self._cell(lat, lon), []).append(i)
+        if self.cells:
+            rows = [r for r, _ in self.cells]
+            cols = [c for _, c in self.cells]
+            self.bounds = (min(rows), max(rows), min(cols), max(cols))
+
+    def __len__(self) -> int:
+        return len(self.hotels)
+
+    def _cell(self, lat: float, lon: float) -> Tuple[int, int]:
+        return math.floor(lat / self.cell_degrees), math.floor(lon / self.cell_degrees)
+
+    def _distance_fn(self, lat: float, lon: float):
+        # Equirectangular projection around the query point; well under 0.1% error at city scale
+        cos_lat = math.cos(math.radians(lat))
+        lats, lons = self.lats, self.lons
+
+        def distance(i: int) -> float:
+            dy = lats[i] - lat
+            dx = (lons[i] - lon) * cos_lat
+            return KM_PER_DEGREE * math.sqrt(dx * dx + dy * dy)
+
+        return distance
+
+    def within(self, lat: float, lon: float, radius_km: float) -> List[Tuple[float, HotelResult]]:
+        """All hotels within `radius_km`, nearest first, as (distance_km, hotel)"""
+        if not self.hotels:
+            return []
+        lat_span = radius_km / KM_PER_DEGREE
+        lon_span = radius_km / (KM_PER_DEGREE * max(math.cos(math.radians(lat)), 1e-6))
+        row_lo, col_lo = self._cell(lat - lat_span, lon - lon_span)
+        row_hi, col_hi = self._cell(lat + lat_span, lon + lon_span)
+        min_row, max_row, min_col, max_col = self.bounds
+        distance = self._distance_fn(lat, lon)
+
+        matches = []
+        cells = self.cells
+        for row in range(max(row_lo, min_row), min(row_hi, max_row) + 1):
+            for col in range(max(col_lo, min_col), min(col_hi, max_col) + 1):
+                for i in cells.get((row, col), ()):
+                    d = distance(i)
+                    if d <= radius_km:
+                        matches.append((d, i))
+        matches.sort()
+        return [(d, self.hotels[i]) for d, i in matches]
+
+    def nearest(self, lat: float, lon: float, k: int) -> List[Tuple[float, HotelResult]]:
+        """The `k` closest hotels, nearest first, as (distance_km, hotel)"""
+        if not self.hotels or k <= 0:
+            return []
+        k = min(k, len(self.hotels))
+        min_row, max_row, min_col, max_col = self.bounds
+        row0, col0 = self._cell(lat, lon)
+        # Start from the nearest cell inside the index; rings outside it are empty.
+        # Every hotel is still on the far side of that cell from the query, so ring
+        # r stays at least r cells away.
+        row0 = min(max(row0, min_row), max_row)
+        col0 = min(max(col0, min_col), max_col)
+        max_ring = max(row0 - min_row, max_row - row0, col0 - min_col, max_col - col0)
+        # Any point outside ring r is at least r cells away along the shorter cell side
+        cell_km = self.cell_degrees * KM_PER_DEGREE * min(1.0, max(math.cos(math.radians(lat)), 1e-6))
+        distance = self._distance_fn(lat, lon)
+        # Past this many cells a linear scan over the hotels is cheaper than the walk
+        cell_budget = max(len(self.hotels), 64)
+
+        best: List[Tuple[float, int]] = []  # Max-heap of the k nearest via negated distances
+        cells = self.cells
+        visited = 0
+        for ring in range(max_ring + 1):
+            visited += 8 * ring or 1
+            if visited > cell_budget:
+                return self._nearest_linear(distance, k)
+            for row in range(max(row0 - ring, min_row), min(row0 + ring, max_row) + 1):
+                edge = row in (row0 - ring, row0 + ring)
+                cols = range(col0 - ring, col0 + ring + 1) if edge else (col0 - ring, col0 + ring)
+                for col in cols:
+                    for i in cells.get((row, col), ()):
+                        d = distance(i)
+                        if len(best) < k:
+                            heapq.heappush(best, (-d, i))
+                        elif d < -best[0][0]:
+                            heapq.heapreplace(best, (-d, i))
+            if len(best) == k and -best[0][0] <= ring * cell_km:
+                break
+        return [(d, self.hotels[i]) for d, i in sorted((-nd, i) for nd, i in best)]
+
+    def _nearest_linear(self, distance, k: int) -> List[Tuple[float, HotelResult]]:
+        nearest = heapq.nsmallest(k, ((distance(i), i) for i in range(len(self.hotels))))
+        return [(d, self.hotels[i]) for d, i in nearest]
+
+def rank_by_distance(
+    matches: List[Tuple[float, HotelResult]],
+    distance_weight: float = 0.5
+) -> List[HotelResult]:
+    """Blend normalized price and distance into one score, cheapest-and-closest first
+
+    A weight of 0 ranks purely by price and 1 purely by distance.
+    """
+    if not matches:
+        return []
+    prices = [hotel.total_price for _, hotel in matches]
+    low, high = min(prices), max(prices)
+    far = max(d for d, _ in matches) or 1.0
+    price_span = (high - low) or 1.0
+
+    scored = []
+    for d, hotel in matches:
+        hotel.distance_km = round(d, 3)
+        score = (1 - distance_weight) * (hotel.total_price - low) / price_span + distance_weight * d / far
+        scored.append((score, d, hotel))
+    scored.sort(key=lambda item: (item[0], item[1]))
+    return [hotel for _, _, hotel in scored]
@@ -0,0 +1,140 @@
+import json
+import os
+import re
+import unicodedata
+from functools import lru_cache
+from typing import Dict, List, Optional
+from pydantic import BaseModel, Field
+
+DATA_PATH = os.path.join(os.path.dirname(__file__), "data", "airports.json")
+
+# Suggestions kept per trie node; autocomplete never returns more than this
+MAX_SUGGESTIONS = 10
+
+_NON_ALNUM = re.compile(r"[^a-z0-9]+")
+_NOISE_WORDS = {"airport", "international", "city", "intl"}
+
+class Location(BaseModel):
+    iata: str
+    city: str
+    airport: str
+    country: str
+    lat: float
+    lon: float
+    aliases: List[str] = Field(default_factory=list)
+    rank: int = 0  # Lower is more popular; orders autocomplete suggestions
+
+@lru_cache(maxsize=4096)
+def normalize_key(text: str) -> str:
+    """Lowercase, strip accents and collapse punctuation so spellings compare equal"""
+    text = unicodedata.normalize("NFKD", text)
+    text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    return _NON_ALNUM.sub(" ", text.lower()).strip()
+
+class _TrieNode:
+    __slots__ = ("children", "ids")
+
+    def __init__(self):
+        self.children: Dict[str, "_TrieNode"] = {}
+        self.ids = ()  # Top location indices for this prefix, best first
+
+class CityIndex:
+    """In-memory city/airport index with prefix autocomplete and alias resolution"""
+
+    def __init__(self, locations: List[Location], max_suggestions: int = MAX_SUGGESTIONS):
+        self.locations = sorted(locations, key=lambda loc: loc.rank)
+        self.max_suggestions = max_suggestions
+        self.by_iata: Dict[str, int] = {}
+        self.aliases: Dict[str, int] = {}
+        self.root = _TrieNode()
+
+        pending: Dict[int, set] = {}
+        for index, location in enumerate(self.locations):
+            self.by_iata[location.iata.upper()] = index
+            names = [location.iata, location.city, location.airport, *location.aliases]
+            for name in names:
+                key = normalize_key(name)
+                if not key:
+                    continue
+                # First (most popular) location wins ambiguous aliases
+                self.aliases.setdefault(key, index)
+                # Index every word start so "shivaji" finds "Chhatrapati Shivaji ..."
+                words = key.split(" ")
+                for start in range(len(words)):
+                    self._insert(" ".join(words[start:]), index, pending)
+
+        # Freeze candidate sets into small ranked tuples
+        for node_id, node in self._walk():
+            node.ids = tuple(sorted(pending.get(node_id, ()))[:self.max_suggestions])
+
+    @classmethod
+    def from_file(cls, path: str = DATA_PATH) -> "CityIndex":
+        """Build the index from a bundled JSON dataset"""
+        with open(path, encoding="utf-8") as f:
+            return cls([Location(**row) for row in json.load(f)])
+
+    def _insert(self, key: str, index: int, pending: Dict[int, set]) -> None:
+        node = self.root
+        for ch in key:
+            node = node.children.setdefault(ch, _TrieNode())
+            pending.setdefault(id(node), set()).add(index)
+
+    def _walk(self):
+        stack = [self.root]
+        while stack:
+            node = stack.pop()
+            yield id(node), node
+            stack.extend(node.children.values())
+
+    def autocomplete(self, query: str, limit: int = MAX_SUGGESTIONS) -> List[Location]:
+        """Return the most popular locations whose names start with `query`"""
+        key = normalize_key(query)
+        if not key:
+            return []
+        node = self.root
+        for ch in key:
+            node = node.children.get(ch)
+            if node is None:
+                return []
+        return [self.locations[i] for i in node.ids[:limit]]
+
+    def resolve(self, text: str) -> Optional[Location]:
+        """Map a free-text city, alias, airport name or IATA code to a location"""
+        if not text:
+            return None
+        code = text.strip().upper()
+        if len(code) == 3 and code in self.by_iata:
+            return self.locations[self.by_iata[code]]
+
+        candidates = [text]
+        if "," in text:
+            # "Mumbai, Maharashtra, India" -> "Mumbai"
+            candidates.append(text.split(",")[0])
+        for candidate in candidates:
+            key = normalize_key(candidate)
+            if key in self.aliases:
+                return self.locations[self.aliases[key]]
+            trimmed = " ".join(w for w in key.split(" ") if w not in _NOISE_WORDS)
+            if trimmed in self.aliases:
+                return self.locations[self.aliases[trimmed]]
+        return None
+
+    def to_iata(self, text: str) -> str:
+        """Canonical IATA code for `text`, or the stripped input if unknown"""
+        location = self.resolve(text)
+        return location.iata if location else text.strip()
+
+    def canonical_city(self, text: str) -> str:
+        """Canonical city name for `text`, or the stripped input if unknown"""
+        location = self.resolve(text)
+        return location.city if location else text.strip()
+
+city_index = CityIndex.from_file()
+
+def normalize_city_code(value: str) -> str:
+    """Hook for flight search criteria: free text to IATA code"""
+    return city_index.to_iata(value) if isinstance(value, str) else value
+
+def normalize_city_name(value: str) -> str:
+    """Hook for hotel and cab search criteria: free text to canonical city name"""
+    return city_index.canonical_city(value) if isinstance(value, str) else value
@@ -0,0 +1,238 @@
+from datetime import datetime, timedelta
+from typing import List, Optional, Sequence, Tuple
+from .aggregator import TravelAggregator
+from .schemas import SearchCriteria, FlightResult, RouteLeg, RoutePlan
+
+INF = float("inf")
+
+# Held-Karp is O(2^N * N^2); beyond this size fall back to the heuristic
+EXACT_MAX_CITIES = 10
+
+def path_cost(cost: Sequence[Sequence[float]], order: Sequence[int], return_to_start: bool = False) -> float:
+    """Total cost of visiting cities in the given order"""
+    total = 0.0
+    for a, b in zip(order, order[1:]):
+        total += cost[a][b]
+    if return_to_start and len(order) > 1:
+        total += cost[order[-1]][order[0]]
+    return total
+
+def solve_exact(
+    cost: Sequence[Sequence[float]],
+    start: Optional[int] = 0,
+    return_to_start: bool = False
+) -> Tuple[List[int], float]:
+    """Cheapest visiting order via bitmask dynamic programming (Held-Karp)
+
+    `start` fixes the first city; pass None to let any city start the route.
+    """
+    n = len(cost)
+    if n == 0:
+        return [], 0.0
+    if n == 1:
+        return [0], 0.0
+    if return_to_start and start is None:
+        # A closed tour costs the same whichever city it starts from
+        start = 0
+
+    full = (1 << n) - 1
+    # dp[mask * n + j]: cheapest path covering `mask` and ending at j
+    dp = [INF] * ((1 << n) * n)
+    parent = [-1] * ((1 << n) * n)
+    starts = range(n) if start is None else [start]
+    for s in starts:
+        dp[(1 << s) * n + s] = 0.0
+
+    for mask in range(1, full + 1):
+        base = mask * n
+        for j in range(n):
+            current = dp[base + j]
+            if current == INF:
+                continue
+            row = cost[j]
+            for k in range(n):
+                if mask & (1 << k):
+                    continue
+                candidate = current + row[k]
+                index = (mask | (1 << k)) * n + k
+                if candidate < dp[index]:
+                    dp[index] = candidate
+                    parent[index] = j
+
+    base = full * n
+    best_end, best_cost = 0, INF
+    for j in range(n):
+        total = dp[base + j]
+        if return_to_start and start is not None:
+            total += cost[j][start]
+        if total < best_cost:
+            best_end, best_cost = j, total
+
+    if best_cost == INF:
+        # No fully priced route exists; keep the input order
+        order = list(range(n))
+        if start is not None:
+            order.remove(start)
+            order.insert(0, start)
+        return order, INF
+
+    # Walk the parent pointers back to the start
+    order = []
+    mask, j = full, best_end
+    while j != -1:
+        order.append(j)
+        previous = parent[mask * n + j]
+        mask ^= 1 << j
+        j = previous
+    order.reverse()
+    return order, best_cost
+
+def solve_heuristic(
+    cost: Sequence[Sequence[float]],
+    start: Optional[int] = 0,
+    return_to_start: bool = False
+) -> Tuple[List[int], float]:
+    """Nearest-neighbour construction followed by 2-opt and or-opt improvement"""
+    n = len(cost)
+    if n == 0:
+        return [], 0.0
+
+    best_order, best_cost = None, INF
+    for s in (range(n) if start is None else [start]):
+        order = [s]
+        remaining = set(range(n)) - {s}
+        while remaining:
+            last = order[-1]
+            nearest = min(remaining, key=lambda k: (cost[last][k], k))
+            order.append(nearest)
+            remaining.remove(nearest)
+
+        # Costs may be asymmetric, so each reversal is re-scored in full
+        current = path_cost(cost, order, return_to_start)
+        improved = True
+        while improved:
+            improved = False
+            for i in range(1, n - 1):
+                for j in range(i + 1, n):
+                    candidate = order[:i] + order[i:j + 1][::-1] + order[j + 1:]
+                    candidate_cost = path_cost(cost, candidate, return_to_start)
+                    if candidate_cost < current:
+                        order, current = candidate, candidate_cost
+                        improved = True
+            # Or-opt: move a single city to another position
+            for i in range(1, n):
+                for j in range(1, n):
+                    if i == j:
+                        continue
+                    candidate = order[:i] + order[i + 1:]
+                    candidate.insert(j, order[i])
+                    candidate_cost = path_cost(cost, candidate, return_to_start)
+                    if candidate_cost < current:
+                        order, current = candidate, candidate_cost
+                        improved = True
+
+        if best_order is None or current < best_cost:
+            best_order, best_cost = order, current
+
+    return best_order, best_cost
+
+class RouteOptimizer:
+    """Orders multi-city trips by the cheapest sequence of flights"""
+
+    def __init__(self, aggregator: TravelAggregator, exact_max_cities: int = EXACT_MAX_CITIES):
+        self.aggregator = aggregator
+        self.exact_max_cities = exact_max_cities
+
+    async def fetch_price_matrix(
+        self,
+        cities: List[str],
+        departure_date: datetime
+    ) -> Tuple[List[List[float]], List[List[Optional[FlightResult]]]]:
+        """Fetch the cheapest offer for every ordered city pair in one concurrent batch"""
+        n = len(cities)
+        pairs = [(i, j) for i in range(n) for j in range(n) if i != j]
+        criteria_list = [
+            SearchCriteria(from_city=cities[i], to_city=cities[j], departure_date=departure_date)
+            for i, j in pairs
+        ]
+        results = await self.aggregator.search_flights_batch(criteria_list)
+
+        matrix = [[0.0 if i == j else INF for j in range(n)] for i in range(n)]
+        offers: List[List[Optional[FlightResult]]] = [[None] * n for _ in range(n)]
+        for (i, j), flights in zip(pairs, results):
+            if flights:
+                # Batched results come back sorted by price
+                offers[i][j] = flights[0]
+
+        converter = self.aggregator.converter
+        # Skipped while the FX table hasn't loaded; offers are then compared as quoted
+        if converter and converter.supports(converter.base):
+            # Offers may be quoted in different currencies; compare them in the base
+            converter.convert([offer for row in offers for offer in row if offer], converter.base)
+        for i in range(n):
+            for j in range(n):
+                if offers[i][j]:
+                    matrix[i][j] = offers[i][j].price
+        return matrix, offers
+
+    def solve(
+        self,
+        matrix: List[List[float]],
+        start: Optional[int] = 0,
+        return_to_start: bool = False
+    ) -> Tuple[List[int], float, str]:
+        """Pick the exact solver for small inputs and the heuristic otherwise"""
+        if len(matrix) <= self.exact_max_cities:
+            order, total = solve_exact(matrix, start, return_to_start)
+            return order, total, "exact"
+        order, total = solve_heuristic(matrix, start, return_to_start)
+        return order, total, "heuristic"
+
+    async def optimize(
+        self,
+        cities: List[str],
+        start_date: datetime,
+        end_date: Optional[datetime] = None,
+        fixed_start: bool = True,
+        return_to_start: bool = False
+    ) -> RoutePlan:
+        """Find the cheapest order to visit `cities` within the date window
+
+        Prices are sampled on `start_date`; leg dates are then spread evenly
+        across the window, so the attached offers are indicative.
+        """
+        cities = list(dict.fromkeys(cities))  # Remove duplicates while preserving order
+        if len(cities) < 2:
+            return RoutePlan(cities=cities, legs=[], total_price=0.0, method="exact")
+
+        matrix, offers = await self.fetch_price_matrix(cities, start_date)
+        order, total, method = self.solve(
+            matrix,
+            start=0 if fixed_start else None,
+            return_to_start=return_to_start
+        )
+
+        stops = list(order)
+        if return_to_start:
+            stops.append(order[0])
+
+        window_days = (end_date - start_date).days if end_date else len(cities)
+        stay_days = max(1, window_days // len(cities))
+
+        legs = []
+        for index, (a, b) in enumerate(zip(stops, stops[1:])):
+            price = matrix[a][b]
+            legs.append(RouteLeg(
+                from_city=cities[a],
+                to_city=cities[b],
+                departure_date=start_date + timedelta(days=stay_days * (index + 1)),
+                price=None if price == INF else price,
+                offer=offers[a][b]
+            ))
+
+        return RoutePlan(
+            cities=[cities[i] for i in order],
+            legs=legs,
+            total_price=None if total == INF else total,
+            method=method
+        )
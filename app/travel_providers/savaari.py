@@ -0,0 +1,112 @@
+import httpx
+from typing import List, Optional, Tuple
+from datetime import datetime
+from app.travel_providers.base import CabProvider
+from app.travel_providers.fare_cache import FareCache, date_class
+from app.travel_providers.geo import road_distance_km
+from app.travel_providers.schemas import (
+    CabSearchCriteria,
+    CabResult,
+    TravelProviderType
+)
+
+# Routes sent per batch fare request
+FARE_BATCH_SIZE = 100
+
+class SavaariProvider(CabProvider):
+    """Savaari Car Rentals API integration"""
+
+    def __init__(
+        self,
+        api_key: str,
+        api_secret: str,
+        environment: str = "production",
+        base_url: Optional[str] = None,
+        fare_cache: Optional[FareCache] = None,
+        transport: Optional[httpx.AsyncBaseTransport] = None
+    ):
+        self.api_key = api_key
+        self.api_secret = api_secret
+        # base_url overrides the environment, e.g. to point at a local stand-in
+        self.base_url = base_url or (
+            "https://api.savaari.com/partner_api/v1" if environment == "production" else "https://sandbox-api.savaari.com/partner_api/v1"
+        )
+        self.fare_cache = fare_cache
+        self.session = httpx.AsyncClient(
+            base_url=self.base_url,
+            headers={
+                "X-API-Key": api_key,
+                "X-API-Secret": api_secret,
+                "Content-Type": "application/json"
+            },
+            transport=transport
+        )
+
+    async def search_cabs(self, criteria: CabSearchCriteria) -> List[CabResult]:
+        """Search cabs using Savaari API"""
+        try:
+            response = await self.session.post("/cabs/search", json={
+                "sourceCity": criteria.city,
+                "tripType": "outstation" if criteria.drop_date else "local",
+                "pickupDateTime": criteria.pickup_date.strftime("%Y-%m-%d %H:%M"),
+                "dropDateTime": criteria.drop_date.strftime("%Y-%m-%d %H:%M") if criteria.drop_date else None,
+                "carType": None if criteria.cab_type == "ALL" else criteria.cab_type
+            })
+            response.raise_for_status()
+            data = response.json()
+
+            return [
+                CabResult(
+                    provider=TravelProviderType.SAVAARI,
+                    cab_type=cab["carType"],
+                    vehicle_model=cab.get("carName", cab["carType"]),
+                    price_per_km=float(cab.get("ratePerKm", 0)),
+                    total_price=float(cab["totalFare"]),
+                    available=cab.get("available", True),
+                    rating=float(cab.get("rating", 0)),
+                    deep_link=cab.get("bookingUrl", ""),
+                    provider_data=cab
+                )
+                for cab in data.get("cabs", [])
+            ]
+        except Exception as e:
+            print(f"Error searching Savaari cabs: {str(e)}")
+            return []
+
+    async def get_fare_estimate(self, from_location: str, to_location: str) -> float:
+        """Get estimated fare for a single trip"""
+        fares = await self.get_fare_estimates([(from_location, to_location)])
+        return fares[0] or 0.0
+
+    async def get_fare_estimates(
+        self,
+        pairs: List[Tuple[str, str]],
+        travel_date: Optional[datetime] = None
+    ) -> List[Optional[float]]:
+        """Estimate many routes with Savaari's batch fare endpoint"""
+        fares: List[Optional[float]] = []
+        for start in range(0, len(pairs), FARE_BATCH_SIZE):
+            batch = pairs[start:start + FARE_BATCH_SIZE]
+            try:
+                response = await self.session.post("/fares/estimate", json={
+                    "pickupDate": travel_date.strftime("%Y-%m-%d") if travel_date else None,
+                    "dateClass": date_class(travel_date),
+                    "routes": [
+                        {
+                            "source": source,
+                            "destination": destination,
+                            # Saves Savaari a distance lookup for cities we already know
+                            "distanceKm": road_distance_km(source, destination)
+                        }
+                        for source, destination in batch
+                    ]
+                })
+                response.raise_for_status()
+                data = response.json().get("fares", [])
+                for i in range(len(batch)):
+                    fare = data[i].get("estimatedFare") if i < len(data) else None
+                    fares.append(float(fare) if fare else None)
+            except Exception as e:
+                print(f"Error getting Savaari fare estimates: {str(e)}")
+                fares.extend([None] * len(batch))
+        return fares
@@ -1,7 +1,8 @@
 from enum import Enum
 from typing import Dict, Any
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, field_validator
 from datetime import datetime
+from .locations import normalize_city_code, normalize_city_name
 
 class TravelProviderType(str, Enum):
     MMT = "makemytrip"
@@ -19,6 +20,12 @@ class SearchCriteria(BaseModel):
     adults: int = 1
     children: int = 0
     class_type: str = "ECONOMY"
+
+    @field_validator("from_city", "to_city", mode="before")
+    @classmethod
+    def normalize_cities(cls, value):
+        """Map free-text cities to IATA codes so "Bombay" and "Mumbai" both become BOM"""
+        return normalize_city_code(value)
     
 class HotelSearchCriteria(BaseModel):
     city: str
@@ -28,11 +35,21 @@ class HotelSearchCriteria(BaseModel):
     adults: int = 2
     children: int = 0
 
+    @field_validator("city", mode="before")
+    @classmethod
+    def normalize_city(cls, value):
+        return normalize_city_name(value)
+
 class CabSearchCriteria(BaseModel):
     city: str
     pickup_date: datetime
     drop_date: datetime | None = None
     cab_type: str = "ALL"
+
+    @field_validator("city", mode="before")
+    @classmethod
+    def normalize_city(cls, value):
+        return normalize_city_name(value)
     
 class FlightResult(BaseModel):
     provider: TravelProviderType
@@ -46,6 +63,7 @@ class FlightResult(BaseModel):
     refundable: bool
     deep_link: str
     provider_data: Dict[str, Any] = Field(default_factory=dict)
+    currency: str = "INR"
 
 class HotelResult(BaseModel):
     provider: TravelProviderType
@@ -60,6 +78,11 @@ class HotelResult(BaseModel):
     rating: float
     deep_link: str
     provider_data: Dict[str, Any] = Field(default_factory=dict)
+    currency: str = "INR"
+    latitude: float | None = None
+    longitude: float | None = None
+    geo_source: str | None = None  # 'provider' or 'city' when geocoded
+    distance_km: float | None = None  # Set by distance-aware hotel queries
 
 class CabResult(BaseModel):
     provider: TravelProviderType
@@ -71,3 +94,24 @@ class CabResult(BaseModel):
     rating: float
     deep_link: str
     provider_data: Dict[str, Any] = Field(default_factory=dict)
+    currency: str = "INR"
+
+class RouteLeg(BaseModel):
+    from_city: str
+    to_city: str
+    departure_date: datetime
+    price: float | None = None
+    offer: FlightResult | None = None
+
+class RoutePlan(BaseModel):
+    cities: list[str]  # Cities in visiting order
+    legs: list[RouteLeg]
+    total_price: float | None = None  # None when some leg has no priced offer
+    method: str  # 'exact' or 'heuristic'
+
+class FareMatrix(BaseModel):
+    origins: list[str]
+    destinations: list[str]
+    date_class: str  # 'weekday', 'weekend' or 'any'
+    fares: list[list[float | None]]  # fares[i][j] for origins[i] -> destinations[j]
+    distances_km: list[list[float | None]]
@@ -1,7 +1,9 @@
 from passlib.context import CryptContext
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from jose import JWTError, jwt
-from typing import Optional
+from typing import Optional, Tuple
+import asyncio
 import os
 from dotenv import load_dotenv
 
@@ -11,7 +13,18 @@ SECRET_KEY = os.getenv("SECRET_KEY", "supersecretkey")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Raising BCRYPT_ROUNDS upgrades existing hashes as their users log in
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=BCRYPT_ROUNDS)
+
+# bcrypt releases the GIL, so a thread per core hashes in parallel off the event loop
+HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(os.cpu_count() or 2)))
+HASH_QUEUE_LIMIT = int(os.getenv("PASSWORD_HASH_QUEUE_LIMIT", str(HASH_WORKERS * 8)))
+hash_executor = ThreadPoolExecutor(max_workers=HASH_WORKERS, thread_name_prefix="bcrypt")
+hash_pending = 0
+
+class PasswordHasherBusy(Exception):
+    """Raised instead of queueing when HASH_QUEUE_LIMIT hashes are already pending"""
 
 def verify_password(plain_password, hashed_password):
     return pwd_context.verify(plain_password, hashed_password)
@@ -19,6 +32,25 @@ def verify_password(plain_password, hashed_password):
 def get_password_hash(password):
     return pwd_context.hash(password)
 
+async def run_hasher(fn, *args):
+    """Run a passlib call in the hash pool, rejecting fast when the pool is saturated"""
+    global hash_pending
+    if hash_pending >= HASH_QUEUE_LIMIT:
+        raise PasswordHasherBusy()
+    hash_pending += 1
+    try:
+        return await asyncio.get_running_loop().run_in_executor(hash_executor, fn, *args)
+    finally:
+        hash_pending -= 1
+
+async def verify_and_update_password(plain_password, hashed_password) -> Tuple[bool, Optional[str]]:
+    """Verify off the event loop; also returns a new hash when the stored one uses outdated settings"""
+    return await run_hasher(pwd_context.verify_and_update, plain_password, hashed_password)
+
+async def hash_password(password) -> str:
+    """get_password_hash off the event loop"""
+    return await run_hasher(pwd_context.hash, password)
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
     if expires_delta:
@@ -0,0 +1,140 @@
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Dict, List, Optional
+from bson import ObjectId
+from pydantic import BaseModel, Field
+from app.models.chatbot import ChatResponse, ItineraryDay
+from app.utils.itinerary_parser import format_itinerary
+
+# Context window: at least the last RECENT_MESSAGES messages verbatim, everything older in `summary`
+RECENT_MESSAGES = 6
+COMPACT_BATCH = 4  # Compact once this many messages have piled up past the window; they stay verbatim until then
+MESSAGE_MAX_CHARS = 600
+SUMMARY_MAX_CHARS = 1200
+SESSION_TTL = timedelta(days=30)
+
+Summarizer = Callable[[str, List[Dict[str, str]]], Awaitable[str]]
+
+class ChatSession(BaseModel):
+    id: str = Field(default_factory=lambda: str(ObjectId()))
+    user_id: Optional[str] = None
+    summary: str = ""  # Running summary of the turns that left the window
+    recent: List[Dict] = Field(default_factory=list)  # {"n", "role", "content"}, oldest first
+    summarized_through: int = 0  # Highest message number folded into `summary`
+    plan_summary: Optional[str] = None  # Latest itinerary, kept structured
+    itinerary: List[ItineraryDay] = Field(default_factory=list)
+    turns: int = 0
+
+    def context_messages(self) -> List[Dict[str, str]]:
+        """Prior context for the next prompt; bounded by the window, summary and plan sizes"""
+        messages = []
+        if self.summary:
+            messages.append({"role": "system", "content": f"Conversation so far: {self.summary}"})
+        if self.itinerary:
+            messages.append({
+                "role": "system",
+                "content": "Current itinerary, to be revised on request:\n" + format_itinerary(self.plan_summary or "", self.itinerary)
+            })
+        # Everything not yet in the summary, so no turn drops out while compaction is pending
+        messages.extend(
+            {"role": m["role"], "content": m["content"]} for m in self.recent if m["n"] > self.summarized_through
+        )
+        return messages
+
+def clip(text: str, limit: int) -> str:
+    return text if len(text) <= limit else text[:limit - 1].rstrip() + "…"
+
+def extractive_summary(summary: str, messages: List[Dict[str, str]]) -> str:
+    """Fold old turns into the summary by keeping the user's requests, newest kept first when clipping"""
+    requests = [f"User asked: {m['content']}" for m in messages if m["role"] == "user"]
+    combined = " ".join(([summary] if summary else []) + requests)
+    # Drop from the front so the most recent constraints survive
+    return combined[-SUMMARY_MAX_CHARS:] if len(combined) > SUMMARY_MAX_CHARS else combined
+
+class SessionStore:
+    """Chat sessions in Mongo with a rolling window compacted into a running summary"""
+
+    def __init__(self, collection, summarize: Optional[Summarizer] = None, ttl: timedelta = SESSION_TTL):
+        self.collection = collection
+        self.summarize = summarize
+        self.ttl = ttl
+        self._indexed = False
+
+    async def _ensure_indexes(self) -> None:
+        if self._indexed:
+            return
+        await self.collection.create_index("updated_at", expireAfterSeconds=int(self.ttl.total_seconds()))
+        self._indexed = True
+
+    async def load(self, session_id: Optional[str], user_id: Optional[str] = None) -> ChatSession:
+        """The stored session, or a new one when the id is missing or unknown"""
+        if session_id:
+            try:
+                doc = await self.collection.find_one({"_id": session_id})
+            except Exception as e:
+                print(f"Error loading chat session: {str(e)}")
+                doc = None
+            if doc and (doc.get("user_id") is None or doc.get("user_id") == user_id):
+                doc["id"] = doc.pop("_id")
+                return ChatSession(**doc)
+        return ChatSession(user_id=user_id)
+
+    async def record_turn(self, session: ChatSession, message: str, response: ChatResponse) -> None:
+        """Append a request and its answer; the itinerary replaces the stored one when the answer has one"""
+        first = session.turns * 2 + 1
+        turn = [
+            {"n": first, "role": "user", "content": clip(message, MESSAGE_MAX_CHARS)},
+            {"n": first + 1, "role": "assistant", "content": clip(response.summary, MESSAGE_MAX_CHARS)},
+        ]
+        session.recent.extend(turn)
+        session.turns += 1
+        update = {"updated_at": datetime.utcnow()}
+        if response.itinerary:
+            session.plan_summary = response.summary
+            session.itinerary = [day.copy(update={"flight": None, "hotel": None}) for day in response.itinerary]
+            update["plan_summary"] = session.plan_summary
+            update["itinerary"] = [day.dict() for day in session.itinerary]
+
+        try:
+            await self._ensure_indexes()
+            # $push rather than a full replace, so a concurrent compaction is never overwritten
+            await self.collection.update_one(
+                {"_id": session.id},
+                {
+                    "$push": {"recent": {"$each": turn}},
+                    "$set": update,
+                    "$inc": {"turns": 1},
+                    "$setOnInsert": {"user_id": session.user_id, "summary": "", "summarized_through": 0}
+                },
+                upsert=True
+            )
+        except Exception as e:
+            print(f"Error saving chat session: {str(e)}")
+
+    def needs_compaction(self, session: ChatSession) -> bool:
+        return len(session.recent) > RECENT_MESSAGES + COMPACT_BATCH
+
+    async def compact(self, session: ChatSession) -> None:
+        """Fold everything before the window into the summary"""
+        overflow = session.recent[:-RECENT_MESSAGES]
+        if not overflow:
+            return
+        summary = None
+        if self.summarize:
+            try:
+                summary = await self.summarize(session.summary, overflow)
+            except Exception as e:
+                print(f"Error summarizing chat session: {str(e)}")
+        summary = clip(summary, SUMMARY_MAX_CHARS) if summary else extractive_summary(session.summary, overflow)
+
+        through = overflow[-1]["n"]
+        try:
+            # Only one compaction wins per window position; turns pushed meanwhile are untouched
+            await self.collection.update_one(
+                {"_id": session.id, "summarized_through": session.summarized_through},
+                {
+                    "$set": {"summary": summary, "summarized_through": through},
+                    "$pull": {"recent": {"n": {"$lte": through}}}
+                }
+            )
+        except Exception as e:
+            print(f"Error compacting chat session: {str(e)}")
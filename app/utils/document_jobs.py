@@ -0,0 +1,214 @@
+import asyncio
+import os
+import uuid
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+from pymongo import ReturnDocument
+from app.utils.pdf_documents import Blocks, DocumentRenderer
+
+JOB_WORKERS = int(os.getenv("DOCUMENT_JOB_WORKERS", "2"))
+JOB_MAX_QUEUED = int(os.getenv("DOCUMENT_JOB_MAX_QUEUED", "500"))
+JOB_MAX_ATTEMPTS = 3
+JOB_LEASE = timedelta(minutes=5)  # A job running longer than this is assumed lost and retried
+JOB_TTL = timedelta(days=7)  # Finished or not, job documents expire after this
+POLL_INTERVAL = 2.0  # Picks up jobs enqueued by other instances
+RETRY_DELAYS = (5, 30, 120)
+
+# A handler turns a job's params into (blocks, title) for the renderer
+Handler = Callable[[dict], Awaitable[Tuple[Blocks, str]]]
+
+class JobFailed(Exception):
+    """Raised by a handler for errors that retrying won't fix"""
+
+class JobQueueFull(Exception):
+    def __init__(self, retry_after: int):
+        super().__init__("Too many document jobs queued")
+        self.retry_after = retry_after
+
+class DocumentJobQueue:
+    """Renders documents in the background, with job state kept in Mongo
+
+    Endpoints `enqueue` a job and return its id straight away. A fixed
+    number of worker tasks claim queued jobs with find_one_and_update, so
+    several app instances can share the collection. A claimed job holds a
+    lease; if its worker dies the lease runs out and another one retries it.
+    """
+
+    def __init__(
+        self,
+        collection,
+        renderer: DocumentRenderer,
+        workers: int = JOB_WORKERS,
+        max_queued: int = JOB_MAX_QUEUED,
+        max_attempts: int = JOB_MAX_ATTEMPTS
+    ):
+        self.collection = collection
+        self.renderer = renderer
+        self.workers = workers
+        self.max_queued = max_queued
+        self.max_attempts = max_attempts
+        self.handlers: Dict[str, Handler] = {}
+        self.tasks: List[asyncio.Task] = []
+        self.wakeup: Optional[asyncio.Event] = None
+        self.metrics = {"enqueued": 0, "completed": 0, "retried": 0, "failed": 0, "rejected": 0}
+
+    def handler(self, kind: str):
+        """Register the handler for a job kind"""
+        def register(fn: Handler) -> Handler:
+            self.handlers[kind] = fn
+            return fn
+        return register
+
+    async def enqueue(self, kind: str, params: dict, filename: Optional[str] = None) -> dict:
+        if kind not in self.handlers:
+            raise ValueError(f"Unknown document job kind: {kind}")
+        if await self.collection.count_documents({"status": "queued"}, limit=self.max_queued) >= self.max_queued:
+            self.metrics["rejected"] += 1
+            raise JobQueueFull(retry_after=int(POLL_INTERVAL * 5))
+        now = datetime.utcnow()
+        job = {
+            "_id": uuid.uuid4().hex,
+            "kind": kind,
+            "params": params,
+            "filename": filename,
+            "status": "queued",
+            "attempts": 0,
+            "run_at": now,
+            "lease_until": None,
+            "digest": None,
+            "error": None,
+            "created_at": now,
+            "updated_at": now,
+            "expires_at": now + JOB_TTL,
+        }
+        await self.collection.insert_one(job)
+        self.metrics["enqueued"] += 1
+        if self.wakeup is not None:
+            self.wakeup.set()
+        return job
+
+    async def get(self, job_id: str) -> Optional[dict]:
+        return await self.collection.find_one({"_id": job_id}, {"params": 0})
+
+    async def requeue(self, job_id: str) -> Optional[dict]:
+        """Run a finished job again, e.g. after its document left the render cache"""
+        now = datetime.utcnow()
+        job = await self.collection.find_one_and_update(
+            {"_id": job_id, "status": "done"},
+            {"$set": {"status": "queued", "attempts": 0, "run_at": now, "updated_at": now, "digest": None}},
+            projection={"params": 0},
+            return_document=ReturnDocument.AFTER
+        )
+        if job and self.wakeup is not None:
+            self.wakeup.set()
+        return job
+
+    async def _claim(self) -> Optional[dict]:
+        now = datetime.utcnow()
+        return await self.collection.find_one_and_update(
+            {"$or": [
+                {"status": "queued", "run_at": {"$lte": now}},
+                {"status": "running", "lease_until": {"$lt": now}},
+            ]},
+            {
+                "$set": {"status": "running", "lease_until": now + JOB_LEASE, "updated_at": now},
+                "$inc": {"attempts": 1}
+            },
+            sort=[("run_at", 1)],
+            return_document=ReturnDocument.AFTER
+        )
+
+    async def _finish(self, job: dict, update: dict) -> None:
+        update.update({"lease_until": None, "updated_at": datetime.utcnow()})
+        # Matching on attempts ignores a worker whose lease was already taken over
+        await self.collection.update_one(
+            {"_id": job["_id"], "status": "running", "attempts": job["attempts"]},
+            {"$set": update}
+        )
+
+    async def _process(self, job: dict) -> None:
+        if job["attempts"] > self.max_attempts:
+            # Lost its lease on every attempt
+            self.metrics["failed"] += 1
+            await self._finish(job, {"status": "failed", "error": "Job timed out"})
+            return
+        try:
+            handler = self.handlers.get(job["kind"])
+            if handler is None:
+                raise JobFailed(f"Unknown document job kind: {job['kind']}")
+            blocks, title = await handler(job["params"])
+            digest = await self.renderer.render(blocks, title)
+        except JobFailed as e:
+            self.metrics["failed"] += 1
+            await self._finish(job, {"status": "failed", "error": str(e)})
+        except Exception as e:
+            print(f"Error running document job {job['_id']} (attempt {job['attempts']}): {str(e)}")
+            if job["attempts"] >= self.max_attempts:
+                self.metrics["failed"] += 1
+                await self._finish(job, {"status": "failed", "error": "Document could not be generated"})
+            else:
+                self.metrics["retried"] += 1
+                delay = RETRY_DELAYS[min(job["attempts"], len(RETRY_DELAYS)) - 1]
+                await self._finish(job, {
+                    "status": "queued",
+                    "run_at": datetime.utcnow() + timedelta(seconds=delay),
+                    "error": str(e)
+                })
+        else:
+            self.metrics["completed"] += 1
+            await self._finish(job, {"status": "done", "digest": digest, "error": None})
+
+    async def _release(self, job: dict) -> None:
+        """Hand a job interrupted by shutdown back to the queue without using up an attempt"""
+        await self.collection.update_one(
+            {"_id": job["_id"], "status": "running", "attempts": job["attempts"]},
+            {
+                "$set": {"status": "queued", "lease_until": None, "updated_at": datetime.utcnow()},
+                "$inc": {"attempts": -1}
+            }
+        )
+
+    async def _work(self) -> None:
+        while True:
+            # Cleared before claiming, so an enqueue during the claim isn't missed
+            self.wakeup.clear()
+            try:
+                job = await self._claim()
+            except Exception as e:
+                print(f"Error claiming document job: {str(e)}")
+                job = None
+            if job is None:
+                try:
+                    await asyncio.wait_for(self.wakeup.wait(), POLL_INTERVAL)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            try:
+                await self._process(job)
+            except asyncio.CancelledError:
+                await self._release(job)
+                raise
+            except Exception as e:
+                print(f"Error updating document job {job['_id']}: {str(e)}")
+
+    def start(self) -> None:
+        """Start the worker tasks; their number is the cap on concurrent jobs"""
+        self.wakeup = asyncio.Event()
+        self.tasks = [asyncio.create_task(self._work()) for _ in range(self.workers)]
+
+    async def close(self) -> None:
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        self.tasks = []
+
+    async def snapshot(self) -> Dict[str, int]:
+        counts = await self.collection.aggregate([
+            {"$group": {"_id": "$status", "count": {"$sum": 1}}}
+        ]).to_list(length=None)
+        return {
+            **self.metrics,
+            **{status: 0 for status in ("queued", "running", "done", "failed")},
+            **{doc["_id"]: doc["count"] for doc in counts},
+            "workers": len(self.tasks),
+        }
@@ -0,0 +1,101 @@
+import asyncio
+import os
+import zlib
+from datetime import datetime, timedelta
+from typing import Any, List, Optional, Tuple
+import bson
+from pymongo import ReplaceOne
+
+ARCHIVE_AFTER = timedelta(days=int(os.getenv("CHAT_ARCHIVE_AFTER_DAYS", "90")))
+ARCHIVE_INTERVAL = timedelta(hours=6)
+BUCKET_SIZE = 200  # Chats per archive document; ~1 MB of BSON before compression
+SCAN_BATCH = 5000  # Old chats archived per pass, to bound memory
+COMPRESSION_LEVEL = 6
+
+def compress_docs(docs: List[dict]) -> bytes:
+    """BSON-encode and zlib-compress a list of documents, keeping datetimes and ObjectIds intact"""
+    return zlib.compress(bson.encode({"docs": docs}), COMPRESSION_LEVEL)
+
+def decompress_docs(data: bytes) -> List[dict]:
+    return bson.decode(zlib.decompress(data))["docs"]
+
+def position(doc: dict) -> Tuple[datetime, Any]:
+    return doc["created_at"], doc["_id"]
+
+class HistoryArchive:
+    """Moves old chats from the hot collection into compressed per-user buckets"""
+
+    def __init__(
+        self,
+        hot,
+        archive,
+        archive_after: timedelta = ARCHIVE_AFTER,
+        bucket_size: int = BUCKET_SIZE
+    ):
+        self.hot = hot
+        self.archive = archive
+        self.archive_after = archive_after
+        self.bucket_size = bucket_size
+
+    async def archive_once(self, now: Optional[datetime] = None) -> int:
+        """Archive up to SCAN_BATCH chats older than the cutoff; returns how many moved"""
+        cutoff = (now or datetime.utcnow()) - self.archive_after
+        # Oldest first within each user, so whatever a partial batch leaves in the
+        # hot collection is newer than everything archived and reads can fall
+        # through from one to the other. Walks the history index in reverse.
+        docs = await self.hot.find({"created_at": {"$lt": cutoff}}).sort(
+            [("user_id", -1), ("created_at", 1), ("_id", 1)]
+        ).limit(SCAN_BATCH).to_list(length=SCAN_BATCH)
+        if not docs:
+            return 0
+
+        buckets = []
+        start = 0
+        for i in range(1, len(docs) + 1):
+            if i == len(docs) or docs[i].get("user_id") != docs[start].get("user_id") or i - start == self.bucket_size:
+                # Stored newest first
+                buckets.append(docs[start:i][::-1])
+                start = i
+
+        writes = []
+        for bucket in buckets:
+            newest, oldest = bucket[0], bucket[-1]
+            # Deterministic id: re-running after a crash replaces the bucket instead of duplicating it
+            bucket_id = f"{newest.get('user_id')}:{newest['_id']}:{oldest['_id']}"
+            writes.append(ReplaceOne({"_id": bucket_id}, {
+                "user_id": newest.get("user_id"),
+                "newest": newest["created_at"],
+                "oldest": oldest["created_at"],
+                "count": len(bucket),
+                "codec": "zlib",
+                "data": bson.Binary(compress_docs(bucket)),
+            }, upsert=True))
+        await self.archive.bulk_write(writes, ordered=False)
+        # Only drop from the hot collection once the buckets are stored
+        await self.hot.delete_many({"_id": {"$in": [doc["_id"] for doc in docs]}})
+        return len(docs)
+
+    async def run(self, interval: timedelta = ARCHIVE_INTERVAL) -> None:
+        """Archive in the background forever, draining the backlog before sleeping"""
+        while True:
+            try:
+                while await self.archive_once() == SCAN_BATCH:
+                    pass
+            except Exception as e:
+                print(f"Error archiving chat history: {str(e)}")
+            await asyncio.sleep(interval.total_seconds())
+
+    async def read(self, user_id: str, before: Optional[Tuple[datetime, Any]], limit: int) -> List[dict]:
+        """Up to `limit` archived chats of a user, newest first, older than the `before` position"""
+        query = {"user_id": user_id}
+        if before:
+            query["oldest"] = {"$lte": before[0]}
+        results: List[dict] = []
+        async for bucket in self.archive.find(query).sort("newest", -1):
+            for doc in decompress_docs(bucket["data"]):
+                if before is None or position(doc) < before:
+                    results.append(doc)
+            if len(results) >= limit:
+                break
+        results.sort(key=position, reverse=True)
+        return results[:limit]
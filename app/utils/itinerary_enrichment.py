@@ -0,0 +1,153 @@
+import asyncio
+import os
+import time
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional
+from app.models.chatbot import ItineraryDay, PriceQuote
+from app.travel_providers.aggregator import TravelAggregator
+from app.travel_providers.locations import city_index
+from app.travel_providers.schemas import SearchCriteria, HotelSearchCriteria
+
+# Seconds each lookup gets from when it starts; later legs fall back to plain links
+ENRICHMENT_DEADLINE = float(os.getenv("CHATBOT_ENRICHMENT_DEADLINE", "2.5"))
+# Trips without a start date are priced this many days out
+DEFAULT_LEAD_DAYS = 30
+
+def flight_search_link(from_code: str, to_code: str, day: date) -> str:
+    return f"https://www.skyscanner.com/transport/flights/{from_code.lower()}/{to_code.lower()}/{day:%y%m%d}/"
+
+def hotel_search_link(city: str, check_in: date, check_out: date) -> str:
+    return (
+        f"https://www.booking.com/searchresults.html"
+        f"?ss={city.replace(' ', '+')}"
+        f"&checkin={check_in.isoformat()}"
+        f"&checkout={check_out.isoformat()}"
+        f"&group_adults=2"
+        f"&no_rooms=1"
+    )
+
+class ItineraryEnricher:
+    """Prices the flights and hotels of an itinerary while it is still being produced
+
+    Call `add_day` as each day becomes known; lookups start immediately and
+    run concurrently. `finish` gives each lookup up to `deadline` seconds
+    from when it started, so the last stay (only known at the end) gets
+    the same budget as the rest, and returns priced copies of the days,
+    with plain search links for late legs.
+    """
+
+    def __init__(
+        self,
+        aggregator: Optional[TravelAggregator],
+        start_date: Optional[date] = None,
+        deadline: float = ENRICHMENT_DEADLINE
+    ):
+        self.aggregator = aggregator
+        self.start_date = start_date or date.today() + timedelta(days=DEFAULT_LEAD_DAYS)
+        self.deadline = deadline
+        self.days: List[ItineraryDay] = []
+        self.stay_start = 0  # Index of the first day in the current city
+        self.flights: Dict[int, PriceQuote] = {}  # Fallback quote per day index
+        self.hotels: Dict[int, PriceQuote] = {}
+        self.tasks: Dict[asyncio.Task, tuple] = {}  # task -> ("flight" | "hotel", day index, started)
+
+    def _date(self, index: int) -> date:
+        return self.start_date + timedelta(days=index)
+
+    def add_day(self, day: ItineraryDay) -> None:
+        """Record the next day and start the lookups it makes possible"""
+        index = len(self.days)
+        self.days.append(day)
+        if index == 0 or city_index.canonical_city(self.days[index - 1].city).lower() == city_index.canonical_city(day.city).lower():
+            return
+        # A new city closes the previous stay and may need a flight in
+        self._start_hotel(self.stay_start, index)
+        self.stay_start = index
+        self._start_flight(index)
+
+    def _start_flight(self, index: int) -> None:
+        origin = city_index.resolve(self.days[index - 1].city)
+        destination = city_index.resolve(self.days[index].city)
+        if not origin or not destination or origin.iata == destination.iata:
+            return  # No airport on one side, or a short hop within the same airport's area
+        travel_date = self._date(index)
+        self.flights[index] = PriceQuote(
+            title=f"Flights {origin.iata} to {destination.iata}",
+            deep_link=flight_search_link(origin.iata, destination.iata, travel_date)
+        )
+        if self.aggregator:
+            criteria = SearchCriteria(
+                from_city=origin.iata,
+                to_city=destination.iata,
+                departure_date=datetime.combine(travel_date, datetime.min.time())
+            )
+            task = asyncio.create_task(self.aggregator.search_flights_batch([criteria]))
+            self.tasks[task] = ("flight", index, time.monotonic())
+
+    def _start_hotel(self, first: int, end: int) -> None:
+        """Hotel for the days [first, end), checking out on day `end`"""
+        city = city_index.canonical_city(self.days[first].city)
+        check_in, check_out = self._date(first), self._date(end)
+        self.hotels[first] = PriceQuote(
+            title=f"Hotels in {city}",
+            deep_link=hotel_search_link(city, check_in, check_out)
+        )
+        if self.aggregator:
+            criteria = HotelSearchCriteria(
+                city=city,
+                check_in=datetime.combine(check_in, datetime.min.time()),
+                check_out=datetime.combine(check_out, datetime.min.time())
+            )
+            task = asyncio.create_task(self.aggregator.search_hotels_batch([criteria]))
+            self.tasks[task] = ("hotel", first, time.monotonic())
+
+    async def finish(self) -> List[ItineraryDay]:
+        """Priced copies of the days; lookups still running at the deadline are cancelled"""
+        if not self.days:
+            return []
+        self._start_hotel(self.stay_start, len(self.days))
+
+        pending = set(self.tasks)
+        while pending:
+            # Cancel lookups past their own deadline, then wait for the next one to expire
+            now = time.monotonic()
+            expired = {task for task in pending if self.tasks[task][2] + self.deadline <= now}
+            for task in expired:
+                task.cancel()
+            pending -= expired
+            if pending:
+                next_deadline = min(self.tasks[task][2] for task in pending) + self.deadline
+                _, pending = await asyncio.wait(pending, timeout=next_deadline - now)
+
+        for task, (kind, index, _) in self.tasks.items():
+            # Cancelled ones may not have unwound yet
+            if not task.done() or task.cancelled():
+                continue
+            if task.exception():
+                print(f"Error pricing itinerary {kind}: {str(task.exception())}")
+                continue
+            results = task.result()[0]
+            if not results:
+                continue
+            cheapest = results[0]
+            if kind == "flight":
+                self.flights[index] = PriceQuote(
+                    title=f"{cheapest.airline} {cheapest.flight_number}",
+                    deep_link=cheapest.deep_link,
+                    price=cheapest.price,
+                    currency=cheapest.currency,
+                    provider=cheapest.provider.value
+                )
+            else:
+                self.hotels[index] = PriceQuote(
+                    title=cheapest.hotel_name,
+                    deep_link=cheapest.deep_link,
+                    price=cheapest.total_price,
+                    currency=cheapest.currency,
+                    provider=cheapest.provider.value
+                )
+
+        return [
+            day.copy(update={"flight": self.flights.get(i), "hotel": self.hotels.get(i)})
+            for i, day in enumerate(self.days)
+        ]
@@ -0,0 +1,169 @@
+import json
+import re
+from typing import List, Optional, Sequence, Tuple
+from app.models.chatbot import ItineraryDay
+
+# "Day 3 - Jaipur", "**Day 3: Jaipur**", "### Day 3 (Arrival) – Jaipur"
+DAY_HEADING = re.compile(r'^[#*\s]*Day\s+\d+\b(?P<rest>.*)$')
+HEADING_EDGES = re.compile(r'^[\s*:\-–—]+|[\s*]+$')
+SUMMARY_HEADING = re.compile(r'^[#*\s]*Trip Summary[\s*]*:[\s*]*(?P<rest>.*)$')
+SECTION_HEADING = re.compile(r'^[#*\s]*(?:Daily Itinerary|Travel Itinerary)[\s*]*:?[\s*]*$')
+NUMBERED = re.compile(r'^\d+[.)]\s+')
+# Matched against the lowercased activity; faster than an IGNORECASE pattern
+ACCOMMODATION = re.compile(r'stay|resort|hotel|accommodation')
+JSON_FENCE = re.compile(r'^```(?:json)?\s*|\s*```$')
+
+NO_EVENTS: Tuple = ()
+
+def strip_bullet(line: str) -> str:
+    """Drop a leading "•", "-", "*" or "1." marker"""
+    first = line[0]
+    if first == '•' or first == '-' or (first == '*' and line[1:2].isspace()):
+        return line[1:].lstrip()
+    if first.isdigit():
+        numbered = NUMBERED.match(line)
+        if numbered:
+            return line[numbered.end():]
+    return line
+
+def build_itinerary_day(heading: str, rest: str, lines: List[str]) -> ItineraryDay:
+    """Turn a day heading (and the text after "Day N") plus its content lines into an ItineraryDay"""
+    rest = HEADING_EDGES.sub('', rest).replace(' – ', ' - ').replace(' — ', ' - ')
+    city = rest.split(' - ')[-1].strip() or heading
+    activities = []
+    accommodation = None
+    for line in lines:
+        activity = strip_bullet(line)
+        # Lowercase once per activity, and stop checking after the first match
+        if accommodation is None and ACCOMMODATION.search(activity.lower()):
+            accommodation = activity
+        else:
+            activities.append(activity)
+    return ItineraryDay(city=city, activities=activities, accommodation=accommodation)
+
+class ItineraryParser:
+    """Single-pass, line-oriented parser for the bullet itinerary format
+
+    `feed_line` returns (event, payload) pairs as soon as a part is complete:
+    ("summary", str) when the first day starts, then ("day", ItineraryDay)
+    when the next day begins. `close` flushes the final day.
+    """
+
+    def __init__(self):
+        self.summary_lines: Optional[List[str]] = None  # None until "Trip Summary:" is seen
+        self.summary: Optional[str] = None
+        self.heading: Optional[str] = None
+        self.rest = ""
+        self.lines: List[str] = []
+        self.itinerary: List[ItineraryDay] = []
+
+    def feed_line(self, line: str) -> Sequence[Tuple[str, object]]:
+        line = line.strip()
+        if not line:
+            return NO_EVENTS
+        # Bullets inside a day are the bulk of every response; skip the heading regex for them
+        if self.heading is not None and (line[0] == '•' or line[0] == '-'):
+            self.lines.append(line)
+            return NO_EVENTS
+        events = []
+        day = DAY_HEADING.match(line)
+        if day:
+            events.extend(self._finish_summary())
+            if self.heading is not None:
+                events.append(self._finish_day())
+            self.heading, self.rest = line, day.group('rest')
+        elif self.heading is not None:
+            self.lines.append(line)
+        elif self.summary_lines is None:
+            summary = SUMMARY_HEADING.match(line)
+            if summary:
+                self.summary_lines = [summary.group('rest')] if summary.group('rest') else []
+        elif not SECTION_HEADING.match(line):
+            self.summary_lines.append(line)
+        return events
+
+    def close(self) -> List[Tuple[str, object]]:
+        events = self._finish_summary()
+        if self.heading is not None:
+            events.append(self._finish_day())
+        return events
+
+    def _finish_summary(self) -> List[Tuple[str, object]]:
+        if self.summary is not None or self.summary_lines is None:
+            return []
+        self.summary = " ".join(self.summary_lines)
+        return [("summary", self.summary)]
+
+    def _finish_day(self) -> Tuple[str, ItineraryDay]:
+        day = build_itinerary_day(self.heading, self.rest, self.lines)
+        self.itinerary.append(day)
+        self.heading, self.rest, self.lines = None, "", []
+        return ("day", day)
+
+class IncrementalItineraryParser(ItineraryParser):
+    """ItineraryParser fed with arbitrary stream chunks instead of whole lines"""
+
+    def __init__(self):
+        super().__init__()
+        self.buffer = ""
+
+    def feed(self, chunk: str) -> List[Tuple[str, object]]:
+        self.buffer += chunk
+        if '\n' not in chunk:
+            return []
+        # Only complete lines are parsed; the tail waits for more text
+        *complete, self.buffer = self.buffer.split('\n')
+        events = []
+        for line in complete:
+            events.extend(self.feed_line(line))
+        return events
+
+    def close(self) -> List[Tuple[str, object]]:
+        events = list(self.feed_line(self.buffer)) if self.buffer else []
+        self.buffer = ""
+        events.extend(super().close())
+        return events
+
+def parse_json_response(response_text: str) -> Tuple[str, List[ItineraryDay]]:
+    """Parse a structured-output response: {"summary": ..., "itinerary": [{"city", "activities", "accommodation"}]}"""
+    data = json.loads(JSON_FENCE.sub('', response_text.strip()))
+    summary = data.get("summary")
+    if not summary:
+        raise ValueError("Could not find Trip Summary section")
+    itinerary = [
+        ItineraryDay(
+            city=day.get("city", ""),
+            activities=[str(a) for a in day.get("activities", [])],
+            accommodation=day.get("accommodation") or None
+        )
+        for day in data.get("itinerary", [])
+    ]
+    return summary.strip(), itinerary
+
+def parse_ai_response(response_text: str) -> Tuple[str, List[ItineraryDay]]:
+    """Parse the AI response into summary and itinerary sections
+
+    JSON structured output is detected automatically; anything else is
+    read as the bullet format from TRAVEL_ASSISTANT_PROMPT.
+    """
+    stripped = response_text.lstrip()
+    if stripped.startswith('{') or stripped.startswith('```'):
+        return parse_json_response(stripped)
+
+    parser = ItineraryParser()
+    for line in response_text.splitlines():
+        parser.feed_line(line)
+    parser.close()
+    if parser.summary is None:
+        raise ValueError("Could not find Trip Summary section")
+    return parser.summary, parser.itinerary
+
+def format_itinerary(summary: str, itinerary: List[ItineraryDay]) -> str:
+    """Render a parsed plan back into the bullet format, e.g. to give it to the model as context"""
+    lines = ["Trip Summary:", summary, "", "Daily Itinerary:"]
+    for number, day in enumerate(itinerary, 1):
+        lines.append(f"Day {number} - {day.city}")
+        lines.extend(f"• {activity}" for activity in day.activities)
+        if day.accommodation:
+            lines.append(day.accommodation)
+    return "\n".join(lines)
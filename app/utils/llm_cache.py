@@ -0,0 +1,111 @@
+import hashlib
+import json
+import re
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Optional, Tuple
+from app.models.chatbot import ChatResponse
+
+# Defaults sized for a few thousand distinct popular prompts
+MEMORY_ENTRIES = 1000
+CACHE_TTL = timedelta(days=7)
+MAX_DOCUMENTS = 50000
+TRIM_EVERY = 100  # Writes between size-cap checks
+
+_WHITESPACE = re.compile(r"\s+")
+_EDGE_PUNCTUATION = re.compile(r"^[\W_]+|[\W_]+$")
+
+def normalize_prompt(message: str) -> str:
+    """Collapse case, whitespace and edge punctuation so trivial variants share a key"""
+    message = _WHITESPACE.sub(" ", message.lower()).strip()
+    return _EDGE_PUNCTUATION.sub("", message)
+
+def cache_key(message: str, **params) -> str:
+    """Stable key for a prompt plus the model parameters that shape the answer"""
+    payload = json.dumps({"prompt": normalize_prompt(message), **params}, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+class LLMResponseCache:
+    """Structured chatbot responses cached in an in-process LRU backed by Mongo"""
+
+    def __init__(
+        self,
+        collection=None,
+        max_entries: int = MEMORY_ENTRIES,
+        ttl: timedelta = CACHE_TTL,
+        max_documents: int = MAX_DOCUMENTS
+    ):
+        self.collection = collection
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_documents = max_documents
+        self.memory: "OrderedDict[str, Tuple[ChatResponse, datetime]]" = OrderedDict()
+        self._writes = 0
+        self._indexed = False
+
+    async def _ensure_indexes(self) -> None:
+        if self._indexed or self.collection is None:
+            return
+        # Mongo drops documents once expires_at has passed
+        await self.collection.create_index("expires_at", expireAfterSeconds=0)
+        await self.collection.create_index("created_at")
+        self._indexed = True
+
+    def _remember(self, key: str, response: ChatResponse, expires_at: datetime) -> None:
+        self.memory[key] = (response, expires_at)
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.max_entries:
+            self.memory.popitem(last=False)
+
+    async def get(self, key: str) -> Optional[ChatResponse]:
+        """Cached response for `key`, checking memory before Mongo"""
+        now = datetime.utcnow()
+        entry = self.memory.get(key)
+        if entry:
+            if entry[1] > now:
+                self.memory.move_to_end(key)
+                return entry[0]
+            del self.memory[key]
+
+        if self.collection is None:
+            return None
+        try:
+            doc = await self.collection.find_one({"_id": key, "expires_at": {"$gt": now}})
+        except Exception as e:
+            print(f"Error reading LLM cache: {str(e)}")
+            return None
+        if not doc:
+            return None
+        response = ChatResponse(**doc["response"])
+        self._remember(key, response, doc["expires_at"])
+        return response
+
+    async def set(self, key: str, response: ChatResponse) -> None:
+        """Store a response in both tiers"""
+        now = datetime.utcnow()
+        expires_at = now + self.ttl
+        self._remember(key, response, expires_at)
+        if self.collection is None:
+            return
+        try:
+            await self._ensure_indexes()
+            await self.collection.replace_one(
+                {"_id": key},
+                {"response": response.dict(), "created_at": now, "expires_at": expires_at},
+                upsert=True
+            )
+            self._writes += 1
+            if self._writes % TRIM_EVERY == 0:
+                await self._trim()
+        except Exception as e:
+            print(f"Error writing LLM cache: {str(e)}")
+
+    async def _trim(self) -> None:
+        """Evict the oldest documents once the collection exceeds its size cap"""
+        excess = await self.collection.estimated_document_count() - self.max_documents
+        if excess <= 0:
+            return
+        cursor = self.collection.find({}, {"_id": 1}).sort("created_at", 1).limit(excess)
+        oldest = [doc["_id"] async for doc in cursor]
+        if oldest:
+            await self.collection.delete_many({"_id": {"$in": oldest}})
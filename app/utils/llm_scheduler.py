@@ -0,0 +1,214 @@
+import asyncio
+import heapq
+import itertools
+import math
+import os
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Awaitable, Callable, Deque, Dict, List, Optional, Tuple
+from openai import RateLimitError
+
+# Defaults sit below the gpt-3.5-turbo tier-1 limits; override per deployment
+MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+MAX_QUEUE = int(os.getenv("LLM_MAX_QUEUE", "32"))
+MAX_QUEUE_WAIT = float(os.getenv("LLM_MAX_QUEUE_WAIT", "20"))
+REQUESTS_PER_MINUTE = int(os.getenv("LLM_REQUESTS_PER_MINUTE", "500"))
+TOKENS_PER_MINUTE = int(os.getenv("LLM_TOKENS_PER_MINUTE", "60000"))
+MAX_RETRIES = 3
+
+PRIORITY_USER = 0  # Logged-in users are served first
+PRIORITY_ANONYMOUS = 1
+PRIORITY_BACKGROUND = 2  # Housekeeping calls such as session compaction
+
+WINDOW = 60.0
+
+class SchedulerBusy(Exception):
+    """Raised instead of queueing when the scheduler cannot take more work"""
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"LLM scheduler is busy, retry after {retry_after}s")
+        self.retry_after = retry_after
+
+def estimate_tokens(messages: List[Dict[str, str]], max_tokens: int) -> int:
+    """Rough token count of a chat call: ~4 characters per prompt token plus the completion budget"""
+    return sum(len(m["content"]) for m in messages) // 4 + max_tokens
+
+def retry_after_seconds(error: RateLimitError, attempt: int) -> float:
+    """Delay requested by a 429, falling back to exponential backoff"""
+    try:
+        return max(float(error.response.headers.get("retry-after")), 0.5)
+    except (AttributeError, TypeError, ValueError):
+        return min(2 ** attempt, 30)
+
+class Ticket:
+    """A granted slot; the tokens it reserved are corrected once real usage is known"""
+
+    def __init__(self, budget_entry: List[float]):
+        self.budget_entry = budget_entry
+
+    def record_usage(self, total_tokens: int) -> None:
+        self.budget_entry[1] = total_tokens
+
+class LLMScheduler:
+    """Bounded-concurrency priority queue for LLM calls under RPM/TPM budgets"""
+
+    def __init__(
+        self,
+        max_concurrency: int = MAX_CONCURRENCY,
+        max_queue: int = MAX_QUEUE,
+        max_queue_wait: float = MAX_QUEUE_WAIT,
+        requests_per_minute: int = REQUESTS_PER_MINUTE,
+        tokens_per_minute: int = TOKENS_PER_MINUTE
+    ):
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.max_queue_wait = max_queue_wait
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.in_flight = 0
+        self.waiting: List[Tuple[int, int, int, asyncio.Future]] = []
+        self.sent: Deque[List[float]] = deque()  # [sent_at, tokens] per call in the last minute
+        self.paused_until = 0.0  # Set when OpenAI answers 429
+        self._order = itertools.count()
+        self._wakeup: Optional[asyncio.TimerHandle] = None
+        self.metrics = {
+            "requests": 0,
+            "rejected": 0,
+            "queue_timeouts": 0,
+            "rate_limit_retries": 0,
+            "queue_wait_total": 0.0,
+            "queue_wait_max": 0.0,
+            "service_time_total": 0.0,
+            "prompt_tokens": 0,
+            "completion_tokens": 0,
+        }
+
+    def _budget(self, now: float) -> Tuple[int, int]:
+        """Requests and tokens sent in the last minute"""
+        while self.sent and now - self.sent[0][0] >= WINDOW:
+            self.sent.popleft()
+        return len(self.sent), int(sum(entry[1] for entry in self.sent))
+
+    def _delay_for(self, tokens: int, now: float) -> float:
+        """Seconds until a call of `tokens` fits the budgets (0 if it fits now)"""
+        if now < self.paused_until:
+            return self.paused_until - now
+        requests, used = self._budget(now)
+        if requests < self.requests_per_minute and (used + tokens <= self.tokens_per_minute or not self.sent):
+            return 0.0
+        # Wait for the oldest call to leave the window
+        return max(self.sent[0][0] + WINDOW - now, 0.01)
+
+    def _dispatch(self) -> None:
+        """Grant slots to the highest-priority waiters that fit the budgets"""
+        self._wakeup = None
+        while self.waiting and self.in_flight < self.max_concurrency:
+            _, _, tokens, future = self.waiting[0]
+            if future.done():  # Cancelled or timed out while queued
+                heapq.heappop(self.waiting)
+                continue
+            now = time.monotonic()
+            delay = self._delay_for(tokens, now)
+            if delay > 0:
+                self._wakeup = asyncio.get_running_loop().call_later(delay, self._dispatch)
+                return
+            heapq.heappop(self.waiting)
+            entry = [now, float(tokens)]
+            self.sent.append(entry)
+            self.in_flight += 1
+            future.set_result(Ticket(entry))
+
+    def _release(self) -> None:
+        self.in_flight -= 1
+        if self._wakeup is None:
+            self._dispatch()
+
+    def queued(self) -> int:
+        return sum(1 for *_, future in self.waiting if not future.done())
+
+    def retry_after(self) -> int:
+        """Seconds a shed caller should wait, from the current backlog and average service time"""
+        completed = self.metrics["requests"] or 1
+        service = self.metrics["service_time_total"] / completed or 5.0
+        backlog = (self.queued() + 1) / self.max_concurrency * service
+        return max(1, math.ceil(max(backlog, self._delay_for(0, time.monotonic()))))
+
+    def check_capacity(self) -> None:
+        """Raise SchedulerBusy if a new call would be shed"""
+        if self.queued() >= self.max_queue:
+            self.metrics["rejected"] += 1
+            raise SchedulerBusy(self.retry_after())
+
+    @asynccontextmanager
+    async def slot(self, priority: int = PRIORITY_ANONYMOUS, tokens: int = 0):
+        """Hold one concurrency slot, queueing by priority; sheds with SchedulerBusy"""
+        self.check_capacity()
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self.waiting, (priority, next(self._order), tokens, future))
+        queued_at = time.monotonic()
+        if self._wakeup is None:
+            self._dispatch()
+        try:
+            ticket = await asyncio.wait_for(asyncio.shield(future), self.max_queue_wait)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            # The slot may have been granted just as the caller gave up
+            if future.done() and not future.cancelled():
+                self._release()
+            else:
+                future.cancel()
+            if isinstance(e, asyncio.CancelledError):
+                raise
+            self.metrics["queue_timeouts"] += 1
+            raise SchedulerBusy(self.retry_after())
+
+        started = time.monotonic()
+        waited = started - queued_at
+        self.metrics["requests"] += 1
+        self.metrics["queue_wait_total"] += waited
+        self.metrics["queue_wait_max"] = max(self.metrics["queue_wait_max"], waited)
+        try:
+            yield ticket
+        finally:
+            self.metrics["service_time_total"] += time.monotonic() - started
+            self._release()
+
+    def record_usage(self, ticket: Ticket, usage) -> None:
+        """Account a response's token usage against the TPM budget and metrics"""
+        if not usage:
+            return
+        ticket.record_usage(usage.total_tokens)
+        self.metrics["prompt_tokens"] += usage.prompt_tokens
+        self.metrics["completion_tokens"] += usage.completion_tokens
+
+    def pause(self, seconds: float) -> None:
+        """Hold back every queued call after OpenAI rate-limits one"""
+        self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+    async def call(self, make_call: Callable[[], Awaitable], priority: int = PRIORITY_ANONYMOUS, tokens: int = 0):
+        """Run a non-streaming OpenAI call in a slot, retrying 429s after their Retry-After"""
+        for attempt in range(MAX_RETRIES + 1):
+            async with self.slot(priority, tokens) as ticket:
+                try:
+                    response = await make_call()
+                except RateLimitError as e:
+                    if attempt == MAX_RETRIES:
+                        raise
+                    self.metrics["rate_limit_retries"] += 1
+                    self.pause(retry_after_seconds(e, attempt))
+                    continue
+                self.record_usage(ticket, getattr(response, "usage", None))
+                return response
+
+    def snapshot(self) -> Dict[str, float]:
+        """Current metrics plus queue and budget state"""
+        requests, tokens = self._budget(time.monotonic())
+        completed = self.metrics["requests"] or 1
+        return {
+            **self.metrics,
+            "queue_wait_avg": self.metrics["queue_wait_total"] / completed,
+            "in_flight": self.in_flight,
+            "queued": self.queued(),
+            "requests_last_minute": requests,
+            "tokens_last_minute": tokens,
+        }
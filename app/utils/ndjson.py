@@ -0,0 +1,132 @@
+import json
+from typing import AsyncIterator, Callable, List, Optional, Tuple
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
+from pymongo.errors import BulkWriteError
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+IMPORT_BATCH = 500
+MAX_LINE_BYTES = 1024 * 1024
+MAX_REPORTED_ERRORS = 1000  # Rows past this still count as failed but aren't listed
+EXPORT_BATCH = 1000  # Documents per cursor batch
+EXPORT_CHUNK_BYTES = 64 * 1024
+
+async def read_lines(stream: AsyncIterator[bytes], max_line_bytes: int = MAX_LINE_BYTES) -> AsyncIterator[Tuple[int, Optional[bytes]]]:
+    """(line number, line) for each non-blank line of a byte stream; None for over-long lines"""
+    buffer = b""
+    number = 0
+    skipping = False  # Inside a line already reported as too long
+    async for chunk in stream:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            number += 1
+            if skipping:
+                skipping = False
+                continue
+            if len(line) > max_line_bytes:
+                yield number, None
+            elif line.strip():
+                yield number, line
+        if len(buffer) > max_line_bytes:
+            if not skipping:
+                yield number + 1, None
+                skipping = True
+            buffer = b""
+    if buffer.strip() and not skipping:
+        yield number + 1, buffer
+
+def row_error(e: Exception) -> str:
+    if isinstance(e, ValidationError):
+        error = e.errors()[0]
+        location = ".".join(str(part) for part in error["loc"])
+        return f"{location}: {error['msg']}" if location else error["msg"]
+    return str(e)
+
+class ImportReport:
+    def __init__(self):
+        self.inserted = 0
+        self.failed = 0
+        self.errors: List[dict] = []
+
+    def fail(self, line: int, error: str) -> None:
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"line": line, "error": error})
+
+    def result(self) -> dict:
+        return {
+            "inserted": self.inserted,
+            "failed": self.failed,
+            "errors": self.errors,
+            "errors_truncated": self.failed > len(self.errors),
+        }
+
+async def insert_batch(collection, batch: List[Tuple[int, dict]], report: ImportReport) -> None:
+    try:
+        result = await collection.insert_many([document for _, document in batch], ordered=False)
+        report.inserted += len(result.inserted_ids)
+    except BulkWriteError as e:
+        report.inserted += e.details.get("nInserted", 0)
+        for error in e.details.get("writeErrors", []):
+            line = batch[error["index"]][0]
+            report.fail(line, "Duplicate" if error.get("code") == 11000 else error.get("errmsg", "Write failed"))
+    except Exception as e:
+        print(f"Error importing batch: {str(e)}")
+        for line, _ in batch:
+            report.fail(line, "Database error")
+
+async def import_ndjson(
+    stream: AsyncIterator[bytes],
+    collection,
+    to_document: Callable[[dict], dict],
+    batch_size: int = IMPORT_BATCH
+) -> dict:
+    """Insert one document per NDJSON line, in insert_many batches, as the body arrives
+
+    `to_document` validates a parsed row and returns the document to store.
+    Bad rows are reported by line number; the rest are still imported.
+    """
+    report = ImportReport()
+    batch: List[Tuple[int, dict]] = []
+    async for number, line in read_lines(stream):
+        if line is None:
+            report.fail(number, f"Line longer than {MAX_LINE_BYTES} bytes")
+            continue
+        try:
+            row = json.loads(line)
+            if not isinstance(row, dict):
+                raise ValueError("Expected a JSON object")
+            batch.append((number, to_document(row)))
+        except (ValueError, ValidationError) as e:
+            report.fail(number, row_error(e))
+            continue
+        if len(batch) >= batch_size:
+            await insert_batch(collection, batch, report)
+            batch = []
+    if batch:
+        await insert_batch(collection, batch, report)
+    return report.result()
+
+async def export_ndjson(cursor) -> AsyncIterator[bytes]:
+    """Encode a cursor as NDJSON, holding at most one cursor batch and one chunk in memory"""
+    chunk: List[str] = []
+    size = 0
+    async for document in cursor.batch_size(EXPORT_BATCH):
+        document["_id"] = str(document["_id"])
+        line = json.dumps(document, ensure_ascii=False, default=str) + "\n"
+        chunk.append(line)
+        size += len(line)
+        if size >= EXPORT_CHUNK_BYTES:
+            yield "".join(chunk).encode("utf-8")
+            chunk = []
+            size = 0
+    if chunk:
+        yield "".join(chunk).encode("utf-8")
+
+def ndjson_response(cursor, filename: str) -> StreamingResponse:
+    return StreamingResponse(
+        export_ndjson(cursor),
+        media_type=NDJSON_MEDIA_TYPE,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
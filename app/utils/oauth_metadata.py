@@ -0,0 +1,96 @@
+import asyncio
+import re
+import time
+from typing import Dict, Optional, Tuple
+import httpx
+
+DEFAULT_TTL = 3600.0  # When the provider sends no max-age
+MIN_TTL = 300.0
+RETRY_AFTER = 60.0  # After a failed refresh, while serving the last good copy
+REFRESH_AHEAD = 0.8  # Refresh once this fraction of the TTL has passed
+
+_MAX_AGE = re.compile(r"max-age=(\d+)")
+
+def max_age(response: httpx.Response) -> float:
+    """Cache lifetime the provider allows for a response"""
+    match = _MAX_AGE.search(response.headers.get("cache-control", ""))
+    return max(float(match.group(1)), MIN_TTL) if match else DEFAULT_TTL
+
+class OAuthMetadataCache:
+    """Keeps OpenID discovery documents and JWKS loaded into authlib clients ahead of time
+
+    authlib only fetches discovery metadata lazily, inside login and
+    callback requests. Installing it up front (with "_loaded_at" and
+    "jwks" set) means those requests never wait on the provider. Each
+    successful fetch is saved to Mongo as the last known good copy, used
+    when a provider is unreachable at startup.
+    """
+
+    def __init__(self, collection=None, timeout: float = 5.0):
+        self.collection = collection
+        self.timeout = timeout
+        self.refresh_at: Dict[str, float] = {}
+        self.metrics = {"refreshes": 0, "failures": 0, "fallbacks": 0}
+
+    @staticmethod
+    def _install(client, metadata: dict, jwks: dict) -> None:
+        client.server_metadata.update(metadata)
+        client.server_metadata["jwks"] = jwks
+        client.server_metadata["_loaded_at"] = time.time()
+
+    async def _fetch(self, url: str) -> Tuple[dict, float]:
+        async with httpx.AsyncClient(timeout=self.timeout) as http:
+            response = await http.get(url)
+            response.raise_for_status()
+            return response.json(), max_age(response)
+
+    async def refresh(self, name: str, client) -> None:
+        """Fetch metadata and JWKS for one provider, keeping the current copy on failure"""
+        try:
+            metadata, metadata_ttl = await self._fetch(client._server_metadata_url)
+            jwks, jwks_ttl = await self._fetch(metadata["jwks_uri"])
+        except Exception as e:
+            self.metrics["failures"] += 1
+            print(f"Error refreshing {name} OAuth metadata: {str(e)}")
+            if "_loaded_at" not in client.server_metadata:
+                await self._load_last_good(name, client)
+            self.refresh_at[name] = time.time() + RETRY_AFTER
+            return
+
+        self._install(client, metadata, jwks)
+        self.metrics["refreshes"] += 1
+        self.refresh_at[name] = time.time() + min(metadata_ttl, jwks_ttl) * REFRESH_AHEAD
+        if self.collection is not None:
+            try:
+                await self.collection.replace_one(
+                    {"_id": name},
+                    {"metadata": metadata, "jwks": jwks, "fetched_at": time.time()},
+                    upsert=True
+                )
+            except Exception as e:
+                print(f"Error saving {name} OAuth metadata: {str(e)}")
+
+    async def _load_last_good(self, name: str, client) -> None:
+        if self.collection is None:
+            return
+        try:
+            doc = await self.collection.find_one({"_id": name})
+        except Exception as e:
+            print(f"Error loading saved {name} OAuth metadata: {str(e)}")
+            return
+        if doc:
+            self._install(client, doc["metadata"], doc["jwks"])
+            self.metrics["fallbacks"] += 1
+
+    async def prefetch(self, clients: Dict[str, object]) -> None:
+        """Load every provider concurrently; called once at startup"""
+        await asyncio.gather(*(self.refresh(name, client) for name, client in clients.items()))
+
+    async def run(self, clients: Dict[str, object]) -> None:
+        """Refresh each provider ahead of expiry, forever"""
+        while True:
+            now = time.time()
+            due = [name for name in clients if self.refresh_at.get(name, 0) <= now]
+            await asyncio.gather(*(self.refresh(name, clients[name]) for name in due))
+            next_at: Optional[float] = min(self.refresh_at.values(), default=None)
+            await asyncio.sleep(max((next_at or now + DEFAULT_TTL) - time.time(), 1.0))
@@ -0,0 +1,49 @@
+import base64
+import json
+from datetime import datetime
+from typing import Any, Dict, Optional, Tuple
+from bson import ObjectId
+from bson.errors import InvalidId
+from fastapi import HTTPException
+
+def encode_cursor(value: Any, doc_id: Any) -> str:
+    """Opaque cursor for the position after a document, from its sort value and _id"""
+    if isinstance(value, datetime):
+        value = {"$date": value.isoformat()}
+    if isinstance(doc_id, ObjectId):
+        doc_id = {"$oid": str(doc_id)}
+    raw = json.dumps([value, doc_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+def decode_cursor(cursor: str) -> Tuple[Any, Any]:
+    """Inverse of encode_cursor; a malformed cursor is a 400"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        value, doc_id = json.loads(raw)
+        if isinstance(value, dict):
+            value = datetime.fromisoformat(value["$date"])
+        if isinstance(doc_id, dict):
+            doc_id = ObjectId(doc_id["$oid"])
+        return value, doc_id
+    except (ValueError, TypeError, KeyError, InvalidId):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def after_cursor(field: str, cursor: Optional[str], descending: bool = True) -> Dict:
+    """Filter for documents after `cursor` in (field, _id) order; empty for the first page"""
+    if not cursor:
+        return {}
+    value, doc_id = decode_cursor(cursor)
+    op = "$lt" if descending else "$gt"
+    return {"$or": [
+        {field: {op: value}},
+        {field: value, "_id": {op: doc_id}}
+    ]}
+
+def after_id(after: Optional[str]) -> Dict:
+    """Filter for documents after an _id, to resume a scan in _id order"""
+    if not after:
+        return {}
+    try:
+        return {"_id": {"$gt": ObjectId(after)}}
+    except (InvalidId, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid id")
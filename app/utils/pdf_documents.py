@@ -0,0 +1,166 @@
+import asyncio
+import hashlib
+import json
+import multiprocessing
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+from app.models.chatbot import ChatResponse
+from app.models.trip import Trip
+from app.utils.pdf_renderer import RENDERER_VERSION, render_pdf
+
+PDF_WORKERS = int(os.getenv("PDF_WORKERS", "2"))
+PDF_CACHE_DIR = os.getenv("PDF_CACHE_DIR", os.path.join(tempfile.gettempdir(), "travel-site-pdf"))
+PDF_CACHE_MAX_BYTES = int(os.getenv("PDF_CACHE_MAX_MB", "512")) * 1024 * 1024
+TRIM_EVERY = 50  # Renders between cache size checks
+
+Blocks = List[Tuple[str, str]]
+
+def text_blocks(content: str) -> Blocks:
+    """Blocks for free text: "Day N" lines become headings, "•"/"-" lines bullets"""
+    blocks: Blocks = []
+    for line in content.splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        if line.startswith(("•", "- ", "* ")):
+            blocks.append(("bullet", line[1:].strip()))
+        elif line.lower().startswith("day ") or line.endswith(":"):
+            blocks.append(("heading", line.strip("#* ")))
+        else:
+            blocks.append(("text", line))
+    return blocks
+
+def price_line(label: str, quote) -> str:
+    if quote.price is None:
+        return f"{label}: {quote.title} - {quote.deep_link}"
+    return f"{label}: {quote.title}, {quote.currency or 'INR'} {quote.price:,.0f} - {quote.deep_link}"
+
+def itinerary_blocks(response: ChatResponse, title: str = "Travel Itinerary") -> Blocks:
+    blocks: Blocks = [("title", title), ("text", response.summary)]
+    if response.cities:
+        blocks.append(("muted", "Destinations: " + ", ".join(response.cities)))
+    for number, day in enumerate(response.itinerary, 1):
+        blocks.append(("heading", f"Day {number} - {day.city}"))
+        blocks.extend(("bullet", activity) for activity in day.activities)
+        if day.accommodation:
+            blocks.append(("text", f"Stay: {day.accommodation}"))
+        if day.flight:
+            blocks.append(("muted", price_line("Flight", day.flight)))
+        if day.hotel:
+            blocks.append(("muted", price_line("Hotel", day.hotel)))
+    return blocks
+
+def trip_blocks(trip: Trip) -> Blocks:
+    blocks: Blocks = [
+        ("title", trip.title),
+        ("muted", f"{trip.date} · {trip.duration}"),
+        ("text", trip.description),
+    ]
+    return blocks + text_blocks(trip.details)
+
+def history_blocks(chats: List[dict], title: str = "Trip History") -> Blocks:
+    """One section per saved chat, newest first, each with its full itinerary"""
+    blocks: Blocks = [("title", title), ("muted", f"{len(chats)} saved plans")]
+    for chat in chats:
+        response = ChatResponse(**chat["response"])
+        blocks.append(("heading", f"{chat['created_at']:%d %b %Y} - {chat['request']}"))
+        blocks.extend(itinerary_blocks(response)[1:] if response.itinerary else [("text", response.summary)])
+    return blocks
+
+def content_hash(blocks: Blocks, title: str) -> str:
+    """Cache key: identical content renders to the same document"""
+    payload = json.dumps([RENDERER_VERSION, title, blocks], ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+class DocumentRenderer:
+    """Renders PDFs in a process pool, cached on disk by content hash
+
+    Concurrent requests for the same content share one render.
+    """
+
+    def __init__(self, cache_dir: str = PDF_CACHE_DIR, workers: int = PDF_WORKERS, max_bytes: int = PDF_CACHE_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.workers = workers
+        self.max_bytes = max_bytes
+        self.executor: Optional[ProcessPoolExecutor] = None
+        self.inflight: Dict[str, asyncio.Task] = {}
+        self.metrics = {"renders": 0, "cache_hits": 0, "shared_renders": 0, "failures": 0}
+
+    def path(self, digest: str) -> str:
+        return os.path.join(self.cache_dir, f"{digest}.pdf")
+
+    def cached(self, digest: str) -> Optional[str]:
+        """Path of a cached document, refreshing its age for LRU trimming"""
+        path = self.path(digest)
+        try:
+            os.utime(path)
+        except (FileNotFoundError, ValueError):
+            return None
+        return path
+
+    async def render(self, blocks: Blocks, title: str = "") -> str:
+        """Digest of the rendered document, rendering it only if needed"""
+        digest = content_hash(blocks, title)
+        if self.cached(digest):
+            self.metrics["cache_hits"] += 1
+            return digest
+        task = self.inflight.get(digest)
+        if task:
+            self.metrics["shared_renders"] += 1
+        else:
+            task = asyncio.create_task(self._render(digest, blocks, title))
+            self.inflight[digest] = task
+            task.add_done_callback(lambda _: self.inflight.pop(digest, None))
+        # Shielded so one caller disconnecting doesn't cancel the render for the others
+        await asyncio.shield(task)
+        return digest
+
+    async def _render(self, digest: str, blocks: Blocks, title: str) -> None:
+        loop = asyncio.get_running_loop()
+        if self.executor is None:
+            # spawn: workers only import the renderer, not the app and its clients
+            self.executor = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context("spawn"))
+        try:
+            pdf = await loop.run_in_executor(self.executor, render_pdf, blocks, title)
+            await loop.run_in_executor(None, self._store, digest, pdf)
+        except Exception as e:
+            self.metrics["failures"] += 1
+            print(f"Error rendering PDF: {str(e)}")
+            raise
+        self.metrics["renders"] += 1
+        if self.metrics["renders"] % TRIM_EVERY == 0:
+            await loop.run_in_executor(None, self._trim)
+
+    def _store(self, digest: str, pdf: bytes) -> None:
+        os.makedirs(self.cache_dir, exist_ok=True)
+        # Write then rename, so readers never see a partial file
+        fd, tmp = tempfile.mkstemp(dir=self.cache_dir, suffix=".part")
+        with os.fdopen(fd, "wb") as f:
+            f.write(pdf)
+        os.replace(tmp, self.path(digest))
+
+    def _trim(self) -> None:
+        """Delete least recently used documents once the cache exceeds its size cap"""
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if name.endswith(".pdf"):
+                stat = os.stat(os.path.join(self.cache_dir, name))
+                entries.append((stat.st_mtime, stat.st_size, name))
+        total = sum(size for _, size, _ in entries)
+        for _, size, name in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(os.path.join(self.cache_dir, name))
+            except FileNotFoundError:
+                pass
+            total -= size
+
+    def close(self) -> None:
+        if self.executor is not None:
+            self.executor.shutdown(cancel_futures=True)
+            self.executor = None
+
+document_renderer = DocumentRenderer()
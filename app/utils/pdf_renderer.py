@@ -0,0 +1,144 @@
+"""Minimal pure-Python PDF writer for text documents
+
+Lays out a list of blocks on A4 pages with the standard Helvetica fonts,
+which every PDF viewer has built in, so no font files or native
+libraries are needed. Text is encoded as WinAnsi (cp1252); characters
+outside it are replaced.
+"""
+import zlib
+from typing import List, Sequence, Tuple
+
+RENDERER_VERSION = "1"  # Part of the cache key; bump when output changes
+
+PAGE_WIDTH, PAGE_HEIGHT = 595.0, 842.0  # A4 in points
+MARGIN = 50.0
+CONTENT_WIDTH = PAGE_WIDTH - 2 * MARGIN
+
+# Block kind -> (font resource, size, leading, space before, indent)
+STYLES = {
+    "title": ("F2", 20.0, 26.0, 0.0, 0.0),
+    "heading": ("F2", 13.0, 18.0, 10.0, 0.0),
+    "text": ("F1", 10.5, 14.0, 4.0, 0.0),
+    "bullet": ("F1", 10.5, 14.0, 1.0, 14.0),
+    "muted": ("F1", 9.0, 12.0, 2.0, 0.0),
+}
+
+# Helvetica advance widths (1/1000 em) for ASCII 32-126
+_ASCII_WIDTHS = [
+    278, 278, 355, 556, 556, 889, 667, 191, 333, 333, 389, 584, 278, 333, 278, 278,
+    556, 556, 556, 556, 556, 556, 556, 556, 556, 556, 278, 278, 584, 584, 584, 556,
+    1015, 667, 667, 722, 722, 667, 611, 778, 722, 278, 500, 667, 556, 833, 722, 778,
+    667, 778, 722, 667, 611, 722, 667, 944, 667, 667, 611, 278, 278, 278, 469, 556,
+    333, 556, 556, 500, 556, 556, 278, 556, 556, 222, 222, 500, 222, 833, 556, 556,
+    556, 556, 333, 500, 278, 556, 500, 722, 500, 500, 500, 334, 260, 334, 584,
+]
+WIDTHS = {chr(32 + i): w for i, w in enumerate(_ASCII_WIDTHS)}
+WIDTHS.update({"•": 350, "–": 556, "—": 1000, "‘": 222, "’": 222, "“": 333, "”": 333, "…": 1000})
+DEFAULT_WIDTH = 556
+BOLD_FACTOR = 1.06  # Helvetica-Bold runs slightly wider; close enough for wrapping
+
+SUBSTITUTIONS = {"₹": "Rs. ", "→": "->", "\t": "    "}
+
+def clean(text: str) -> str:
+    for char, replacement in SUBSTITUTIONS.items():
+        text = text.replace(char, replacement)
+    return text
+
+def text_width(text: str, size: float, bold: bool = False) -> float:
+    width = sum(WIDTHS.get(char, DEFAULT_WIDTH) for char in text) * size / 1000
+    return width * BOLD_FACTOR if bold else width
+
+def wrap(text: str, size: float, max_width: float, bold: bool = False) -> List[str]:
+    """Greedy word wrap; words longer than a line are split"""
+    lines: List[str] = []
+    current = ""
+    for word in text.split():
+        candidate = f"{current} {word}" if current else word
+        if text_width(candidate, size, bold) <= max_width:
+            current = candidate
+            continue
+        if current:
+            lines.append(current)
+        while text_width(word, size, bold) > max_width:
+            cut = len(word)
+            while cut > 1 and text_width(word[:cut], size, bold) > max_width:
+                cut -= 1
+            lines.append(word[:cut])
+            word = word[cut:]
+        current = word
+    if current:
+        lines.append(current)
+    return lines or [""]
+
+def pdf_string(text: str) -> bytes:
+    raw = text.encode("cp1252", errors="replace")
+    return b"(" + raw.replace(b"\\", b"\\\\").replace(b"(", b"\\(").replace(b")", b"\\)") + b")"
+
+def layout(blocks: Sequence[Tuple[str, str]]) -> List[List[Tuple[str, float, float, float, str]]]:
+    """Place blocks on pages as (font, size, x, y, text) runs"""
+    pages: List[List[Tuple[str, float, float, float, str]]] = [[]]
+    y = PAGE_HEIGHT - MARGIN
+    for kind, text in blocks:
+        font, size, leading, before, indent = STYLES.get(kind, STYLES["text"])
+        bold = font == "F2"
+        lines = wrap(clean(text), size, CONTENT_WIDTH - indent, bold)
+        if pages[-1]:
+            y -= before
+        for i, line in enumerate(lines):
+            if y - leading < MARGIN:
+                pages.append([])
+                y = PAGE_HEIGHT - MARGIN
+            y -= leading
+            if kind == "bullet" and i == 0:
+                pages[-1].append(("F1", size, MARGIN + 2, y, "•"))
+            pages[-1].append((font, size, MARGIN + indent, y, line))
+    return pages
+
+def render_pdf(blocks: Sequence[Tuple[str, str]], title: str = "") -> bytes:
+    """Render (kind, text) blocks to PDF bytes; kinds are the keys of STYLES"""
+    pages = layout(blocks)
+    objects: List[bytes] = []
+
+    def add(body: bytes) -> int:
+        objects.append(body)
+        return len(objects)
+
+    catalog = add(b"")  # Filled in once the page tree exists
+    pages_id = add(b"")
+    regular = add(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>")
+    bold = add(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica-Bold /Encoding /WinAnsiEncoding >>")
+    resources = f"<< /Font << /F1 {regular} 0 R /F2 {bold} 0 R >> >>".encode()
+
+    page_ids = []
+    total = len(pages)
+    for number, runs in enumerate(pages, 1):
+        ops = [b"BT"]
+        for font, size, x, y, text in runs:
+            ops.append(f"/{font} {size:g} Tf 1 0 0 1 {x:.2f} {y:.2f} Tm ".encode() + pdf_string(text) + b" Tj")
+        footer = f"Page {number} of {total}"
+        ops.append(
+            f"/F1 8 Tf 1 0 0 1 {PAGE_WIDTH - MARGIN - text_width(footer, 8):.2f} {MARGIN / 2:.2f} Tm ".encode()
+            + pdf_string(footer) + b" Tj"
+        )
+        ops.append(b"ET")
+        stream = zlib.compress(b"\n".join(ops), 6)
+        content = add(f"<< /Length {len(stream)} /Filter /FlateDecode >>\nstream\n".encode() + stream + b"\nendstream")
+        page_ids.append(add(
+            f"<< /Type /Page /Parent {pages_id} 0 R /MediaBox [0 0 {PAGE_WIDTH:g} {PAGE_HEIGHT:g}] "
+            f"/Resources {resources.decode()} /Contents {content} 0 R >>".encode()
+        ))
+
+    objects[pages_id - 1] = f"<< /Type /Pages /Kids [{' '.join(f'{p} 0 R' for p in page_ids)}] /Count {total} >>".encode()
+    objects[catalog - 1] = f"<< /Type /Catalog /Pages {pages_id} 0 R >>".encode()
+    info = add(b"<< /Title " + pdf_string(clean(title)) + b" /Producer (Travel Site) >>")
+
+    out = bytearray(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += f"{number} 0 obj\n".encode() + body + b"\nendobj\n"
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    out += b"".join(f"{offset:010d} 00000 n \n".encode() for offset in offsets)
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root {catalog} 0 R /Info {info} 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    return bytes(out)
@@ -0,0 +1,129 @@
+import re
+import zlib
+from collections import OrderedDict
+from typing import Dict, FrozenSet, List, Optional, Set, Tuple
+import numpy as np
+from app.models.chatbot import ChatResponse
+
+NUM_PERM = 64
+BANDS = 16  # 16 bands x 4 rows finds pairs at Jaccard 0.8 with ~99.98% probability
+ROWS = NUM_PERM // BANDS
+SIMILARITY_THRESHOLD = 0.8
+MAX_ENTRIES = 20000
+MIN_TOKENS = 2  # Shorter requests are too vague to reuse an answer for
+
+_PRIME = (1 << 31) - 1
+_rng = np.random.default_rng(1)
+_A = _rng.integers(1, _PRIME, size=NUM_PERM, dtype=np.int64)
+_B = _rng.integers(0, _PRIME, size=NUM_PERM, dtype=np.int64)
+
+_TOKEN = re.compile(r"[a-z]+|\d+")
+_NUMBER_WORDS = {
+    "one": "1", "two": "2", "three": "3", "four": "4", "five": "5",
+    "six": "6", "seven": "7", "eight": "8", "nine": "9", "ten": "10",
+}
+# Words that change the wording of a request but not the itinerary it needs
+STOPWORDS = {
+    "a", "an", "the", "in", "to", "of", "for", "and", "at", "on", "with", "my", "me", "i", "we", "us",
+    "our", "please", "can", "you", "could", "would", "want", "need", "like", "some", "is", "it", "be",
+    "plan", "planning", "create", "make", "give", "suggest", "help", "trip", "itinerary", "travel",
+    "tour", "visit", "visiting", "holiday", "vacation", "around", "through", "explore",
+}
+
+def tokenize(text: str) -> FrozenSet[str]:
+    """Reduce a request to the content words and numbers that decide the itinerary"""
+    tokens: Set[str] = set()
+    for token in _TOKEN.findall(text.lower()):
+        token = _NUMBER_WORDS.get(token, token)
+        if token.endswith("ies") and len(token) > 4:
+            token = token[:-3] + "y"
+        elif token.endswith("s") and not token.endswith("ss") and len(token) > 3:
+            token = token[:-1]
+        if token not in STOPWORDS:
+            tokens.add(token)
+    return frozenset(tokens)
+
+def minhash(tokens: FrozenSet[str]) -> np.ndarray:
+    """MinHash signature of a token set"""
+    hashes = np.fromiter((zlib.crc32(t.encode("utf-8")) % _PRIME for t in tokens), dtype=np.int64, count=len(tokens))
+    return ((np.outer(hashes, _A) + _B) % _PRIME).min(axis=0)
+
+def jaccard(a: FrozenSet[str], b: FrozenSet[str]) -> float:
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+class SimilarRequestIndex:
+    """MinHash/LSH index over past chatbot requests, built incrementally"""
+
+    def __init__(self, threshold: float = SIMILARITY_THRESHOLD, max_entries: int = MAX_ENTRIES):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.entries: "OrderedDict[str, Tuple[FrozenSet[str], np.ndarray, ChatResponse]]" = OrderedDict()
+        self.buckets: List[Dict[bytes, Set[str]]] = [{} for _ in range(BANDS)]
+        self.warmed = False
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    @staticmethod
+    def _bands(signature: np.ndarray) -> List[bytes]:
+        return [signature[i * ROWS:(i + 1) * ROWS].tobytes() for i in range(BANDS)]
+
+    def add(self, entry_id: str, request: str, response: ChatResponse) -> None:
+        """Index a request and the response it produced"""
+        tokens = tokenize(request)
+        if len(tokens) < MIN_TOKENS or entry_id in self.entries:
+            return
+        signature = minhash(tokens)
+        self.entries[entry_id] = (tokens, signature, response)
+        for band, key in zip(self.buckets, self._bands(signature)):
+            band.setdefault(key, set()).add(entry_id)
+        while len(self.entries) > self.max_entries:
+            self._evict()
+
+    def _evict(self) -> None:
+        entry_id, (_, signature, _) = self.entries.popitem(last=False)
+        for band, key in zip(self.buckets, self._bands(signature)):
+            members = band.get(key)
+            if members:
+                members.discard(entry_id)
+                if not members:
+                    del band[key]
+
+    def find(self, request: str) -> Optional[Tuple[float, ChatResponse]]:
+        """Closest past response with Jaccard similarity at or above the threshold"""
+        tokens = tokenize(request)
+        if len(tokens) < MIN_TOKENS or not self.entries:
+            return None
+        candidates: Set[str] = set()
+        for band, key in zip(self.buckets, self._bands(minhash(tokens))):
+            candidates.update(band.get(key, ()))
+
+        best: Optional[Tuple[float, ChatResponse]] = None
+        for entry_id in candidates:
+            # LSH only proposes candidates; confirm on the exact token sets
+            score = jaccard(tokens, self.entries[entry_id][0])
+            if score >= self.threshold and (best is None or score > best[0]):
+                best = (score, self.entries[entry_id][2])
+        return best
+
+    async def warm(self, collection, limit: int = MAX_ENTRIES) -> None:
+        """Load the most recent opening requests from chat history into the index once per process"""
+        if self.warmed:
+            return
+        self.warmed = True
+        try:
+            # Chats saved before sessions existed have no session_id and were all opening requests
+            cursor = collection.find(
+                {"response.itinerary.0": {"$exists": True}, "$or": [{"turn": 1}, {"session_id": None}]},
+                {"id": 1, "request": 1, "response": 1}
+            ).sort("created_at", -1).limit(limit)
+            docs = await cursor.to_list(length=limit)
+        except Exception as e:
+            print(f"Error warming similarity index: {str(e)}")
+            return
+        # Oldest first so the newest entries are the last to be evicted
+        for doc in reversed(docs):
+            # Same key as save_chat_history, so a chat added before warming isn't indexed twice
+            self.add(doc["id"], doc["request"], ChatResponse(**doc["response"]))
@@ -0,0 +1,172 @@
+import bisect
+import heapq
+import math
+import re
+import unicodedata
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Matches in the title count for more than matches deep in the details
+FIELD_WEIGHTS = {"title": 3.0, "description": 1.5, "details": 1.0}
+CARD_FIELDS = ("title", "image", "date", "duration")
+FACETS = ("duration", "date")
+K1 = 1.2
+B = 0.75
+PREFIX_WEIGHT = 0.7  # A prefix match scores less than the whole word
+MAX_EXPANSIONS = 50  # Vocabulary terms a prefix may expand to
+MIN_PREFIX = 2
+
+STOP_WORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "in", "into",
+    "is", "it", "of", "on", "or", "the", "to", "with",
+}
+_TOKEN = re.compile(r"[a-z0-9]+")
+
+def tokenize(text: str, keep_last: bool = False) -> List[str]:
+    """Lowercase words with accents stripped, minus stop words
+
+    `keep_last` keeps a trailing stop word, which may be a prefix being typed.
+    """
+    text = text.lower()
+    if not text.isascii():
+        text = "".join(char for char in unicodedata.normalize("NFKD", text) if not unicodedata.combining(char))
+    tokens = _TOKEN.findall(text)
+    last = tokens[-1:] if keep_last and tokens and tokens[-1] in STOP_WORDS else []
+    return [token for token in tokens if token not in STOP_WORDS] + last
+
+class TripSearchIndex:
+    """In-memory inverted index over trips with BM25 ranking
+
+    Postings map each term to {trip id: weighted term frequency}, where
+    title, description and details contribute by FIELD_WEIGHTS. A sorted
+    vocabulary serves prefix lookups, so the last word of a query also
+    matches words it begins ("bea" finds "beach"). Trips are added and
+    removed one at a time as they are written.
+    """
+
+    def __init__(self):
+        self.postings: Dict[str, Dict[str, float]] = {}
+        self.vocabulary: List[str] = []
+        self.terms: Dict[str, List[str]] = {}
+        self.lengths: Dict[str, float] = {}
+        self.total_length = 0.0
+        self.cards: Dict[str, dict] = {}
+        self.version: Optional[str] = None  # Catalogue version this index reflects
+
+    def __len__(self) -> int:
+        return len(self.cards)
+
+    def add(self, trip: dict) -> None:
+        trip_id = str(trip["_id"])
+        self.remove(trip_id)
+        frequencies: Dict[str, float] = {}
+        for field, weight in FIELD_WEIGHTS.items():
+            for token, count in Counter(tokenize(trip.get(field) or "")).items():
+                frequencies[token] = frequencies.get(token, 0.0) + count * weight
+        for term, frequency in frequencies.items():
+            postings = self.postings.get(term)
+            if postings is None:
+                postings = self.postings[term] = {}
+                bisect.insort(self.vocabulary, term)
+            postings[trip_id] = frequency
+        self.terms[trip_id] = list(frequencies)
+        length = sum(frequencies.values())
+        self.lengths[trip_id] = length
+        self.total_length += length
+        self.cards[trip_id] = {"_id": trip_id, **{field: trip.get(field) for field in CARD_FIELDS}}
+
+    def remove(self, trip_id: str) -> None:
+        if trip_id not in self.cards:
+            return
+        del self.cards[trip_id]
+        self.total_length -= self.lengths.pop(trip_id)
+        for term in self.terms.pop(trip_id):
+            postings = self.postings[term]
+            del postings[trip_id]
+            if not postings:
+                del self.postings[term]
+                del self.vocabulary[bisect.bisect_left(self.vocabulary, term)]
+
+    def expand(self, prefix: str) -> List[str]:
+        """Vocabulary terms starting with `prefix`, other than the prefix itself"""
+        start = bisect.bisect_left(self.vocabulary, prefix)
+        terms = []
+        for term in self.vocabulary[start:start + MAX_EXPANSIONS + 1]:
+            if not term.startswith(prefix):
+                break
+            if term != prefix:
+                terms.append(term)
+        return terms[:MAX_EXPANSIONS]
+
+    def _term_scores(self, candidates: Iterable[Tuple[str, float]]) -> Dict[str, float]:
+        """BM25 score per trip for one query word, taking its best matching term"""
+        count = len(self.cards)
+        average = self.total_length / count if count else 0.0
+        scores: Dict[str, float] = {}
+        for term, weight in candidates:
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (count - len(postings) + 0.5) / (len(postings) + 0.5)) * weight
+            for trip_id, frequency in postings.items():
+                norm = K1 * (1 - B + B * self.lengths[trip_id] / average)
+                score = idf * frequency * (K1 + 1) / (frequency + norm)
+                if score > scores.get(trip_id, 0.0):
+                    scores[trip_id] = score
+        return scores
+
+    def search(
+        self,
+        query: str,
+        limit: int = 20,
+        offset: int = 0,
+        filters: Optional[Dict[str, str]] = None,
+        facets: bool = False
+    ) -> dict:
+        """Ranked trips matching every query word, with optional facet filters and counts
+
+        An empty query matches all trips, in title order.
+        """
+        filters = {field: value for field, value in (filters or {}).items() if value}
+        tokens = tokenize(query, keep_last=True)
+        if tokens:
+            totals: Optional[Dict[str, float]] = None
+            for position, token in enumerate(tokens):
+                candidates = [(token, 1.0)]
+                if position == len(tokens) - 1 and len(token) >= MIN_PREFIX:
+                    candidates += [(term, PREFIX_WEIGHT) for term in self.expand(token)]
+                scores = self._term_scores(candidates)
+                if totals is None:
+                    totals = scores
+                else:
+                    totals = {trip_id: total + scores[trip_id] for trip_id, total in totals.items() if trip_id in scores}
+                if not totals:
+                    break
+            matches = totals or {}
+        else:
+            matches = dict.fromkeys(self.cards, 0.0)
+
+        counts: Dict[str, Counter] = {field: Counter() for field in FACETS}
+        hits: Dict[str, float] = {}
+        for trip_id, score in matches.items():
+            card = self.cards[trip_id]
+            failed = [field for field, value in filters.items() if card.get(field) != value]
+            if not failed:
+                hits[trip_id] = score
+            if facets:
+                # Each facet counts with the other filters applied, so its own options stay visible
+                for field in FACETS:
+                    if card.get(field) is not None and (not failed or failed == [field]):
+                        counts[field][card.get(field)] += 1
+
+        if tokens:
+            top = heapq.nlargest(offset + limit, hits.items(), key=lambda item: (item[1], item[0]))
+        else:
+            top = heapq.nsmallest(offset + limit, hits.items(), key=lambda item: (self.cards[item[0]]["title"] or "", item[0]))
+        result = {
+            "total": len(hits),
+            "results": [{**self.cards[trip_id], "score": round(score, 4)} for trip_id, score in top[offset:]],
+        }
+        if facets:
+            result["facets"] = {field: dict(counts[field].most_common()) for field in FACETS}
+        return result
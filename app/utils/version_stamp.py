@@ -0,0 +1,52 @@
+import time
+import uuid
+from typing import Optional
+from pymongo import ReturnDocument
+
+VERSION_TTL = 5.0  # Seconds a cached version is trusted before rechecking Mongo
+
+class VersionStamp:
+    """A change counter for a collection, shared between instances through Mongo
+
+    Writers `bump` it; readers get the `current` value from memory,
+    rechecked at most every `ttl` seconds, so writes made by other
+    instances show up within that window. The stamp includes a random
+    epoch set when the counter document is created, so a reset counter
+    never repeats an old stamp.
+    """
+
+    def __init__(self, collection, name: str, ttl: float = VERSION_TTL):
+        self.collection = collection
+        self.name = name
+        self.ttl = ttl
+        self.stamp: Optional[str] = None
+        self.checked_at = 0.0
+
+    @staticmethod
+    def _format(doc: Optional[dict]) -> str:
+        return f"{doc['epoch']}.{doc['version']}" if doc else "0"
+
+    @staticmethod
+    def follows(stamp: str, previous: Optional[str]) -> bool:
+        """Whether `stamp` is the very next version after `previous`, with no writes between"""
+        if not previous or "." not in previous or "." not in stamp:
+            return False
+        epoch, version = previous.split(".")
+        return stamp == f"{epoch}.{int(version) + 1}"
+
+    async def current(self) -> str:
+        if self.stamp is None or time.monotonic() - self.checked_at >= self.ttl:
+            self.stamp = self._format(await self.collection.find_one({"_id": self.name}))
+            self.checked_at = time.monotonic()
+        return self.stamp
+
+    async def bump(self) -> str:
+        doc = await self.collection.find_one_and_update(
+            {"_id": self.name},
+            {"$inc": {"version": 1}, "$setOnInsert": {"epoch": uuid.uuid4().hex[:8]}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        self.stamp = self._format(doc)
+        self.checked_at = time.monotonic()
+        return self.stamp
@@ -0,0 +1,154 @@
+import asyncio
+import time
+from typing import Dict, List, Optional
+from pymongo.errors import BulkWriteError
+
+# Defaults: a batch every second or every 200 documents, whichever comes first
+MAX_BATCH = 200
+FLUSH_INTERVAL = 1.0
+MAX_PENDING = 10000
+PUT_TIMEOUT = 2.0  # Longest a request waits for room before its document is dropped
+RETRY_DELAYS = (0.5, 1, 2, 5)
+
+class WriteBehindQueue:
+    """Buffers documents for one collection and writes them with insert_many off the request path
+
+    Batches go out when MAX_BATCH documents are pending or FLUSH_INTERVAL has
+    passed. If Mongo stalls, failed batches are retried while the buffer
+    fills; once it holds `max_pending` documents, `put` blocks for up to
+    `put_timeout` seconds and then drops the document.
+    """
+
+    def __init__(
+        self,
+        collection,
+        name: str,
+        max_batch: int = MAX_BATCH,
+        flush_interval: float = FLUSH_INTERVAL,
+        max_pending: int = MAX_PENDING,
+        put_timeout: float = PUT_TIMEOUT
+    ):
+        self.collection = collection
+        self.name = name
+        self.max_batch = max_batch
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.put_timeout = put_timeout
+        self.queue: Optional[asyncio.Queue] = None
+        self.worker: Optional[asyncio.Task] = None
+        self.metrics = {
+            "enqueued": 0,
+            "written": 0,
+            "duplicates": 0,  # Already stored, e.g. by an attempt that timed out
+            "batches": 0,
+            "dropped": 0,
+            "failed_batches": 0,
+            "backpressure_waits": 0,
+            "last_batch_size": 0,
+            "last_flush_seconds": 0.0,
+        }
+        write_behind_queues[name] = self
+
+    def _start(self) -> None:
+        # Created lazily so the queue binds to the running event loop
+        if self.queue is None:
+            self.queue = asyncio.Queue(maxsize=self.max_pending)
+        if self.worker is None or self.worker.done():
+            self.worker = asyncio.create_task(self._run())
+
+    async def put(self, document: dict) -> bool:
+        """Queue a document for writing; False if it was dropped under backpressure"""
+        self._start()
+        try:
+            self.queue.put_nowait(document)
+        except asyncio.QueueFull:
+            self.metrics["backpressure_waits"] += 1
+            try:
+                await asyncio.wait_for(self.queue.put(document), self.put_timeout)
+            except asyncio.TimeoutError:
+                self.metrics["dropped"] += 1
+                print(f"Error queueing {self.name} write: buffer full, document dropped")
+                return False
+        self.metrics["enqueued"] += 1
+        return True
+
+    async def _next_batch(self) -> List[dict]:
+        """Wait for a first document, then collect more until the batch is full or the interval ends"""
+        batch = [await self.queue.get()]
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self.queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _write(self, batch: List[dict]) -> None:
+        started = time.monotonic()
+        for attempt, delay in enumerate((0,) + RETRY_DELAYS):
+            if delay:
+                await asyncio.sleep(delay)
+            try:
+                await self.collection.insert_many(batch, ordered=False)
+                written = len(batch)
+                break
+            except BulkWriteError as e:
+                # Duplicates are documents a failed attempt already wrote; anything else is retried
+                errors = e.details.get("writeErrors", [])
+                if all(error.get("code") == 11000 for error in errors) and not e.details.get("writeConcernErrors"):
+                    written = e.details.get("nInserted", 0)
+                    self.metrics["duplicates"] += len(errors)
+                    break
+                self.metrics["failed_batches"] += 1
+                print(f"Error writing {self.name} batch (attempt {attempt + 1}): {str(e)}")
+            except Exception as e:
+                self.metrics["failed_batches"] += 1
+                print(f"Error writing {self.name} batch (attempt {attempt + 1}): {str(e)}")
+        else:
+            self.metrics["dropped"] += len(batch)
+            return
+        self.metrics["written"] += written
+        self.metrics["batches"] += 1
+        self.metrics["last_batch_size"] = len(batch)
+        self.metrics["last_flush_seconds"] = time.monotonic() - started
+
+    async def _run(self) -> None:
+        while True:
+            batch = await self._next_batch()
+            try:
+                await self._write(batch)
+            finally:
+                for _ in batch:
+                    self.queue.task_done()
+
+    async def flush(self) -> None:
+        """Wait until everything queued so far has been written"""
+        if self.queue is not None and self.worker is not None and not self.worker.done():
+            await self.queue.join()
+
+    async def close(self) -> None:
+        """Flush and stop the worker"""
+        await self.flush()
+        if self.worker is not None:
+            self.worker.cancel()
+            self.worker = None
+
+    def snapshot(self) -> Dict[str, float]:
+        return {
+            **self.metrics,
+            "depth": self.queue.qsize() if self.queue is not None else 0,
+            "capacity": self.max_pending,
+        }
+
+# Every queue by name, for shutdown flushing and metrics
+write_behind_queues: Dict[str, WriteBehindQueue] = {}
+
+async def close_write_behind_queues() -> None:
+    for queue in write_behind_queues.values():
+        try:
+            await queue.close()
+        except Exception as e:
+            print(f"Error flushing {queue.name} writes: {str(e)}")
@@ -0,0 +1,48 @@
+"""Benchmark cab fare matrices against the local Savaari stand-in
+
+Run from the project root:
+
+    python -m benchmarks.cab_fare_bench
+"""
+import asyncio
+import time
+from datetime import datetime
+import httpx
+from app.travel_providers.fare_cache import FareCache
+from app.travel_providers.savaari import SavaariProvider
+from benchmarks import savaari_standin
+
+CITIES = ["Delhi", "Agra", "Jaipur", "Udaipur", "Jodhpur", "Jaisalmer", "Amritsar", "Chandigarh", "Shimla", "Manali"]
+
+async def main() -> None:
+    provider = SavaariProvider(
+        api_key="bench",
+        api_secret="bench",
+        base_url="http://savaari.local",
+        fare_cache=FareCache(),  # Memory tier only
+        transport=httpx.ASGITransport(app=savaari_standin.app)
+    )
+    saturday = datetime(2025, 12, 6)
+
+    for n in (3, 6, 10):
+        cities = CITIES[:n]
+        provider.fare_cache = FareCache()
+        before = savaari_standin.calls["estimate"]
+
+        started = time.perf_counter()
+        cold = await provider.get_fare_matrix(cities, cities, saturday)
+        cold_ms = (time.perf_counter() - started) * 1000
+
+        started = time.perf_counter()
+        warm = await provider.get_fare_matrix(cities, cities, saturday)
+        warm_ms = (time.perf_counter() - started) * 1000
+
+        assert cold.fares == warm.fares
+        requests = savaari_standin.calls["estimate"] - before
+        print(f"{n:>2}x{n:<2} cold {cold_ms:7.1f} ms  warm {warm_ms:6.2f} ms  API requests {requests}")
+
+    matrix = await provider.get_fare_matrix(["Delhi"], ["Agra", "Jaipur"], saturday)
+    print(matrix.date_class, matrix.fares, matrix.distances_km)
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,84 @@
+"""Benchmark radius and nearest-k hotel queries on a grid index
+
+Run from the project root:
+
+    python -m benchmarks.hotel_geo_bench
+"""
+import random
+import time
+from datetime import datetime, timedelta
+from app.travel_providers.geo import HotelGeoIndex, geocode_hotels
+from app.travel_providers.schemas import HotelResult, TravelProviderType
+
+CENTER = (19.0760, 72.8777)  # Mumbai
+SPREAD_DEGREES = 0.15  # ~16 km either side
+QUERIES = 1000
+# Far outside the hotel spread: Delhi and London
+FAR_POINTS = [(28.6139, 77.2090), (51.5, -0.1)]
+
+def fake_hotels(count: int, rng: random.Random):
+    check_in = datetime(2025, 12, 1)
+    return [
+        HotelResult(
+            provider=TravelProviderType.MMT,
+            hotel_name=f"Hotel {i}",
+            location="Mumbai",
+            check_in=check_in,
+            check_out=check_in + timedelta(days=2),
+            price_per_night=float(rng.randint(1500, 20000)),
+            total_price=float(rng.randint(3000, 40000)),
+            room_type="Standard",
+            amenities=[],
+            rating=4.0,
+            deep_link="",
+            provider_data={
+                "geo": {
+                    "lat": CENTER[0] + rng.uniform(-SPREAD_DEGREES, SPREAD_DEGREES),
+                    "lng": CENTER[1] + rng.uniform(-SPREAD_DEGREES, SPREAD_DEGREES),
+                }
+            }
+        )
+        for i in range(count)
+    ]
+
+def main() -> None:
+    rng = random.Random(7)
+    print(f"{'hotels':>7} {'build ms':>9} {'radius 2km us':>14} {'nearest 20 us':>14} {'far nearest us':>15}")
+    for count in (500, 1000, 3000, 5000):
+        hotels = geocode_hotels(fake_hotels(count, rng))
+
+        started = time.perf_counter()
+        index = HotelGeoIndex(hotels)
+        build_ms = (time.perf_counter() - started) * 1000
+
+        points = [
+            (CENTER[0] + rng.uniform(-0.1, 0.1), CENTER[1] + rng.uniform(-0.1, 0.1))
+            for _ in range(QUERIES)
+        ]
+
+        started = time.perf_counter()
+        for lat, lon in points:
+            index.within(lat, lon, 2.0)
+        radius_us = (time.perf_counter() - started) * 1e6 / QUERIES
+
+        started = time.perf_counter()
+        for lat, lon in points:
+            index.nearest(lat, lon, 20)
+        nearest_us = (time.perf_counter() - started) * 1e6 / QUERIES
+
+        started = time.perf_counter()
+        for lat, lon in FAR_POINTS * 50:
+            index.nearest(lat, lon, 1)
+        far_us = (time.perf_counter() - started) * 1e6 / (len(FAR_POINTS) * 50)
+
+        # Spot-check against a linear scan, near and far
+        for lat, lon in [points[0]] + FAR_POINTS:
+            distance = index._distance_fn(lat, lon)
+            expected = sorted(distance(i) for i in range(len(index)))[:20]
+            got = [d for d, _ in index.nearest(lat, lon, 20)]
+            assert all(abs(a - b) < 1e-9 for a, b in zip(expected, got))
+
+        print(f"{count:>7} {build_ms:>9.2f} {radius_us:>14.1f} {nearest_us:>14.1f} {far_us:>15.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""Benchmark the chatbot itinerary parser against the previous regex parser
+
+Run from the project root:
+
+    python -m benchmarks.itinerary_parser_bench
+"""
+import json
+import os
+import re
+import time
+from typing import List, Tuple
+from app.models.chatbot import ItineraryDay
+from app.utils.itinerary_parser import IncrementalItineraryParser, parse_ai_response
+
+CORPUS_PATH = os.path.join(os.path.dirname(__file__), "data", "chatbot_responses.json")
+REPEATS = 2000
+
+def legacy_parse_ai_response(response_text: str) -> Tuple[str, List[ItineraryDay]]:
+    """The parser this module replaced, kept verbatim as a baseline"""
+    summary_match = re.search(r'Trip Summary:(.+?)(?=Day \d|$)', response_text, re.DOTALL)
+    if not summary_match:
+        raise ValueError("Could not find Trip Summary section")
+    summary_section = summary_match.group(1).strip()
+    itinerary_days = []
+    day_sections = re.findall(r'Day (\d+)[^\n]*?(?:\n|$)(?:(?!Day \d).)*', response_text, re.DOTALL)
+    current_section = None
+    for section in re.split(r'(Day \d+[^\n]*)', response_text):
+        section = section.strip()
+        if not section:
+            continue
+        if section.startswith('Day'):
+            if current_section:
+                city = current_section['heading'].split(' - ')[-1].strip()
+                activities = [a.strip('• ').strip() for a in current_section['content']]
+                accommodation = next((a for a in activities if 'stay' in a.lower() or 'resort' in a.lower() or 'hotel' in a.lower() or 'accommodation' in a.lower()), None)
+                if accommodation:
+                    activities.remove(accommodation)
+                itinerary_days.append(ItineraryDay(city=city, activities=activities, accommodation=accommodation))
+            current_section = {'heading': section, 'content': []}
+        elif current_section is not None:
+            current_section['content'].extend([l.strip() for l in section.split('\n') if l.strip() and not l.strip().startswith('Day')])
+    if current_section:
+        city = current_section['heading'].split(' - ')[-1].strip()
+        activities = [a.strip('• ').strip() for a in current_section['content']]
+        accommodation = next((a for a in activities if 'stay' in a.lower() or 'resort' in a.lower() or 'hotel' in a.lower() or 'accommodation' in a.lower()), None)
+        if accommodation:
+            activities.remove(accommodation)
+        itinerary_days.append(ItineraryDay(city=city, activities=activities, accommodation=accommodation))
+    return summary_section, itinerary_days
+
+def time_parser(parse, corpus: List[str]) -> float:
+    started = time.perf_counter()
+    for _ in range(REPEATS):
+        for text in corpus:
+            parse(text)
+    return (time.perf_counter() - started) * 1e6 / (REPEATS * len(corpus))
+
+def parse_streamed(text: str, chunk_size: int = 8):
+    parser = IncrementalItineraryParser()
+    for i in range(0, len(text), chunk_size):
+        parser.feed(text[i:i + chunk_size])
+    parser.close()
+    return parser.summary, parser.itinerary
+
+def main() -> None:
+    with open(CORPUS_PATH, encoding="utf-8") as f:
+        corpus = json.load(f)
+    bullet_corpus = [text for text in corpus if not text.lstrip().startswith(('{', '```'))]
+
+    # The streaming parser must agree with the one-shot parser
+    for text in bullet_corpus:
+        assert parse_streamed(text) == parse_ai_response(text)
+
+    print(f"{len(corpus)} responses, {len(bullet_corpus)} in bullet format\n")
+    print(f"{'parser':<28} {'us/response':>12}")
+    print(f"{'legacy regex (bullet)':<28} {time_parser(legacy_parse_ai_response, bullet_corpus):>12.1f}")
+    print(f"{'single-pass (bullet)':<28} {time_parser(parse_ai_response, bullet_corpus):>12.1f}")
+    print(f"{'single-pass (all formats)':<28} {time_parser(parse_ai_response, corpus):>12.1f}")
+    print(f"{'incremental, 8-char chunks':<28} {time_parser(parse_streamed, bullet_corpus):>12.1f}")
+
+    print("\nDays parsed (legacy -> single-pass):")
+    for text in corpus:
+        summary, days = parse_ai_response(text)
+        try:
+            legacy = len(legacy_parse_ai_response(text)[1])
+        except ValueError:
+            legacy = "error"
+        print(f"  {legacy!s:>5} -> {len(days):<3} {summary[:60]}")
+
+if __name__ == "__main__":
+    main()
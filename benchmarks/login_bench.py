@@ -0,0 +1,61 @@
+"""Benchmark password logins on the event loop versus the bcrypt worker pool
+
+Fires concurrent logins while a heartbeat task stands in for every other
+request on the worker, and reports login throughput and how long the
+heartbeat was held up.
+
+Run from the project root:
+
+    python -m benchmarks.login_bench
+"""
+import asyncio
+import statistics
+import time
+from app.utils import auth
+
+LOGINS = 64
+HEARTBEAT_INTERVAL = 0.005
+
+async def heartbeat(delays: list, stop: asyncio.Event) -> None:
+    """Record how late each tick fires; a blocked loop shows up as large delays"""
+    loop = asyncio.get_running_loop()
+    while not stop.is_set():
+        expected = loop.time() + HEARTBEAT_INTERVAL
+        await asyncio.sleep(HEARTBEAT_INTERVAL)
+        delays.append(loop.time() - expected)
+
+async def blocking_login(password: str, hashed: str) -> bool:
+    return auth.verify_password(password, hashed)
+
+async def pooled_login(password: str, hashed: str) -> bool:
+    while True:
+        try:
+            valid, _ = await auth.verify_and_update_password(password, hashed)
+            return valid
+        except auth.PasswordHasherBusy:
+            # A real client would get 503 + Retry-After; retry after a beat
+            await asyncio.sleep(0.01)
+
+async def run(login, hashed: str):
+    delays: list = []
+    stop = asyncio.Event()
+    beat = asyncio.create_task(heartbeat(delays, stop))
+    await asyncio.sleep(HEARTBEAT_INTERVAL * 2)
+    started = time.perf_counter()
+    results = await asyncio.gather(*(login("correct horse", hashed) for _ in range(LOGINS)))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await beat
+    assert all(results)
+    return LOGINS / elapsed, max(delays) * 1000, statistics.median(delays) * 1000
+
+async def main() -> None:
+    hashed = auth.get_password_hash("correct horse")
+    print(f"bcrypt rounds={auth.BCRYPT_ROUNDS}, pool workers={auth.HASH_WORKERS}, queue limit={auth.HASH_QUEUE_LIMIT}")
+    print(f"{'mode':<12} {'logins/s':>9} {'max stall ms':>13} {'median stall ms':>16}")
+    for name, login in (("event loop", blocking_login), ("worker pool", pooled_login)):
+        rate, worst, median = await run(login, hashed)
+        print(f"{name:<12} {rate:>9.1f} {worst:>13.1f} {median:>16.2f}")
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,101 @@
+"""Benchmark the multi-city route optimizer for N = 2..10 cities
+
+Run from the project root:
+
+    python -m benchmarks.route_optimizer_bench
+"""
+import asyncio
+import random
+import time
+from datetime import datetime, timedelta
+from typing import List
+from app.travel_providers.aggregator import TravelAggregator
+from app.travel_providers.base import TravelProvider
+from app.travel_providers.route_optimizer import RouteOptimizer, solve_exact, solve_heuristic
+from app.travel_providers.schemas import (
+    SearchCriteria,
+    HotelSearchCriteria,
+    FlightResult,
+    HotelResult,
+    TravelProviderType
+)
+
+CITIES = ["DEL", "BOM", "BLR", "GOI", "JAI", "CCU", "MAA", "HYD", "COK", "AMD"]
+PROVIDER_LATENCY = 0.02  # Simulated seconds per provider call
+
+class FakeFlightProvider(TravelProvider):
+    """Returns deterministic prices after a fixed delay"""
+
+    def __init__(self, seed: int):
+        self.seed = seed
+
+    async def search_flights(self, criteria: SearchCriteria) -> List[FlightResult]:
+        await asyncio.sleep(PROVIDER_LATENCY)
+        rng = random.Random(f"{self.seed}:{criteria.from_city}:{criteria.to_city}")
+        departure = criteria.departure_date
+        return [
+            FlightResult(
+                provider=TravelProviderType.MMT,
+                flight_number=f"FK{rng.randint(100, 999)}",
+                airline="Fake Air",
+                departure_time=departure,
+                arrival_time=departure + timedelta(hours=2),
+                price=float(rng.randint(2000, 15000)),
+                available_seats=9,
+                class_type=criteria.class_type,
+                refundable=False,
+                deep_link=""
+            )
+        ]
+
+    async def search_hotels(self, criteria: HotelSearchCriteria) -> List[HotelResult]:
+        return []
+
+    async def get_price_calendar(self, from_city: str, to_city: str) -> dict:
+        return {}
+
+    async def check_availability(self, booking_id: str) -> bool:
+        return True
+
+def random_matrix(n: int, rng: random.Random) -> List[List[float]]:
+    return [[0.0 if i == j else float(rng.randint(2000, 15000)) for j in range(n)] for i in range(n)]
+
+def bench_solvers(repeats: int = 20) -> None:
+    rng = random.Random(42)
+    print(f"{'N':>3} {'exact ms':>10} {'heuristic ms':>13} {'gap %':>7}")
+    for n in range(2, 11):
+        matrices = [random_matrix(n, rng) for _ in range(repeats)]
+
+        started = time.perf_counter()
+        exact = [solve_exact(m)[1] for m in matrices]
+        exact_ms = (time.perf_counter() - started) * 1000 / repeats
+
+        started = time.perf_counter()
+        heuristic = [solve_heuristic(m)[1] for m in matrices]
+        heuristic_ms = (time.perf_counter() - started) * 1000 / repeats
+
+        gap = sum((h - e) / e for h, e in zip(heuristic, exact)) / repeats * 100
+        print(f"{n:>3} {exact_ms:>10.3f} {heuristic_ms:>13.3f} {gap:>7.2f}")
+
+async def bench_end_to_end() -> None:
+    aggregator = TravelAggregator(
+        providers={f"fake{i}": FakeFlightProvider(i) for i in range(3)},
+        cab_providers={},
+        max_concurrency=64
+    )
+    optimizer = RouteOptimizer(aggregator)
+    start = datetime(2025, 12, 1)
+
+    print(f"\n{'N':>3} {'pairs':>6} {'total ms':>10} {'sequential ms (est.)':>21}")
+    for n in range(2, 11):
+        started = time.perf_counter()
+        plan = await optimizer.optimize(CITIES[:n], start, start + timedelta(days=2 * n))
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        pairs = n * (n - 1)
+        sequential_ms = pairs * len(aggregator.providers) * PROVIDER_LATENCY * 1000
+        assert len(plan.legs) == n - 1
+        print(f"{n:>3} {pairs:>6} {elapsed_ms:>10.1f} {sequential_ms:>21.1f}")
+
+if __name__ == "__main__":
+    bench_solvers()
+    asyncio.run(bench_end_to_end())
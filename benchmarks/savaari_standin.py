@@ -0,0 +1,59 @@
+"""Local stand-in for the Savaari partner API
+
+Serve it for manual testing:
+
+    uvicorn benchmarks.savaari_standin:app --port 8081
+    SAVAARI_BASE_URL=http://localhost:8081 uvicorn app.main:app --reload
+
+or mount it in-process with httpx.ASGITransport(app=app).
+"""
+import asyncio
+from fastapi import FastAPI, Request
+
+app = FastAPI()
+
+RATE_PER_KM = {"Hatchback": 11.0, "Sedan": 13.0, "SUV": 17.0}
+BASE_FARE = 300.0
+LATENCY = 0.05  # Simulated seconds per request
+
+# Counts requests so callers can check cache effectiveness
+calls = {"search": 0, "estimate": 0}
+
+@app.post("/cabs/search")
+async def search(request: Request):
+    body = await request.json()
+    calls["search"] += 1
+    await asyncio.sleep(LATENCY)
+    return {
+        "cabs": [
+            {
+                "carType": car_type,
+                "carName": f"{car_type} (stand-in)",
+                "ratePerKm": rate,
+                "totalFare": BASE_FARE + rate * 80,
+                "available": True,
+                "rating": 4.2,
+                "bookingUrl": f"https://www.savaari.com/?city={body['sourceCity']}&car={car_type}"
+            }
+            for car_type, rate in RATE_PER_KM.items()
+            if body.get("carType") in (None, car_type)
+        ]
+    }
+
+@app.post("/fares/estimate")
+async def estimate(request: Request):
+    body = await request.json()
+    calls["estimate"] += 1
+    await asyncio.sleep(LATENCY)
+    surcharge = 1.15 if body.get("dateClass") == "weekend" else 1.0
+    return {
+        "fares": [
+            {
+                "source": route["source"],
+                "destination": route["destination"],
+                # Unknown distances get a flat local-trip estimate
+                "estimatedFare": round((BASE_FARE + RATE_PER_KM["Sedan"] * (route.get("distanceKm") or 25)) * surcharge, 2)
+            }
+            for route in body["routes"]
+        ]
+    }
@@ -0,0 +1,5 @@
+import os
+
+# app.db.mongo builds its client at import time; nothing here talks to a server
+os.environ.setdefault("MONGODB_URI", "mongodb://localhost:27017/travel")
+os.environ.setdefault("OPENAI_API_KEY", "sk-test")
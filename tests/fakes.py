@@ -0,0 +1,70 @@
+"""Just enough of a Motor collection for the code under test"""
+from types import SimpleNamespace
+from bson import ObjectId
+
+def matches(doc: dict, query: dict) -> bool:
+    for key, condition in query.items():
+        value = doc.get(key)
+        if isinstance(condition, dict):
+            for op, operand in condition.items():
+                if op == "$lt" and not (value is not None and value < operand):
+                    return False
+                if op == "$lte" and not (value is not None and value <= operand):
+                    return False
+                if op == "$in" and value not in operand:
+                    return False
+        elif value != condition:
+            return False
+    return True
+
+class FakeCursor:
+    def __init__(self, docs):
+        self.docs = docs
+
+    def sort(self, keys, direction=None):
+        if isinstance(keys, str):
+            keys = [(keys, direction or 1)]
+        for key, order in reversed(keys):
+            self.docs.sort(key=lambda doc: doc[key], reverse=order < 0)
+        return self
+
+    def limit(self, count):
+        self.docs = self.docs[:count]
+        return self
+
+    async def to_list(self, length=None):
+        return self.docs[:length] if length else self.docs
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for doc in self.docs:
+            yield doc
+
+class FakeCollection:
+    def __init__(self, docs=()):
+        self.docs = [dict(doc) for doc in docs]
+
+    def find(self, query=None, projection=None):
+        return FakeCursor([dict(doc) for doc in self.docs if matches(doc, query or {})])
+
+    async def insert_many(self, docs, ordered=True):
+        ids = []
+        for doc in docs:
+            doc.setdefault("_id", ObjectId())
+            self.docs.append(dict(doc))
+            ids.append(doc["_id"])
+        return SimpleNamespace(inserted_ids=ids)
+
+    async def delete_many(self, query):
+        before = len(self.docs)
+        self.docs = [doc for doc in self.docs if not matches(doc, query)]
+        return SimpleNamespace(deleted_count=before - len(self.docs))
+
+    async def bulk_write(self, requests, ordered=True):
+        for request in requests:
+            # pymongo's ReplaceOne keeps its arguments in these private slots
+            query, replacement = request._filter, request._doc
+            self.docs = [doc for doc in self.docs if not matches(doc, query)]
+            self.docs.append({**replacement, "_id": query["_id"]})
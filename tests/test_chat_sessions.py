@@ -0,0 +1,51 @@
+import asyncio
+from app.api import chatbot
+from app.models.chatbot import ChatRequest, ChatResponse, ItineraryDay
+from app.utils.chat_sessions import COMPACT_BATCH, RECENT_MESSAGES, ChatSession
+from app.utils.similarity import SimilarRequestIndex
+
+def session_with(messages: int, summarized_through: int = 0) -> ChatSession:
+    recent = [
+        {"n": n, "role": "user" if n % 2 else "assistant", "content": f"message {n}"}
+        for n in range(summarized_through + 1, messages + 1)
+    ]
+    return ChatSession(recent=recent, summarized_through=summarized_through, turns=messages // 2)
+
+def test_context_keeps_turns_waiting_for_compaction():
+    # Just short of compaction: the opening request must still reach the model
+    session = session_with(RECENT_MESSAGES + COMPACT_BATCH)
+    contents = [m["content"] for m in session.context_messages()]
+    assert contents[0] == "message 1"
+    assert len(contents) == RECENT_MESSAGES + COMPACT_BATCH
+
+def test_context_skips_summarized_turns():
+    session = session_with(8, summarized_through=4)
+    session.summary = "User asked: a week in Jaipur"
+    session.recent.insert(0, {"n": 4, "role": "assistant", "content": "message 4"})
+    contents = [m["content"] for m in session.context_messages()]
+    assert contents == ["Conversation so far: User asked: a week in Jaipur"] + [f"message {n}" for n in range(5, 9)]
+
+class FakeWriter:
+    def __init__(self):
+        self.docs = []
+
+    async def put(self, doc):
+        self.docs.append(doc)
+
+def test_only_opening_requests_feed_similarity_index(monkeypatch):
+    writer = FakeWriter()
+    index = SimilarRequestIndex()
+    monkeypatch.setattr(chatbot, "history_writer", writer)
+    monkeypatch.setattr(chatbot, "similar_requests", index)
+    plan = ChatResponse(
+        summary="Jaipur, cheaper",
+        itinerary=[ItineraryDay(city="Jaipur", activities=["Amber Fort"], accommodation=None)],
+        booking_links={},
+        cities=["Jaipur"]
+    )
+
+    asyncio.run(chatbot.save_chat_history(ChatRequest(message="make day 2 cheaper"), plan, turn=2))
+    assert index.find("Can you make day 2 cheaper please") is None
+    asyncio.run(chatbot.save_chat_history(ChatRequest(message="five days in Jaipur"), plan, turn=1))
+    assert index.find("5 days in Jaipur please") is not None
+    assert [doc["turn"] for doc in writer.docs] == [2, 1]
@@ -0,0 +1,40 @@
+import asyncio
+from datetime import datetime, timedelta
+from bson import ObjectId
+import app.utils.history_archive as history_archive
+from app.utils.history_archive import HistoryArchive
+from tests.fakes import FakeCollection
+
+NOW = datetime(2025, 6, 1)
+
+def chat(user_id: str, days_ago: int) -> dict:
+    return {
+        "_id": ObjectId(),
+        "id": str(ObjectId()),
+        "user_id": user_id,
+        "request": f"Plan {days_ago} days ago",
+        "response": {"summary": "Trip", "itinerary": [], "booking_links": {}, "cities": []},
+        "created_at": NOW - timedelta(days=days_ago),
+    }
+
+def split_history(monkeypatch):
+    """u1 has 5 chats past the cutoff and 2 recent ones; one pass archives only 3"""
+    monkeypatch.setattr(history_archive, "SCAN_BATCH", 3)
+    hot = FakeCollection([chat("u1", days) for days in (200, 180, 160, 140, 120, 10, 5)])
+    archive = HistoryArchive(hot, FakeCollection(), archive_after=timedelta(days=90))
+    assert asyncio.run(archive.archive_once(now=NOW)) == 3
+    return hot, archive
+
+def test_partial_pass_archives_oldest_chats(monkeypatch):
+    hot, archive = split_history(monkeypatch)
+    archived = asyncio.run(archive.read("u1", None, 10))
+    oldest_hot = min(doc["created_at"] for doc in hot.docs)
+    assert [NOW - doc["created_at"] for doc in archived] == [timedelta(days=d) for d in (160, 180, 200)]
+    assert all(doc["created_at"] < oldest_hot for doc in archived)
+
+def test_reads_fall_through_from_hot_to_archive(monkeypatch):
+    hot, archive = split_history(monkeypatch)
+    hot_docs = sorted(hot.docs, key=lambda doc: doc["created_at"], reverse=True)
+    last = hot_docs[-1]
+    archived = asyncio.run(archive.read("u1", (last["created_at"], last["_id"]), 10))
+    assert len(hot_docs) + len(archived) == 7
@@ -0,0 +1,14 @@
+import asyncio
+from app.api import pdf
+from tests.test_history_archive import split_history
+
+def test_export_includes_hot_and_archived_chats(monkeypatch):
+    hot, archive = split_history(monkeypatch)
+    monkeypatch.setattr(pdf, "chat_history", hot)
+    monkeypatch.setattr(pdf, "history_archive", archive)
+
+    blocks, title = asyncio.run(pdf.history_job({"user_id": "u1"}))
+    assert title == "Trip History"
+    assert ("muted", "7 saved plans") in blocks
+    headings = [text for kind, text in blocks if kind == "heading"]
+    assert len(headings) == 7
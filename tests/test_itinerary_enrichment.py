@@ -0,0 +1,50 @@
+import asyncio
+import time
+from types import SimpleNamespace
+from app.models.chatbot import ItineraryDay
+from app.utils.itinerary_enrichment import ItineraryEnricher
+
+class FakeAggregator:
+    def __init__(self, delay: float):
+        self.delay = delay
+
+    async def search_hotels_batch(self, criteria):
+        await asyncio.sleep(self.delay)
+        hotel = SimpleNamespace(
+            hotel_name=f"{criteria[0].city} Palms",
+            deep_link="https://example.com/hotel",
+            total_price=9000.0,
+            currency="INR",
+            provider=SimpleNamespace(value="fake")
+        )
+        return [[hotel]]
+
+    async def search_flights_batch(self, criteria):
+        await asyncio.sleep(self.delay)
+        return [[]]
+
+def test_single_city_stream_gets_hotel_price_after_deadline():
+    async def run():
+        enricher = ItineraryEnricher(FakeAggregator(delay=0.05), deadline=0.2)
+        for _ in range(3):
+            enricher.add_day(ItineraryDay(city="Goa", activities=["Beach"], accommodation=None))
+        # The stream outlasts the deadline before the last stay is known
+        await asyncio.sleep(0.3)
+        return await enricher.finish()
+
+    days = asyncio.run(run())
+    assert days[0].hotel.price == 9000.0
+    assert days[0].hotel.title == "Goa Palms"
+
+def test_slow_lookups_are_cut_off_at_their_deadline():
+    async def run():
+        enricher = ItineraryEnricher(FakeAggregator(delay=5), deadline=0.1)
+        enricher.add_day(ItineraryDay(city="Goa", activities=["Beach"], accommodation=None))
+        started = time.monotonic()
+        days = await enricher.finish()
+        return days, time.monotonic() - started
+
+    days, elapsed = asyncio.run(run())
+    assert elapsed < 1
+    assert days[0].hotel.price is None
+    assert "booking.com" in days[0].hotel.deep_link
@@ -0,0 +1,90 @@
+import asyncio
+import random
+from datetime import datetime, timedelta
+import pytest
+from app.travel_providers.currency import CurrencyConverter, RateSource
+from app.travel_providers.route_optimizer import RouteOptimizer, path_cost, solve_exact, solve_heuristic
+from app.travel_providers.schemas import FlightResult, TravelProviderType
+
+def random_matrix(n: int, rng: random.Random):
+    return [[0.0 if i == j else float(rng.randint(2000, 15000)) for j in range(n)] for i in range(n)]
+
+@pytest.mark.parametrize("start", [0, None])
+@pytest.mark.parametrize("return_to_start", [False, True])
+def test_exact_cost_matches_returned_order(start, return_to_start):
+    rng = random.Random(11)
+    for n in range(2, 8):
+        matrix = random_matrix(n, rng)
+        order, total = solve_exact(matrix, start, return_to_start)
+        assert sorted(order) == list(range(n))
+        assert total == pytest.approx(path_cost(matrix, order, return_to_start))
+        # The heuristic can only match or lose against the exact solver
+        _, heuristic_total = solve_heuristic(matrix, start, return_to_start)
+        assert total <= heuristic_total + 1e-9
+
+def test_free_start_round_trip_includes_closing_leg():
+    # Open paths are cheap from 0 to 2, but the way back from 2 is expensive
+    matrix = [
+        [0, 1, 100],
+        [100, 0, 1],
+        [1, 100, 0],
+    ]
+    order, total = solve_exact(matrix, None, True)
+    assert total == 3
+    assert total == path_cost(matrix, order, True)
+
+class FailingRateSource(RateSource):
+    async def fetch(self):
+        raise ConnectionError("FX provider unreachable")
+
+class FakeAggregator:
+    def __init__(self, converter):
+        self.converter = converter
+
+    async def search_flights_batch(self, criteria_list):
+        return [[flight(c.from_city, c.to_city)] for c in criteria_list]
+
+def flight(origin: str, destination: str) -> FlightResult:
+    departure = datetime(2025, 12, 1, 9)
+    return FlightResult(
+        provider=TravelProviderType.INDIGO,
+        flight_number=f"{origin}{destination}",
+        airline="IndiGo",
+        departure_time=departure,
+        arrival_time=departure + timedelta(hours=2),
+        price=float(len(origin + destination) * 1000),
+        available_seats=9,
+        class_type="economy",
+        refundable=False,
+        deep_link=""
+    )
+
+def test_optimize_survives_missing_fx_table():
+    converter = CurrencyConverter(FailingRateSource())
+    asyncio.run(converter.refresh())
+    assert not converter.supports(converter.base)
+
+    optimizer = RouteOptimizer(FakeAggregator(converter))
+    plan = asyncio.run(optimizer.optimize(["DEL", "BOM", "GOI"], datetime(2025, 12, 1), return_to_start=True))
+    assert len(plan.legs) == 3
+    assert plan.total_price == pytest.approx(sum(leg.price for leg in plan.legs))
+
+class CountingRateSource(FailingRateSource):
+    def __init__(self):
+        self.calls = 0
+
+    async def fetch(self):
+        self.calls += 1
+        return await super().fetch()
+
+def test_failed_fx_fetch_is_not_retried_on_every_search():
+    source = CountingRateSource()
+    converter = CurrencyConverter(source)
+
+    async def searches():
+        await asyncio.gather(*(converter.ensure_fresh() for _ in range(5)))
+        await converter.ensure_fresh()
+
+    asyncio.run(searches())
+    assert source.calls == 1
+    assert converter.retry_at is not None
@@ -0,0 +1,35 @@
+import asyncio
+from datetime import datetime
+from bson import ObjectId
+from app.models.chatbot import ChatResponse, ItineraryDay
+from app.utils.similarity import SimilarRequestIndex
+from tests.fakes import FakeCursor
+
+class StoredHistory:
+    """chat_history holding one opening request, as written by save_chat_history"""
+
+    def __init__(self, doc):
+        self.doc = doc
+
+    def find(self, query, projection=None):
+        return FakeCursor([dict(self.doc)])
+
+def test_warm_keys_chats_like_save_chat_history():
+    plan = ChatResponse(
+        summary="Five days in Jaipur",
+        itinerary=[ItineraryDay(city="Jaipur", activities=["Amber Fort"], accommodation=None)],
+        booking_links={},
+        cities=["Jaipur"]
+    )
+    doc = {
+        "_id": ObjectId(),
+        "id": "chat-1",
+        "turn": 1,
+        "request": "five days in Jaipur",
+        "response": plan.dict(),
+        "created_at": datetime.utcnow(),
+    }
+    index = SimilarRequestIndex()
+    index.add("chat-1", doc["request"], plan)
+    asyncio.run(index.warm(StoredHistory(doc)))
+    assert len(index) == 1
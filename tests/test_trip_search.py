@@ -0,0 +1,53 @@
+import asyncio
+import json
+from app.api import trips
+from app.utils.trip_search import TripSearchIndex
+from app.utils.version_stamp import VersionStamp
+from tests.fakes import FakeCollection
+
+class FakeVersions:
+    """The catalogue_versions collection, already past a few writes"""
+
+    def __init__(self):
+        self.doc = {"_id": "trips", "epoch": "e0", "version": 3}
+
+    async def find_one(self, query):
+        return dict(self.doc)
+
+    async def find_one_and_update(self, query, update, upsert=False, return_document=None):
+        self.doc["version"] += update["$inc"]["version"]
+        return dict(self.doc)
+
+class FakeRequest:
+    def __init__(self, rows):
+        self.body = "".join(json.dumps(row) + "\n" for row in rows).encode("utf-8")
+
+    async def stream(self):
+        yield self.body
+
+GOA = {
+    "title": "Goa Beaches",
+    "image": "goa.jpg",
+    "date": "2026-12-01",
+    "duration": "5 days",
+    "description": "Sun and sand",
+    "details": "Beach shacks",
+}
+
+def test_imported_trips_are_searchable(monkeypatch):
+    monkeypatch.setattr(trips, "db", {"trips": FakeCollection()})
+    monkeypatch.setattr(trips, "trips_version", VersionStamp(FakeVersions(), "trips"))
+    monkeypatch.setattr(trips, "trip_search", TripSearchIndex())
+
+    async def run():
+        search = dict(q="goa", limit=20, offset=0, duration=None, date=None, facets=False)
+        before = await trips.search_trips(**search)
+        result = await trips.import_trips(FakeRequest([GOA]))
+        after = await trips.search_trips(**search)
+        return before, result, after
+
+    before, result, after = asyncio.run(run())
+    assert before["total"] == 0
+    assert result["inserted"] == 1
+    assert after["total"] == 1
+    assert after["results"][0]["title"] == "Goa Beaches"
@@ -0,0 +1,24 @@
+import asyncio
+from pymongo.errors import BulkWriteError
+from app.utils import write_behind
+from app.utils.write_behind import WriteBehindQueue
+
+class RetriedCollection:
+    """Stores two of three documents, as if an earlier attempt had timed out after writing them"""
+
+    async def insert_many(self, docs, ordered=True):
+        raise BulkWriteError({
+            "nInserted": 1,
+            "writeErrors": [{"index": 0, "code": 11000}, {"index": 2, "code": 11000}],
+            "writeConcernErrors": [],
+        })
+
+def test_duplicates_are_not_counted_as_written(monkeypatch):
+    # Queues register themselves by name; keep this one out of the app's registry
+    monkeypatch.setattr(write_behind, "write_behind_queues", {})
+    queue = WriteBehindQueue(RetriedCollection(), "test_retried_history")
+    asyncio.run(queue._write([{"id": 1}, {"id": 2}, {"id": 3}]))
+    assert queue.metrics["written"] == 1
+    assert queue.metrics["duplicates"] == 2
+    assert queue.metrics["batches"] == 1
+    assert queue.metrics["dropped"] == 0